@@ -0,0 +1,189 @@
+"""Read-only JSON timetables for portal clients and display boards.
+
+Each endpoint returns the lectures and exams of one class, lecturer, room or
+student. Responses carry an ETag made from the global timetable version (see
+``Scheduler.timetable_cache``) and the resource key, so a client that sends it
+back in ``If-None-Match`` gets a 304 while nothing has changed, decided from
+the cache and one existence check without reading any schedule rows. The data
+behind a 200 is cached per timetable version as well.
+"""
+from django.contrib.auth.decorators import login_required
+from django.db.models import Prefetch, Q
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_GET
+
+from Scheduler.models import ExamRoomAssignment, ExamSchedule, LectureSchedule
+from Scheduler.timetable_cache import cached_timetable, timetable_version
+from Timetable.models import Class, Lecturer, Room
+from Users.models import StudentProfile
+
+from .views import _student_exams
+
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+def _resource_etag(kind, model, field):
+    """ETag function for ``kind`` timetables keyed on ``model.field``.
+
+    Returns None when no such row exists, so the view runs and answers 404
+    instead of a 304 for a resource that is gone.
+    """
+    def etag(request, **kwargs):
+        (key,) = kwargs.values()
+        if not model.objects.filter(**{field: key}).exists():
+            return None
+        return f"timetable-{timetable_version()}-{kind}-{key}"
+    return etag
+
+
+_student_resource_etag = _resource_etag('student', StudentProfile, 'index_number')
+
+
+def _student_etag(request, index_number):
+    # No ETag for someone else's timetable, so the view always answers with its 403
+    if _can_view_student(request.user, index_number):
+        return _student_resource_etag(request, index_number=index_number)
+    return None
+
+
+def _can_view_student(user, index_number):
+    if user.is_superuser or user.is_admin or user.is_lecturer:
+        return True
+    profile = getattr(user, 'student_profile', None) if user.is_student else None
+    return profile is not None and profile.index_number == index_number
+
+
+def _timetable_endpoint(etag_func):
+    """Login-only, GET-only, revalidated on every use through the timetable ETag."""
+    def decorator(view):
+        return login_required(require_GET(
+            cache_control(private=True, no_cache=True)(condition(etag_func=etag_func)(view))
+        ))
+    return decorator
+
+
+def _lectures(schedules):
+    schedules = schedules.select_related(
+        'course', 'assigned_class', 'lecturer', 'room', 'time_slot'
+    ).order_by('time_slot__start_time', 'course__code')
+    items = [
+        {
+            'id': s.id,
+            'day': s.day,
+            'start_time': s.time_slot.start_time.strftime('%H:%M'),
+            'end_time': s.time_slot.end_time.strftime('%H:%M'),
+            'course_code': s.course.code,
+            'course_title': s.course.title,
+            'class_code': s.assigned_class.code,
+            'lecturer': s.lecturer.name,
+            'room': s.room.code,
+        }
+        for s in schedules
+    ]
+    items.sort(key=lambda item: DAYS.index(item['day']) if item['day'] in DAYS else len(DAYS))
+    return items
+
+
+def _exams(exams, rooms=None):
+    """Serialize ``exams``; with ``rooms`` only those room assignments are listed."""
+    assignments = ExamRoomAssignment.objects.select_related('room__building').prefetch_related(
+        'proctors', 'class_allocations__class_assigned'
+    )
+    if rooms is not None:
+        assignments = assignments.filter(room__in=rooms)
+    exams = exams.select_related('course', 'time_slot').prefetch_related(
+        Prefetch('room_assignments', queryset=assignments)
+    ).order_by('date', 'time_slot__start_time', 'course__code').distinct()
+    return [
+        {
+            'id': exam.id,
+            'date': exam.date.isoformat(),
+            'day': exam.date.strftime('%A'),
+            'start_time': exam.time_slot.start_time.strftime('%H:%M'),
+            'end_time': exam.time_slot.end_time.strftime('%H:%M'),
+            'course_code': exam.course.code,
+            'course_title': exam.course.title,
+            'rooms': [
+                {
+                    'room': assignment.room.code,
+                    'building': getattr(assignment.room.building, 'name', None),
+                    'proctors': [proctor.name for proctor in assignment.proctors.all()],
+                    'classes': [
+                        {
+                            'class_code': allocation.class_assigned.code,
+                            'columns_used': allocation.columns_used,
+                            'student_count': allocation.student_count,
+                        }
+                        for allocation in assignment.class_allocations.all()
+                    ],
+                }
+                for assignment in exam.room_assignments.all()
+            ],
+        }
+        for exam in exams
+    ]
+
+
+def _timetable(kind, key, build):
+    lectures, exams = cached_timetable(f'api:{kind}', key, build)
+    return JsonResponse({
+        'kind': kind,
+        'key': key,
+        'version': timetable_version(),
+        'lectures': lectures,
+        'exams': exams,
+    })
+
+
+@_timetable_endpoint(_resource_etag('class', Class, 'code'))
+def class_timetable(request, code):
+    class_obj = get_object_or_404(Class, code=code)
+    return _timetable('class', code, lambda: (
+        _lectures(LectureSchedule.objects.filter(assigned_class=class_obj)),
+        _exams(ExamSchedule.objects.filter(
+            Q(course__classes=class_obj) |
+            Q(room_assignments__class_allocations__class_assigned=class_obj)
+        )),
+    ))
+
+
+@_timetable_endpoint(_resource_etag('lecturer', Lecturer, 'pk'))
+def lecturer_timetable(request, lecturer_id):
+    lecturer = get_object_or_404(Lecturer, pk=lecturer_id)
+    return _timetable('lecturer', lecturer.pk, lambda: (
+        _lectures(LectureSchedule.objects.filter(lecturer=lecturer)),
+        # Exams the lecturer teaches or proctors
+        _exams(ExamSchedule.objects.filter(
+            Q(course__lecturers=lecturer) | Q(room_assignments__proctors=lecturer)
+        )),
+    ))
+
+
+@_timetable_endpoint(_resource_etag('room', Room, 'code'))
+def room_timetable(request, code):
+    room = get_object_or_404(Room, code=code)
+    return _timetable('room', code, lambda: (
+        _lectures(LectureSchedule.objects.filter(room=room)),
+        _exams(ExamSchedule.objects.filter(room_assignments__room=room), rooms=[room]),
+    ))
+
+
+@_timetable_endpoint(_student_etag)
+def student_timetable(request, index_number):
+    if not _can_view_student(request.user, index_number):
+        return JsonResponse({'error': "You can only view your own timetable."}, status=403)
+    profile = get_object_or_404(StudentProfile, index_number=index_number)
+
+    def build():
+        lectures = _lectures(LectureSchedule.objects.filter(
+            course__in=profile.registered_courses.all(),
+            assigned_class__code=profile.class_code
+        ))
+        exams = _student_exams(profile)
+        for exam in exams:
+            exam['date'] = exam['date'].isoformat()
+        return lectures, exams
+
+    return _timetable('student', index_number, build)
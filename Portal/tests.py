@@ -1,3 +1,178 @@
-from django.test import TestCase
+import datetime
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from Scheduler.models import ExamRoomAssignment, ExamRoomClassAllocation, ExamSchedule, LectureSchedule
+from Timetable.models import (
+    Building, Class, College, Course, CourseType, Department, Lecturer, Room, RoomType, TimeSlot
+)
+from Users.models import LecturerProfile, StudentProfile, User
+
+# Queries the exam grid may run, however many exams it shows
+EXAM_GRID_QUERY_BUDGET = 20
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ExamTimetableGridQueryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        college = College.objects.create(code='CoS', name='College of Science')
+        building = Building.objects.create(code='SCB', name='Science Block', college=college)
+        cls.department = Department.objects.create(code='CS', name='Computer Science', college=college)
+        cls.course_type = CourseType.objects.create(name='Lecture')
+        cls.room_type = RoomType.objects.create(name='Classroom')
+        cls.building = building
+        cls.time_slot = TimeSlot.objects.create(
+            start_time=datetime.time(9, 0), end_time=datetime.time(11, 0), code='09:00-11:00',
+            is_lecture_slot=False, is_exam_slot=True
+        )
+        cls.exam_class = Class.objects.create(code='CS1', department=cls.department, level=100, size=40)
+
+        cls.user = User.objects.create_user(
+            email='proctor@example.com', username='proctor', password='secret', is_lecturer=True
+        )
+        LecturerProfile.objects.create(user=cls.user, staff_id='S001', department='Computer Science')
+        cls.proctor = Lecturer.objects.create(user=cls.user, name='Proctor One', department=cls.department)
+        cls.other_proctor = Lecturer.objects.create(name='Proctor Two', department=cls.department)
+
+    def add_exams(self, count):
+        start = ExamSchedule.objects.count()
+        for i in range(start, start + count):
+            course = Course.objects.create(
+                code=f'CS{i:03d}', title=f'Course {i}', course_type=self.course_type,
+                department=self.department, credit_hours=3, enrollment=40
+            )
+            course.lecturers.add(self.proctor)
+            exam = ExamSchedule.objects.create(
+                course=course, date=datetime.date(2025, 5, 1) + datetime.timedelta(days=i),
+                time_slot=self.time_slot
+            )
+            for j in range(2):
+                room = Room.objects.create(
+                    code=f'R{i:03d}{j}', building=self.building, room_type=self.room_type,
+                    capacity=40, dimensions='5 x 8'
+                )
+                assignment = ExamRoomAssignment.objects.create(exam=exam, room=room)
+                assignment.proctors.add(self.proctor if j == 0 else self.other_proctor)
+                ExamRoomClassAllocation.objects.create(
+                    room_assignment=assignment, class_assigned=self.exam_class,
+                    columns_used=[0, 1], student_count=10
+                )
+
+    def grid_queries(self, view_type):
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('portal:exam_timetable_grid'), {'view_type': view_type})
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_proctoring_view_query_count_does_not_grow_with_exams(self):
+        self.add_exams(2)
+        _, few = self.grid_queries('proctoring')
+        self.add_exams(8)
+        response, many = self.grid_queries('proctoring')
+
+        self.assertEqual(few, many)
+        self.assertLessEqual(many, EXAM_GRID_QUERY_BUDGET)
+        # Only the rooms this lecturer proctors are listed
+        cells = [exam for slots in response.context['grid_data'].values() for cell in slots.values() for exam in cell]
+        self.assertEqual(len(cells), 10)
+        for exam in cells:
+            self.assertEqual(len(exam['rooms']), 1)
+            self.assertEqual(exam['invigilators'], ['Proctor One'])
+
+    def test_teaching_view_query_count_does_not_grow_with_exams(self):
+        self.add_exams(2)
+        _, few = self.grid_queries('teaching')
+        self.add_exams(8)
+        _, many = self.grid_queries('teaching')
+
+        self.assertEqual(few, many)
+        self.assertLessEqual(many, EXAM_GRID_QUERY_BUDGET)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class TimetableApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        college = College.objects.create(code='CoS', name='College of Science')
+        building = Building.objects.create(code='SCB', name='Science Block', college=college)
+        department = Department.objects.create(code='CS', name='Computer Science', college=college)
+        course = Course.objects.create(
+            code='CS101', title='Programming', course_type=CourseType.objects.create(name='Lecture'),
+            department=department, credit_hours=3, enrollment=40
+        )
+        room = Room.objects.create(
+            code='R1', building=building, room_type=RoomType.objects.create(name='Classroom'),
+            capacity=40, dimensions='5 x 8'
+        )
+        time_slot = TimeSlot.objects.create(
+            start_time=datetime.time(8, 0), end_time=datetime.time(10, 0), code='08:00-10:00'
+        )
+        lecture_class = Class.objects.create(code='CS1', department=department, level=100, size=40)
+        lecturer = Lecturer.objects.create(name='Lecturer One', department=department)
+        cls.lecture = LectureSchedule.objects.create(
+            course=course, assigned_class=lecture_class, lecturer=lecturer, room=room,
+            day='Monday', time_slot=time_slot, enrollment=40
+        )
+
+        cls.student = User.objects.create_user(
+            email='student@example.com', username='student', password='secret', is_student=True
+        )
+        profile = StudentProfile.objects.create(
+            user=cls.student, index_number='1000001', program='Computer Science', class_code='CS1'
+        )
+        profile.registered_courses.add(course)
+        other = User.objects.create_user(
+            email='other@example.com', username='other', password='secret', is_student=True
+        )
+        StudentProfile.objects.create(user=other, index_number='1000002', program='Computer Science', class_code='CS1')
+
+    def setUp(self):
+        self.client.force_login(self.student)
+
+    def get(self, name, key, **headers):
+        return self.client.get(reverse(f'portal:{name}', args=[key]), headers=headers)
+
+    def test_timetable_is_served_with_an_etag(self):
+        response = self.get('api_class_timetable', 'CS1')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers['ETag'])
+        self.assertEqual([item['course_code'] for item in response.json()['lectures']], ['CS101'])
+
+    def test_matching_etag_gets_not_modified(self):
+        etag = self.get('api_room_timetable', 'R1').headers['ETag']
+
+        self.assertEqual(self.get('api_room_timetable', 'R1', if_none_match=etag).status_code, 304)
+        # The same version of another resource is a different representation
+        self.assertEqual(self.get('api_class_timetable', 'CS1', if_none_match=etag).status_code, 200)
+
+    def test_schedule_edit_changes_the_etag(self):
+        etag = self.get('api_class_timetable', 'CS1').headers['ETag']
+
+        self.lecture.day = 'Tuesday'
+        self.lecture.save()
+
+        response = self.get('api_class_timetable', 'CS1', if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertEqual(response.json()['lectures'][0]['day'], 'Tuesday')
+
+    def test_missing_resource_is_not_found_whatever_the_etag(self):
+        etag = self.get('api_class_timetable', 'CS1').headers['ETag']
+
+        for name, key in (('api_class_timetable', 'NOPE'), ('api_room_timetable', 'NOPE'),
+                          ('api_lecturer_timetable', 0)):
+            self.assertEqual(self.get(name, key, if_none_match=etag).status_code, 404)
+            self.assertEqual(self.get(name, key, if_none_match='*').status_code, 404)
+
+    def test_student_sees_only_their_own_timetable(self):
+        self.assertEqual(self.get('api_student_timetable', '1000001').status_code, 200)
+
+        response = self.get('api_student_timetable', '1000002', if_none_match='*')
+        self.assertEqual(response.status_code, 403)
+        self.assertNotIn('ETag', response.headers)
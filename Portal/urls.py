@@ -1,6 +1,6 @@
 # portal/urls.py
 from django.urls import path
-from . import views
+from . import api, views
 from .views import (
     timetable_view,
     add_event,
@@ -35,4 +35,9 @@ urlpatterns = [
     path('personal_timetable/settings/', timetable_settings, name='timetable_settings'),
     path('personal_timetable/day/', day_view, name='day_view'),
     path('personal_timetable/day/<str:date_string>/', day_view, name='day_view_with_date'),
+
+    path('api/timetable/class/<str:code>/', api.class_timetable, name='api_class_timetable'),
+    path('api/timetable/lecturer/<int:lecturer_id>/', api.lecturer_timetable, name='api_lecturer_timetable'),
+    path('api/timetable/room/<str:code>/', api.room_timetable, name='api_room_timetable'),
+    path('api/timetable/student/<str:index_number>/', api.student_timetable, name='api_student_timetable'),
 ]
@@ -14,7 +14,8 @@ from datetime import datetime,timedelta
 from django.utils import timezone
 
 from .models import PersonalEvent, PersonalTimetable, PersonalEventType
-from Scheduler.models import ExamRoomAssignment,ExamRoomClassAllocation,StudentExamAllocation
+from Scheduler.models import ExamRoomAssignment,ExamRoomClassAllocation,StudentExamAllocation,StudentExamItinerary
+from Scheduler.timetable_cache import cached_timetable, lecturer_audience, student_audience
 from .forms import PersonalEventForm, TimetableSettingsForm
 
 from Users.models import User
@@ -78,6 +79,33 @@ def portal_home(request):
         return redirect('portal:lecturer_dashboard')
 
 
+def _grid_data(schedules):
+    """``(time slots, {day: {slot id: [cells]}})`` for the sessions in ``schedules``.
+
+    Only slots that actually hold a session are returned, as plain dicts so
+    the result can be cached.
+    """
+    schedules = list(schedules)
+    conflicts = schedule_conflicts(schedules)
+    slots = {}
+    grid_data = defaultdict(lambda: defaultdict(list))
+    for schedule in schedules:
+        time_slot = schedule.time_slot
+        slots[time_slot.id] = {'id': time_slot.id, 'start_time': time_slot.start_time, 'end_time': time_slot.end_time}
+        grid_data[schedule.day][time_slot.id].append({
+            'id': schedule.id,
+            'course_code': schedule.course.code,
+            'course_title': schedule.course.title,
+            'room_code': schedule.room.code,
+            'lecturer_name': schedule.lecturer.name,
+            'class_code': schedule.assigned_class.code,
+            'time_display': f"{time_slot.start_time.strftime('%H:%M')} - {time_slot.end_time.strftime('%H:%M')}",
+            'conflicts': conflicts[schedule.id]
+        })
+    time_slots = sorted(slots.values(), key=lambda slot: slot['start_time'])
+    return time_slots, {day: dict(cells) for day, cells in grid_data.items()}
+
+
 @login_required
 def timetable_grid(request):
     """
@@ -86,10 +114,6 @@ def timetable_grid(request):
     user = request.user
     days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
     
-    # We'll derive time slots from the filtered LectureSchedule below to ensure
-    # we only show slots that actually have schedules.
-    time_slots = TimeSlot.objects.none()
-    
     # Get filter parameters
     selected_class = request.GET.get('class_filter', '')
     selected_lecturer = request.GET.get('lecturer_filter', '')
@@ -105,9 +129,10 @@ def timetable_grid(request):
     # Base query for schedules
     schedules = LectureSchedule.objects.all().select_related(
         'course', 'assigned_class', 'lecturer', 'room', 'time_slot'
-    ).prefetch_related('course__students')
+    )
     
-    # Apply role-based filtering
+    # Apply role-based filtering; the unfiltered student and lecturer grids are cached per audience
+    audience = None
     if user.is_student and hasattr(user, 'student_profile'):
         # STUDENT VIEW: Filter by registered courses and class
         student_profile = user.student_profile
@@ -119,6 +144,7 @@ def timetable_grid(request):
                 course__in=registered_courses,
                 assigned_class__code=student_class
             )
+            audience = student_audience(student_profile)
         else:
             messages.warning(request, "You haven't registered for any courses yet.")
             schedules = schedules.none()
@@ -129,6 +155,7 @@ def timetable_grid(request):
             lecturer = user.timetable_lecturer
             if lecturer:
                 schedules = schedules.filter(lecturer=lecturer)
+                audience = lecturer_audience(lecturer)
             else:
                 messages.error(request, "Lecturer record not found")
                 schedules = schedules.none()
@@ -149,30 +176,10 @@ def timetable_grid(request):
     if selected_room:  # Add room filter
         schedules = schedules.filter(room__code=selected_room)
     
-    # Now derive time slots from the filtered schedules so the grid shows
-    # only slots that actually have LectureSchedule entries
-    time_slots = TimeSlot.objects.filter(
-        id__in=schedules.values_list('time_slot_id', flat=True).distinct()
-    ).order_by('start_time')
-
-    # Create grid data structure
-    grid_data = defaultdict(lambda: defaultdict(list))
-    
-    # Organize schedules into grid format
-    for schedule in schedules:
-        day = schedule.day
-        time_slot = schedule.time_slot
-        
-        grid_data[day][time_slot.id].append({
-            'id': schedule.id,
-            'course_code': schedule.course.code,
-            'course_title': schedule.course.title,
-            'room_code': schedule.room.code,
-            'lecturer_name': schedule.lecturer.name,
-            'class_code': schedule.assigned_class.code,
-            'time_display': f"{time_slot.start_time.strftime('%H:%M')} - {time_slot.end_time.strftime('%H:%M')}",
-            'conflicts': check_schedule_conflicts(schedule)
-        })
+    if audience and not (selected_course or selected_class or selected_lecturer or selected_room):
+        time_slots, grid_data = cached_timetable('grid', audience, lambda: _grid_data(schedules))
+    else:
+        time_slots, grid_data = _grid_data(schedules)
 
     # Determine base template based on user role
     base_template = 'home/base.html' if (user.is_superuser or user.is_admin) else 'portal/base.html'
@@ -180,7 +187,7 @@ def timetable_grid(request):
     context = {
         'days': days,
         'time_slots': time_slots,
-        'grid_data': dict(grid_data),
+        'grid_data': grid_data,
         'user_type': 'student' if user.is_student else 'lecturer' if user.is_lecturer else 'admin',
         'all_classes': all_classes,
         'all_lecturers': all_lecturers,
@@ -371,7 +378,7 @@ def exam_timetable_grid(request):
     # Get all classes, courses, and rooms for filters
     all_classes = Class.objects.all().order_by('code')
     all_courses = Course.objects.all().order_by('code')
-    all_rooms = Room.objects.all().order_by('code')
+    all_rooms = Room.objects.select_related('room_type').order_by('code')
     
     # Handle filters
     selected_class = request.GET.get('class_filter', '')
@@ -380,13 +387,17 @@ def exam_timetable_grid(request):
     selected_room = request.GET.get('room_filter', '')
     view_type = request.GET.get('view_type', 'teaching')  # Default to teaching view
     
-    # Initialize base query - ADD prefetch_related for proctors
+    # Everything the grid shows comes from this query and its prefetches,
+    # so the page costs the same number of queries whatever the exam count
     exam_schedules = ExamSchedule.objects.select_related(
         'course', 'time_slot'
     ).prefetch_related(
-        'room_assignments',
-        'room_assignments__room',
-        'room_assignments__proctors'  # ADD THIS
+        Prefetch('room_assignments', queryset=ExamRoomAssignment.objects.select_related(
+            'room__room_type'
+        ).prefetch_related(
+            Prefetch('proctors', queryset=Lecturer.objects.select_related('user')),
+            Prefetch('class_allocations', queryset=ExamRoomClassAllocation.objects.select_related('class_assigned')),
+        ))
     )
     
     # Apply role-based filtering
@@ -436,22 +447,19 @@ def exam_timetable_grid(request):
             
             # Get only the rooms where current user is proctoring (for proctoring view)
             rooms = []
+            invigilators = []
             for room_assignment in exam.room_assignments.all():
-                if view_type == 'proctoring':
-                    # Only include if current user is a proctor for this room
-                    if room_assignment.proctors.filter(user=user).exists():
-                        rooms.append({
-                            'room_code': room_assignment.room.code,
-                            'room_type': getattr(room_assignment.room.room_type, 'name', 'N/A'),
-                            'capacity': getattr(room_assignment.room, 'capacity', 0)
-                        })
-                else:
-                    # For teaching view, show all rooms
-                    rooms.append({
-                        'room_code': room_assignment.room.code,
-                        'room_type': getattr(room_assignment.room.room_type, 'name', 'N/A'),
-                        'capacity': getattr(room_assignment.room, 'capacity', 0)
-                    })
+                proctors = room_assignment.proctors.all()
+                if view_type == 'proctoring' and not any(proctor.user_id == user.id for proctor in proctors):
+                    continue
+                room = room_assignment.room
+                rooms.append({
+                    'room_code': room.code,
+                    'room_type': getattr(room.room_type, 'name', 'N/A'),
+                    'capacity': getattr(room, 'capacity', 0),
+                    'classes': [allocation.class_assigned.code for allocation in room_assignment.class_allocations.all()]
+                })
+                invigilators.extend(proctor.name for proctor in proctors)
             
             if not rooms:
                 rooms = [{'room_code': 'TBA', 'room_type': 'N/A', 'capacity': 0}]
@@ -465,6 +473,7 @@ def exam_timetable_grid(request):
                 'time_display': f"{time_slot.start_time.strftime('%H:%M')}-{time_slot.end_time.strftime('%H:%M')}",
                 'duration': getattr(time_slot, 'duration', 'N/A'),
                 'rooms': rooms,
+                'invigilators': invigilators,
                 'is_proctoring': view_type == 'proctoring'
             })
     
@@ -587,33 +596,40 @@ def timetable_list_view(request):
     user = request.user
     schedules = LectureSchedule.objects.select_related('course', 'time_slot', 'room', 'assigned_class', 'lecturer')
 
+    audience = None
     if user.is_student and hasattr(user, 'student_profile'):
         registered = user.student_profile.registered_courses.all()
         class_code = user.student_profile.class_code
         schedules = schedules.filter(course__in=registered, assigned_class__code=class_code)
+        audience = student_audience(user.student_profile)
     elif user.is_lecturer and hasattr(user, 'timetable_lecturer') and user.timetable_lecturer:
         schedules = schedules.filter(lecturer=user.timetable_lecturer)
+        audience = lecturer_audience(user.timetable_lecturer)
     elif user.is_admin:
         # optional: keep as all; could filter by admin college if modeled
         pass
 
-    # Sort schedules properly: by class, then course, then day, then time
-    items = []
-    for s in schedules.order_by('assigned_class__code', 'course__code', 'day', 'time_slot__start_time'):
-        start = s.time_slot.start_time.strftime('%H:%M')
-        end = s.time_slot.end_time.strftime('%H:%M')
-        items.append({
-            'schedule_id': s.id,
-            'course_code': s.course.code,
-            'course_title': s.course.title,
-            'day': s.day,
-            'start_time': start,
-            'end_time': end,
-            'room': getattr(s.room, 'code', 'TBA'),
-            'class_code': getattr(s.assigned_class, 'code', ''),
-            'lecturer': getattr(s.lecturer, 'name', ''),
-            'enrollment': getattr(s, 'enrollment', 0),
-        })
+    def list_items():
+        # Sort schedules properly: by class, then course, then day, then time
+        items = []
+        for s in schedules.order_by('assigned_class__code', 'course__code', 'day', 'time_slot__start_time'):
+            start = s.time_slot.start_time.strftime('%H:%M')
+            end = s.time_slot.end_time.strftime('%H:%M')
+            items.append({
+                'schedule_id': s.id,
+                'course_code': s.course.code,
+                'course_title': s.course.title,
+                'day': s.day,
+                'start_time': start,
+                'end_time': end,
+                'room': getattr(s.room, 'code', 'TBA'),
+                'class_code': getattr(s.assigned_class, 'code', ''),
+                'lecturer': getattr(s.lecturer, 'name', ''),
+                'enrollment': getattr(s, 'enrollment', 0),
+            })
+        return items
+
+    items = cached_timetable('list', audience, list_items) if audience else list_items()
 
     if user.is_authenticated:
         if user.is_student:
@@ -629,27 +645,47 @@ def timetable_list_view(request):
         'base_template': base_template,
         'role': 'student' if user.is_student else 'lecturer' if user.is_lecturer else 'admin'
     })
-@login_required
-def student_exam_schedule_list(request):
-    """
-    Student-specific exam timetable in list view format showing only the room
-    where the student has been specifically assigned
+def _exam_duration(start_time, end_time):
+    duration_minutes = (end_time.hour * 60 + end_time.minute) - (start_time.hour * 60 + start_time.minute)
+    return f"{duration_minutes} minutes"
+
+
+def _itinerary_exams(student_index):
+    """A student's exams from the precomputed itinerary: one indexed read by student index."""
+    return [
+        {
+            'exam_id': row.exam_id,
+            'course_code': row.course_code,
+            'course_title': row.course_title,
+            'date': row.date,
+            'day': row.date.strftime('%A'),
+            'start_time': row.start_time.strftime('%H:%M'),
+            'end_time': row.end_time.strftime('%H:%M'),
+            'duration': _exam_duration(row.start_time, row.end_time),
+            'rooms': [{
+                'code': row.room_code,
+                'building': row.building or 'N/A',
+                'college': row.college or "College Not Specified",
+                'seat_info': f"Column {row.column_number}",
+                'is_assigned': True
+            }]
+        }
+        for row in StudentExamItinerary.objects.filter(student_index=student_index)
+    ]
+
+
+def _allocated_exams(student_profile, exclude=()):
+    """A student's exams derived from the exam, room and seat allocation tables.
+
+    Exams whose ids are in ``exclude`` are left out.
     """
-    user = request.user
-    
-    if not (user.is_student and hasattr(user, 'student_profile')):
-        messages.error(request, "This view is only available to students")
-        return redirect('portal:portal_home')
-    
-    # Get student's profile information
-    student_profile = user.student_profile
     student_index = student_profile.index_number
     student_class = student_profile.class_code
-    
+
     # Get exam schedules with building and college data
     exam_schedules = ExamSchedule.objects.filter(
         course__in=student_profile.registered_courses.all()
-    ).select_related(
+    ).exclude(pk__in=exclude).select_related(
         'course', 'time_slot'
     ).prefetch_related(
         Prefetch('room_assignments',
@@ -683,8 +719,7 @@ def student_exam_schedule_list(request):
         # Calculate duration
         start_time = exam.time_slot.start_time
         end_time = exam.time_slot.end_time
-        duration_minutes = (end_time.hour * 60 + end_time.minute) - (start_time.hour * 60 + start_time.minute)
-        duration = f"{duration_minutes} minutes"
+        duration = _exam_duration(start_time, end_time)
         
         # Get student's specific allocation
         allocation = student_allocations.get(exam.id)
@@ -721,6 +756,7 @@ def student_exam_schedule_list(request):
                         break
         
         exams.append({
+            'exam_id': exam.id,
             'course_code': exam.course.code,
             'course_title': exam.course.title,
             'date': exam.date,
@@ -736,6 +772,37 @@ def student_exam_schedule_list(request):
                 'is_assigned': False
             }]
         })
+    return exams
+
+
+def _student_exams(student_profile):
+    """All of a student's exams: seated ones from the itinerary, the rest from
+    the class allocations (or TBA) as before seats were assigned."""
+    exams = _itinerary_exams(student_profile.index_number)
+    seated = {exam['exam_id'] for exam in exams}
+    exams += _allocated_exams(student_profile, exclude=seated)
+    exams.sort(key=lambda exam: (exam['date'], exam['start_time']))
+    return exams
+
+
+@login_required
+def student_exam_schedule_list(request):
+    """
+    Student-specific exam timetable in list view format showing only the room
+    where the student has been specifically assigned
+    """
+    user = request.user
+    
+    if not (user.is_student and hasattr(user, 'student_profile')):
+        messages.error(request, "This view is only available to students")
+        return redirect('portal:portal_home')
+    
+    # Get student's profile information
+    student_profile = user.student_profile
+    student_index = student_profile.index_number
+    student_class = student_profile.class_code
+    
+    exams = _student_exams(student_profile)
 
     if user.is_authenticated:
         if user.is_student:
@@ -759,36 +826,76 @@ def student_exam_schedule_list(request):
     return render(request, 'portal/exam_schedule_list.html', context)
 
 
-def check_schedule_conflicts(schedule):
-    """Check if this schedule has any conflicts"""
-    conflicts = []
-    
-    # Check room conflicts
-    room_conflicts = LectureSchedule.objects.filter(
-        day=schedule.day,
-        time_slot=schedule.time_slot,
-        room=schedule.room
-    ).exclude(id=schedule.id)
-    
-    if room_conflicts.exists():
-        conflicts.append(f"Room conflict with {room_conflicts.first().course.code}")
-    
-    # Check lecturer conflicts
-    lecturer_conflicts = LectureSchedule.objects.filter(
-        day=schedule.day,
-        time_slot=schedule.time_slot,
-        lecturer=schedule.lecturer
-    ).exclude(id=schedule.id)
-    
-    if lecturer_conflicts.exists():
-        conflicts.append(f"Lecturer conflict with {lecturer_conflicts.first().course.code}")
-    
+def schedule_conflicts(schedules):
+    """Room, lecturer and class double-bookings for each of the given sessions.
+
+    Clashes are checked against every stored session in the same day and
+    time slot, not only the filtered ones, using one query and an in-memory
+    group-by. Returns ``{schedule id: [conflict messages]}``.
+    """
+    booked = {
+        'Room': defaultdict(list),
+        'Lecturer': defaultdict(list),
+        'Class': defaultdict(list),
+    }
+    others = LectureSchedule.objects.filter(
+        day__in={schedule.day for schedule in schedules},
+        time_slot_id__in={schedule.time_slot_id for schedule in schedules},
+    ).order_by('id').values_list('id', 'day', 'time_slot_id', 'room_id', 'lecturer_id', 'assigned_class_id', 'course__code')
+    for pk, day, time_slot_id, room_id, lecturer_id, class_id, course_code in others:
+        booked['Room'][(day, time_slot_id, room_id)].append((pk, course_code))
+        booked['Lecturer'][(day, time_slot_id, lecturer_id)].append((pk, course_code))
+        booked['Class'][(day, time_slot_id, class_id)].append((pk, course_code))
+
+    conflicts = {}
+    for schedule in schedules:
+        resources = {
+            'Room': schedule.room_id,
+            'Lecturer': schedule.lecturer_id,
+            'Class': schedule.assigned_class_id,
+        }
+        conflicts[schedule.id] = []
+        for label, resource in resources.items():
+            clashes = [
+                course_code for pk, course_code in booked[label][(schedule.day, schedule.time_slot_id, resource)]
+                if pk != schedule.id
+            ]
+            if clashes:
+                conflicts[schedule.id].append(f"{label} conflict with {clashes[0]}")
     return conflicts
 
 
 
 
 
+def _session_events(schedules):
+    """The lecture fields the week and day views render, as plain dicts that can be cached."""
+    return [
+        {
+            'id': pk, 'day': day, 'time_slot_id': time_slot_id,
+            'course_code': course_code, 'course_title': course_title, 'room_code': room_code,
+        }
+        for pk, day, time_slot_id, course_code, course_title, room_code in schedules.values_list(
+            'id', 'day', 'time_slot_id', 'course__code', 'course__title', 'room__code'
+        )
+    ]
+
+
+def _exam_events(exams):
+    """The exam fields the week view needs, as plain dicts that can be cached."""
+    return [
+        {
+            'id': pk, 'date': date, 'day': date.strftime('%A'), 'time_slot_id': time_slot_id,
+            'start_time': start_time, 'end_time': end_time,
+            'course_code': course_code, 'course_title': course_title,
+        }
+        for pk, date, time_slot_id, start_time, end_time, course_code, course_title in exams.values_list(
+            'id', 'date', 'time_slot_id', 'time_slot__start_time', 'time_slot__end_time',
+            'course__code', 'course__title'
+        ).distinct()
+    ]
+
+
 @login_required
 def timetable_view(request):
     timetable, _ = PersonalTimetable.objects.get_or_create(user=request.user)
@@ -811,10 +918,12 @@ def timetable_view(request):
             student_class = student_profile.class_code
             
             if registered_courses.exists():
-                institutional_events = LectureSchedule.objects.filter(
-                    course__in=registered_courses,
-                    assigned_class__code=student_class
-                ).select_related('course', 'room', 'time_slot', 'assigned_class', 'lecturer')
+                institutional_events = cached_timetable('week', student_audience(student_profile), lambda: _session_events(
+                    LectureSchedule.objects.filter(
+                        course__in=registered_courses,
+                        assigned_class__code=student_class
+                    )
+                ))
             else:
                 messages.warning(request, "You haven't registered for any courses yet.")
         
@@ -822,9 +931,11 @@ def timetable_view(request):
         elif request.user.is_lecturer and hasattr(request.user, 'timetable_lecturer'):
             lecturer = request.user.timetable_lecturer
             if lecturer:
-                institutional_events = LectureSchedule.objects.filter(
-                    lecturer=lecturer
-                ).select_related('course', 'room', 'time_slot', 'assigned_class', 'lecturer')
+                institutional_events = cached_timetable('week', lecturer_audience(lecturer), lambda: _session_events(
+                    LectureSchedule.objects.filter(
+                        lecturer=lecturer
+                    )
+                ))
             else:
                 messages.error(request, "Lecturer record not found")
     
@@ -836,18 +947,22 @@ def timetable_view(request):
             student_class = student_profile.class_code
             
             if registered_courses.exists():
-                exam_events = ExamSchedule.objects.filter(
-                    course__in=registered_courses,
-                    course__classes__code=student_class
-                ).select_related('course', 'time_slot')
+                exam_events = cached_timetable('week-exams', student_audience(student_profile), lambda: _exam_events(
+                    ExamSchedule.objects.filter(
+                        course__in=registered_courses,
+                        course__classes__code=student_class
+                    )
+                ))
         
         # For lecturers
         elif request.user.is_lecturer and hasattr(request.user, 'timetable_lecturer'):
             lecturer = request.user.timetable_lecturer
             if lecturer:
-                exam_events = ExamSchedule.objects.filter(
-                    course__lecturers=lecturer
-                ).select_related('course', 'time_slot')
+                exam_events = cached_timetable('week-exams', lecturer_audience(lecturer), lambda: _exam_events(
+                    ExamSchedule.objects.filter(
+                        course__lecturers=lecturer
+                    )
+                ))
     
     context = {
         'timetable': timetable,
@@ -946,17 +1061,20 @@ def day_view(request, date_string=None):
     
     if timetable.show_institutional_classes:
         if hasattr(request.user, 'timetable_lecturer'):
-            institutional_events = LectureSchedule.objects.filter(
-                lecturer=request.user.timetable_lecturer,
-                day=current_day
-            ).select_related('course', 'room', 'time_slot')
+            lecturer = request.user.timetable_lecturer
+            institutional_events = cached_timetable(f'day:{current_day}', lecturer_audience(lecturer), lambda: _session_events(
+                LectureSchedule.objects.filter(
+                    lecturer=lecturer,
+                    day=current_day
+                )
+            ))
         else:
             try:
                 student_classes = request.user.student_classes.all()
-                institutional_events = LectureSchedule.objects.filter(
+                institutional_events = _session_events(LectureSchedule.objects.filter(
                     assigned_class__in=student_classes,
                     day=current_day
-                ).select_related('course', 'room', 'time_slot')
+                ))
             except AttributeError:
                 pass
     
@@ -4,19 +4,35 @@ from .models import (
     ExamSchedule,
     ExamRoomAssignment,
     ExamRoomClassAllocation,
-    StudentExamAllocation
+    StudentExamAllocation,
+    StudentExamItinerary,
+    ScheduleDraft,
+    GenerationJob
 )
+from .timetable_cache import batch_invalidation, invalidate_timetables
+
+
+class InvalidatesTimetablesAdmin(admin.ModelAdmin):
+    """Deletes here bypass the schedule signals, so invalidate cached timetables explicitly."""
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        invalidate_timetables()
+
+    def delete_queryset(self, request, queryset):
+        with batch_invalidation():
+            super().delete_queryset(request, queryset)
 
 
 @admin.register(LectureSchedule)
-class LectureScheduleAdmin(admin.ModelAdmin):
+class LectureScheduleAdmin(InvalidatesTimetablesAdmin):
     list_display = ('course', 'assigned_class', 'lecturer', 'room', 'day', 'time_slot', 'created_at')
     list_filter = ('day', 'time_slot', 'room')
     search_fields = ('course__code', 'assigned_class__code', 'lecturer__name')
 
 
 @admin.register(ExamSchedule)
-class ExamScheduleAdmin(admin.ModelAdmin):
+class ExamScheduleAdmin(InvalidatesTimetablesAdmin):
     list_display = ('course', 'date', 'time_slot', 'created_at')
     list_filter = ('date', 'time_slot')
     search_fields = ('course__code',)
@@ -40,3 +56,21 @@ class StudentExamAllocationAdmin(admin.ModelAdmin):
     list_display = ('student_index', 'exam', 'room', 'column_number')
     list_filter = ('exam', 'room')
     search_fields = ('student_index', 'exam__course__code', 'room__name')
+
+
+@admin.register(StudentExamItinerary)
+class StudentExamItineraryAdmin(admin.ModelAdmin):
+    list_display = ('student_index', 'course_code', 'date', 'start_time', 'room_code', 'column_number')
+    search_fields = ('student_index', 'course_code', 'room_code')
+
+
+@admin.register(ScheduleDraft)
+class ScheduleDraftAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'seed', 'source', 'size', 'created_at')
+    list_filter = ('kind', 'source')
+
+
+@admin.register(GenerationJob)
+class GenerationJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'processed', 'total', 'placed', 'created_at', 'finished_at')
+    list_filter = ('kind', 'status')
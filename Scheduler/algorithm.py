@@ -4,6 +4,21 @@ import random
 from math import ceil 
 import heapq
 
+from .booking import BookingEngine, ROOM, LECTURER, CLASS
+from .conflicts import build_conflict_graph
+from .enrollment import decode_students
+from .periods import assign_periods, period_capacity
+from .proctors import ProctorPool
+from .seating import SeatingEngine
+from .room_index import RoomCandidateIndex
+
+# Key in ``scheduling_issues`` listing the sessions displaced during a run
+EVICTIONS_KEY = 'evictions'
+
+
+class GenerationCancelled(Exception):
+    """Raised from a ``progress`` callback to stop a solver run early."""
+
 @lru_cache(maxsize=None)
 def get_valid_day_slot_combinations(days_tuple, time_slots_str, block_size):
     days = list(days_tuple)
@@ -38,26 +53,30 @@ def get_course_priority(course_code, lecturers_courses_mapping, enrollment_break
     max_enrollment = max(enrollments) if enrollments else 0
     return (lecturer_count, -max_enrollment)  # Low lecturer count first
 
-def get_course_lecturer(course_code, lecturers_courses_mapping, lecturer_availability, 
-                        lecturer_bookings, day, slots, lecturer_assignments):
-    """Select lecturer with availability or assume full availability if none given."""
+def get_course_lecturer(course_code, lecturers_courses_mapping, lecturer_availability,
+                        bookings, day, mask, lecturer_assignments):
+    """Select lecturer with availability or assume full availability if none given.
+
+    ``lecturer_availability`` holds the per-day masks built by
+    ``BookingEngine.availability_masks``; ``day`` is a day index.
+    """
     lecturers = lecturers_courses_mapping.get(course_code, [])
     if not lecturers:
         return None
 
     def is_fully_available(lecturer):
-        available = lecturer_availability.get(lecturer, {}).get(day)
-        if available is None:
-            return True  
-        return set(available).issuperset(set(slots))
+        available = lecturer_availability.get(lecturer)
+        if available is None or available[day] is None:
+            return True
+        return not (mask & ~available[day])
 
-    lecturers.sort(key=lambda l: (
+    lecturers = sorted(lecturers, key=lambda l: (
         0 if is_fully_available(l) else 1,
         lecturer_assignments.get(l, 0)
     ))
 
     for lecturer in lecturers:
-        if is_available(lecturer_bookings[lecturer], day, slots) and is_fully_available(lecturer):
+        if bookings.is_free(LECTURER, lecturer, day, mask) and is_fully_available(lecturer):
             return lecturer
     return None
 
@@ -75,195 +94,163 @@ def get_course_lecturer(course_code, lecturers_courses_mapping, lecturer_availab
 #             return room
 #     return None
 
-def select_room(
-    class_size,
-    available_rooms,
-    room_size,
-    course_code,
-    course_type_map,
-    room_type_map,
-    lab_room_map,
-    course_lab_type_map,
-    room_usage_count,
-    room_bookings,
-    day,
-    slots):
-    """Improved room selection with strict prioritization of large classes"""
-    
-    course_type = course_type_map.get(course_code, "lecture")
-    is_large_class = class_size >= 200
-    
-    # --- STAGE 1: Filter by room type and capacity ---
-    if course_type == "practical":
-        required_lab_type = course_lab_type_map.get(course_code)
-        suitable_rooms = [
-            r for r in available_rooms
-            if (room_type_map.get(r) == "laboratory" )and 
-                required_lab_type in lab_room_map.get(r, []) and
-                room_size[r] >= class_size
-        ]
-    else:
-        suitable_rooms = [
-            r for r in available_rooms
-            if (room_type_map.get(r) in {"lecture hall", "classroom", "auditorium"}) and
-                room_size[r] >= class_size and
-                (not is_large_class or room_type_map.get(r) == "lecture hall") and
-                (is_large_class or room_size[r] <= max(class_size * 2, 100))  # 50% utilization rule
-        ]
-    
-    # --- STAGE 2: Prioritization ---
-    # For large classes: prefer largest available lecture halls first
-    if is_large_class:
-        suitable_rooms.sort(key=lambda r: (
-            -room_size[r],  # Largest rooms first
-            room_usage_count[r]  # Then least used
-        ))
-    # For small classes: prefer smallest suitable rooms
-    else:
-        suitable_rooms.sort(key=lambda r: (
-            room_size[r],  # Smallest rooms first
-            room_usage_count[r]  # Then least used
-        ))
-    
-    # --- STAGE 3: Availability Check ---
-    for room in suitable_rooms:
-        if is_available(room_bookings[room], day, slots):
+def select_room(ranked_rooms, fallback_rooms, bookings, day, mask, displace_below=None):
+    """Improved room selection with strict prioritization of large classes
+
+    ``ranked_rooms`` and ``fallback_rooms`` come from
+    ``RoomCandidateIndex.candidates`` and are already filtered by room type,
+    lab type and capacity and ordered by priority, so only availability is
+    checked here. With ``displace_below`` set, a booked room is also acceptable
+    when every session holding it has an enrollment below that value.
+    """
+    def is_usable(room):
+        if bookings.is_free(ROOM, room, day, mask):
+            return True
+        return displace_below is not None and all(
+            entry is not None and entry['enrollment'] < displace_below
+            for entry in bookings.holders(ROOM, room, day, mask)
+        )
+
+    for room in ranked_rooms:
+        if is_usable(room):
             return room
     
     # --- FALLBACK: Relax constraints if no room found ---
-    if not suitable_rooms and is_large_class:
-        # For large classes: try any large enough room if lecture halls are full
-        fallback_rooms = [
-            r for r in available_rooms
-            if room_size[r] >= class_size and
-               room_type_map.get(r) in {"lecture hall", "auditorium"}
-        ]
-        fallback_rooms.sort(key=lambda r: (
-            -room_size[r],
-            room_usage_count[r]
-        ))
-        for room in fallback_rooms:
-            if is_available(room_bookings[room], day, slots):
-                return room
+    for room in fallback_rooms:
+        if is_usable(room):
+            return room
     
     return None
 
 
-def is_available(booking_map, day, slots):
-    """Check if all slots on a day are free."""
-    return all(slot not in booking_map[day] for slot in slots)
-
-def assign_slots(booking_map, day, slots):
-    """Mark slots on a day as booked."""
-    for slot in slots:
-        booking_map[day].add(slot)
-
-def unassign_slots(booking_map, day, slots):
-    """Free slots on a day."""
-    for slot in slots:
-        booking_map[day].discard(slot)
+def is_available(bookings, room, assigned_class, lecturer, day, mask):
+    """Check that the room, class and (optional) lecturer are free for ``mask``."""
+    return (bookings.is_free(ROOM, room, day, mask) and
+            bookings.is_free(CLASS, assigned_class, day, mask) and
+            (not lecturer or bookings.is_free(LECTURER, lecturer, day, mask)))
+
+def assign_slots(bookings, room, assigned_class, lecturer, day, mask, session=None):
+    """Mark the room, class and lecturer as booked for ``mask`` by ``session``."""
+    bookings.book(ROOM, room, day, mask, session)
+    bookings.book(CLASS, assigned_class, day, mask, session)
+    if lecturer:
+        bookings.book(LECTURER, lecturer, day, mask, session)
+
+def unassign_slots(bookings, room, assigned_class, lecturer, day, mask):
+    """Free the room, class and lecturer for ``mask``."""
+    bookings.release(ROOM, room, day, mask)
+    bookings.release(CLASS, assigned_class, day, mask)
+    if lecturer:
+        bookings.release(LECTURER, lecturer, day, mask)
+
+def blocking_sessions(bookings, room, assigned_class, lecturer, day, mask):
+    """Distinct sessions occupying the room, class or lecturer within ``mask``."""
+    blockers = {}
+    holders = bookings.holders(ROOM, room, day, mask) + bookings.holders(CLASS, assigned_class, day, mask)
+    if lecturer:
+        holders += bookings.holders(LECTURER, lecturer, day, mask)
+    for session in holders:
+        blockers[id(session)] = session
+    return list(blockers.values())
 
 def try_assign(room, day, slots, lecturer, assigned_class, class_enrollment,
-              room_bookings, lecturer_bookings, class_bookings,
-              lecturer_assignments, room_usage_count, schedule, unscheduled_courses,
-              course_code, lecturers_courses_mapping, enrollment_breakdown, course_class_map):
-    """Helper to handle assignments with conflict resolution."""
-    # Try direct assignment first
-    if (is_available(room_bookings[room], day, slots) and
-        is_available(class_bookings[assigned_class], day, slots) and
-        (not lecturer or is_available(lecturer_bookings[lecturer], day, slots))):
-        
-        assign_slots(room_bookings[room], day, slots)
-        assign_slots(class_bookings[assigned_class], day, slots)
-        if lecturer:
-            assign_slots(lecturer_bookings[lecturer], day, slots)
-            lecturer_assignments[lecturer] += 1
-        
-        room_usage_count[room] += 1
-        schedule.append({
-            'course': course_code,
-            'class': assigned_class,
-            'day': day,
-            'slots': slots,
-            'room': room,
-            'lecturer': lecturer,
-            'enrollment': class_enrollment
-        })
-        return True
-    
-    # If conflict exists, try unassigning lower-priority sessions
-    for entry in sorted(schedule, key=lambda x: (-x['enrollment'], random.random())):
-        if entry['enrollment'] < class_enrollment:  # Lower priority
-            # Temporarily unassign
-            unassign_slots(room_bookings[entry['room']], entry['day'], entry['slots'])
-            unassign_slots(class_bookings[entry['class']], entry['day'], entry['slots'])
+              bookings, lecturer_assignments, room_usage_count, schedule, unscheduled_courses,
+              course_code, lecturers_courses_mapping, enrollment_breakdown, course_class_map,
+              evicted, scheduling_issues):
+    """Helper to handle assignments with conflict resolution.
+
+    On a conflict only the sessions actually holding the requested room, class
+    or lecturer slots are considered; they are displaced when every one of them
+    has a lower enrollment than the new session. Displaced sessions are marked
+    in ``evicted``, logged under ``scheduling_issues[EVICTIONS_KEY]`` and their
+    block is re-queued on ``unscheduled_courses``.
+    """
+    day_index = bookings.day_index[day]
+    mask = bookings.slots_mask(slots)
+
+    if not is_available(bookings, room, assigned_class, lecturer, day_index, mask):
+        blockers = blocking_sessions(bookings, room, assigned_class, lecturer, day_index, mask)
+        if not blockers or any(entry['enrollment'] >= class_enrollment for entry in blockers):
+            return False
+
+        for entry in blockers:
+            unassign_slots(bookings, entry['room'], entry['class'], entry['lecturer'],
+                           bookings.day_index[entry['day']], bookings.slots_mask(entry['slots']))
             if entry['lecturer']:
-                unassign_slots(lecturer_bookings[entry['lecturer']], entry['day'], entry['slots'])
                 lecturer_assignments[entry['lecturer']] -= 1
-            
-            # Try assigning new session
-            if (is_available(room_bookings[room], day, slots) and \
-               is_available(class_bookings[assigned_class], day, slots) and \
-               (not lecturer or is_available(lecturer_bookings[lecturer], day, slots))):
-                
-                assign_slots(room_bookings[room], day, slots)
-                assign_slots(class_bookings[assigned_class], day, slots)
-                if lecturer:
-                    assign_slots(lecturer_bookings[lecturer], day, slots)
-                    lecturer_assignments[lecturer] += 1
-                
-                room_usage_count[room] += 1
-                schedule.append({
-                    'course': course_code,
-                    'class': assigned_class,
-                    'day': day,
-                    'slots': slots,
-                    'room': room,
-                    'lecturer': lecturer,
-                    'enrollment': class_enrollment
-                })
-                
-                # Re-add unassigned entry to retry later
-                heapq.heappush(unscheduled_courses, (
-                    get_course_priority(entry['course'], lecturers_courses_mapping, 
-                                      enrollment_breakdown, course_class_map),
-                    entry['course'],
-                    sum(len(s.split(' - ')) for s in entry['slots'])  # Estimate credits
-                ))
-                return True
-            else:
-                # Revert unassignment
-                assign_slots(room_bookings[entry['room']], entry['day'], entry['slots'])
-                assign_slots(class_bookings[entry['class']], entry['day'], entry['slots'])
-                if entry['lecturer']:
-                    assign_slots(lecturer_bookings[entry['lecturer']], entry['day'], entry['slots'])
-                    lecturer_assignments[entry['lecturer']] += 1
-    
-    return False
+            room_usage_count[entry['room']] -= 1
+            evicted.add(id(entry))
+
+            # Re-add the displaced block to retry later
+            block = len(entry['slots'])
+            heapq.heappush(unscheduled_courses, (
+                get_course_priority(entry['course'], lecturers_courses_mapping,
+                                    enrollment_breakdown, course_class_map),
+                entry['course'],
+                block,
+                ((entry['class'], block),)
+            ))
+            scheduling_issues[EVICTIONS_KEY].append({
+                'course': entry['course'],
+                'class': entry['class'],
+                'day': entry['day'],
+                'slots': entry['slots'],
+                'room': entry['room'],
+                'displaced_by': course_code,
+            })
+
+    session = {
+        'course': course_code,
+        'class': assigned_class,
+        'day': day,
+        'slots': slots,
+        'room': room,
+        'lecturer': lecturer,
+        'enrollment': class_enrollment
+    }
+    assign_slots(bookings, room, assigned_class, lecturer, day_index, mask, session)
+    if lecturer:
+        lecturer_assignments[lecturer] += 1
+    room_usage_count[room] += 1
+    schedule.append(session)
+    return True
 
 def generate_complete_schedule(
     courses, course_class_map, enrollment_breakdown, room_size,
     lecturers_courses_mapping, lecturer_availability, rooms, days, time_slots,
      course_type_map, room_type_map, lab_room_map,
-    course_lab_type_map,max_attempts=100,
+    course_lab_type_map,max_attempts=100, seed=None, progress=None,
 ):
+    """Place every (course, class, block) into a room/day/slot.
+
+    ``seed`` drives all random tie-breaking, so the same inputs and seed always
+    produce the same timetable. ``progress(processed, total, placed)`` is
+    called after each course with the number of distinct courses processed,
+    the number of courses and the sessions placed so far; it may raise
+    ``GenerationCancelled`` to abort the run.
+    """
+    rng = random.Random(seed)
     schedule = []
-    room_bookings = defaultdict(lambda: defaultdict(set))
-    lecturer_bookings = defaultdict(lambda: defaultdict(set))
-    class_bookings = defaultdict(lambda: defaultdict(set))
+    bookings = BookingEngine(days, time_slots)
+    availability_masks = bookings.availability_masks(lecturer_availability)
+    room_index = RoomCandidateIndex(rooms, room_size, room_type_map, lab_room_map)
     room_usage_count = defaultdict(int)
     lecturer_assignments = defaultdict(int)
     scheduling_issues = defaultdict(list)
+    evicted = set()
     
-    # Priority queue: courses with fewer lecturers & higher enrollment first
+    # Priority queue: courses with fewer lecturers & higher enrollment first.
+    # Entries are (priority, course, credit, targets) where targets is a tuple
+    # of (class, block) pairs to place, or empty for every block of the course.
     course_queue = []
     for course_code, credit in courses.items():
         priority = get_course_priority(course_code, lecturers_courses_mapping, 
                                      enrollment_breakdown, course_class_map)
-        heapq.heappush(course_queue, (priority, course_code, credit))
+        heapq.heappush(course_queue, (priority, course_code, credit, ()))
     
     unscheduled_courses = []
     attempt_counter = 0
+    processed_courses = set()
     
     while course_queue or unscheduled_courses:
         if not course_queue:  # Retry unscheduled courses
@@ -273,60 +260,73 @@ def generate_complete_schedule(
             if attempt_counter > 3:  # Max 3 retry cycles
                 break
             
-        _, course_code, credit = heapq.heappop(course_queue)
-        assigned_classes = course_class_map.get(course_code, [])
-        blocks = [2] * (credit // 2) + ([1] if credit % 2 else [])
+        _, course_code, credit, targets = heapq.heappop(course_queue)
+        if not targets:
+            blocks = [2] * (credit // 2) + ([1] if credit % 2 else [])
+            targets = [
+                (assigned_class, block)
+                for assigned_class in course_class_map.get(course_code, [])
+                for block in blocks
+            ]
         
-        for assigned_class in assigned_classes:
+        for assigned_class, block in targets:
             class_enrollment = len(enrollment_breakdown.get(course_code, {}).get(assigned_class, []))
             if class_enrollment == 0:
                 continue
             
-            for block in blocks:
-                combinations = get_valid_day_slot_combinations(tuple(days), ",".join(time_slots), block)
-                combinations.sort(key=lambda x: (
+            combinations = sorted(
+                get_valid_day_slot_combinations(tuple(days), ",".join(time_slots), block),
+                key=lambda x: (
                     -get_time_priority(time_slots[x[1]].split(' - ')[0]),
-                    random.random()
-                ))
-                
-                assigned = False
+                    rng.random()
+                )
+            )
+            ranked_rooms, fallback_rooms = room_index.candidates(
+                class_enrollment,
+                course_type_map.get(course_code, "lecture"),
+                course_lab_type_map.get(course_code),
+                room_usage_count
+            )
+            
+            # First look for a free placement; only if none exists allow
+            # displacing lower-enrollment sessions from the candidate slots.
+            assigned = False
+            for displace in (False, True):
                 for day, start_slot in combinations:
                     slots = time_slots[start_slot:start_slot + block]
+                    day_index = bookings.day_index[day]
+                    mask = BookingEngine.block_mask(start_slot, block)
                     
                     # Try both with and without lecturer constraint
                     lecturer_options = [True] if lecturers_courses_mapping.get(course_code) else [False]
 
                     for require_lecturer in lecturer_options:
                         lecturer = get_course_lecturer(
-                            course_code, lecturers_courses_mapping, lecturer_availability,
-                            lecturer_bookings, day, slots, lecturer_assignments
+                            course_code, lecturers_courses_mapping, availability_masks,
+                            bookings, day_index, mask, lecturer_assignments
                         ) if require_lecturer else None
                         
                         if require_lecturer and not lecturer:
                             continue
                          
                         room = select_room(
-                            class_enrollment,
-                            rooms,
-                            room_size,
-                            course_code,
-                            course_type_map,
-                            room_type_map,
-                            lab_room_map,
-                            course_lab_type_map,
-                            room_usage_count,
-                            room_bookings,
-                            day,
-                            slots
+                            ranked_rooms,
+                            fallback_rooms,
+                            bookings,
+                            day_index,
+                            mask,
+                            displace_below=class_enrollment if displace else None
                         )
-                        if not room or not is_available(class_bookings[assigned_class], day, slots):
+                        if not room:
+                            continue
+                        if not displace and not bookings.is_free(CLASS, assigned_class, day_index, mask):
                             continue
                         
                         if try_assign(
                             room, day, slots, lecturer, assigned_class, class_enrollment,
-                            room_bookings, lecturer_bookings, class_bookings,
-                            lecturer_assignments, room_usage_count, schedule, unscheduled_courses,
-                            course_code, lecturers_courses_mapping, enrollment_breakdown, course_class_map
+                            bookings, lecturer_assignments, room_usage_count, schedule, unscheduled_courses,
+                            course_code, lecturers_courses_mapping, enrollment_breakdown, course_class_map,
+                            evicted, scheduling_issues
                         ):
                             assigned = True
                             break
@@ -334,21 +334,32 @@ def generate_complete_schedule(
                     if assigned:
                         break
                 
-                if not assigned:
-                    heapq.heappush(unscheduled_courses, (
-                        get_course_priority(course_code, lecturers_courses_mapping,
-                                          enrollment_breakdown, course_class_map),
-                        course_code,
-                        credit
-                    ))
-                    scheduling_issues[course_code].append({
-                        'class': assigned_class,
-                        'block': block,
-                        'reason': f"Failed after {max_attempts} attempts (will retry)"
-                    })
+                if assigned:
+                    break
+            
+            if not assigned:
+                heapq.heappush(unscheduled_courses, (
+                    get_course_priority(course_code, lecturers_courses_mapping,
+                                      enrollment_breakdown, course_class_map),
+                    course_code,
+                    credit,
+                    ((assigned_class, block),)
+                ))
+                scheduling_issues[course_code].append({
+                    'class': assigned_class,
+                    'block': block,
+                    'reason': f"Failed after {max_attempts} attempts (will retry)"
+                })
+
+        if progress:
+            processed_courses.add(course_code)
+            progress(len(processed_courses), len(courses), len(schedule) - len(evicted))
+
+    # Displaced sessions were released from the bookings; drop them from the output
+    schedule = [entry for entry in schedule if id(entry) not in evicted]
 
     print(f"Generated schedule with {len(schedule)} sessions")
-    print(f"Scheduling issues: {sum(len(v) for v in scheduling_issues.values())}")
+    print(f"Scheduling issues: {sum(len(v) for k, v in scheduling_issues.items() if k != EVICTIONS_KEY)}")
     return schedule, scheduling_issues
 
 
@@ -360,6 +371,13 @@ def generate_complete_schedule(
 
 
 
+def assign_proctors(proctor_pool, room_proctors, required, day, slot):
+    """Top ``room_proctors`` up to ``required`` proctors taken from the pool at (day, slot)."""
+    needed_proctors = required - len(room_proctors)
+    if needed_proctors > 0:
+        room_proctors.update(proctor_pool.take(day, slot, needed_proctors))
+
+
 def exam_schedule(
     student_enrollment,
     course_type,
@@ -372,36 +390,62 @@ def exam_schedule(
     proctors_in_center,
     proctors,
     proctors_availability,
-    enrollment_breakdown
+    enrollment_breakdown,
+    student_indexes=None,
+    seed=None,
+    progress=None
 ):
+    """Assign exams to day/slot/rooms, seat classes by column and attach proctors.
+
+    ``seed`` drives the random slot order, so the same inputs and seed always
+    produce the same exam timetable. ``progress(processed, total, placed)`` is
+    called after each course, like in ``generate_complete_schedule``.
+    When ``student_indexes`` is given, ``enrollment_breakdown`` holds interned
+    student ids (see ``Scheduler.enrollment``) and the seated ``student_ids``
+    are decoded back to index strings.
+    """
+    rng = random.Random(seed)
+
     # Initialization
     exam_schedule = []
     # Prevent per-student double-booking: track each student's (day, slot) assignments
     student_slot_bookings = defaultdict(set)
-    room_usage = defaultdict(lambda: defaultdict(set))
+    # Courses sharing students, and the courses seated in each (day, slot), so a
+    # slot is known to be clash-free for a whole course with one set lookup
+    conflict_graph = build_conflict_graph(enrollment_breakdown)
+    slot_courses = defaultdict(set)
+    seating = SeatingEngine(room_dimensions)
     room_courses = defaultdict(lambda: defaultdict(set))
     proctor_used = defaultdict(lambda: defaultdict(set))
     extra_columns = defaultdict(list)
     available_space = defaultdict(lambda: defaultdict(int))
     assigned_courses = set()
     assigned_students_tracker = defaultdict(lambda: defaultdict(int))  
-    global_proctor_slot_usage = defaultdict(set)
     manual_assignment_log = []
 
     student_enrollment_sorted = sorted(student_enrollment.items(), key=lambda x: x[1], reverse=True)
     rooms_sorted = sorted(room_size.items(), key=lambda x: x[1], reverse=True)
 
-    
-    proctors_with_availability = [
-        p for p in proctors 
-        if p in proctors_availability and proctors_availability[p]  
-    ]
-    proctors_without_availability = [
-        p for p in proctors 
-        if p not in proctors_availability or not proctors_availability[p]  
-    ]
+    proctor_pool = ProctorPool(proctors, proctors_availability)
+
+    # Slot-assignment phase: colour the conflict graph into periods that fit
+    # the seating capacity; the seating loop below tries each course's planned
+    # period first and only searches other slots when seating there fails
+    planned_periods = assign_periods(
+        {
+            course: size for course, size in student_enrollment_sorted
+            if 'lab' not in course_type.get(course, '').lower()
+        },
+        conflict_graph,
+        [(d, s) for d in exam_days for s in exam_slots],
+        period_capacity(room_size, room_dimensions, max_courses, overflow_rooms),
+        rng,
+    )
+
+    for processed, (course, course_size) in enumerate(student_enrollment_sorted):
+        if progress:
+            progress(processed, len(student_enrollment_sorted), len(exam_schedule))
 
-    for course, course_size in student_enrollment_sorted:
         if 'lab' in course_type.get(course, '').lower():
             manual_assignment_log.append({
                 'course': course,
@@ -416,9 +460,20 @@ def exam_schedule(
         assigned_slot = None
 
         all_day_slot_combo = [(d, s) for d in exam_days for s in exam_slots]
-        random.shuffle(all_day_slot_combo)
+        rng.shuffle(all_day_slot_combo)
+
+        # Try the planned period, then other clash-free slots; only slots
+        # holding a conflicting course need the per-student booking check
+        conflicting = conflict_graph.get(course, {})
+        clashing_slots = {
+            combo for combo in all_day_slot_combo
+            if conflicting and not slot_courses[combo].isdisjoint(conflicting)
+        }
+        planned = planned_periods.get(course)
+        all_day_slot_combo.sort(key=lambda combo: (combo in clashing_slots, combo != planned))
 
         for day, slot in all_day_slot_combo:
+            partial_overlap = (day, slot) in clashing_slots
             for room, _ in rooms_sorted:
                 if room in overflow_rooms or room.startswith("Lab-"):
                     continue
@@ -428,16 +483,13 @@ def exam_schedule(
                     any(r['room'] == room for r in rooms_used)):
                     continue
 
-                row_num = int(room_dimensions[room].split(' x ')[0])
-                col_num = int(room_dimensions[room].split(' x ')[1])
-                available_columns = set(range(col_num))
-                used_columns = room_usage[(day, slot)][room]
-                free_columns = available_columns - used_columns
+                row_num = seating.rows[room]
+                col_num = seating.columns[room]
 
                 max_allowed_courses = max_courses[room]
                 max_cols_for_course = col_num // max_allowed_courses
 
-                if len(free_columns) < max_cols_for_course:
+                if seating.free_count(day, slot, room) < max_cols_for_course:
                     continue
 
                 min_students_per_col = 0.75 * row_num
@@ -448,7 +500,10 @@ def exam_schedule(
                     for class_code, ids in enrollment_breakdown.get(course, {}).items():
                         already_assigned = assigned_students_tracker[course][class_code]
                         # Filter out students already booked in this (day, slot)
-                        remaining_students = [sid for sid in ids[already_assigned:] if (day, slot) not in student_slot_bookings[sid]]
+                        if partial_overlap:
+                            remaining_students = [sid for sid in ids[already_assigned:] if (day, slot) not in student_slot_bookings[sid]]
+                        else:
+                            remaining_students = list(ids[already_assigned:])
 
                         if not remaining_students:
                             continue
@@ -461,11 +516,11 @@ def exam_schedule(
                         # Mark booked for each assigned student
                         for sid in assigned_ids:
                             student_slot_bookings[sid].add((day, slot))
+                        slot_courses[(day, slot)].add(course)
                         assigned_students_tracker[course][class_code] += students_to_assign
                         unassigned -= students_to_assign
 
-                        cols_to_use = set(sorted(free_columns)[:max_cols_for_course])
-                        room_usage[(day, slot)][room].update(cols_to_use)
+                        cols_to_use = seating.take_lowest(day, slot, room, max_cols_for_course)
                         room_courses[(day, slot)][room].add(course)
 
                         rooms_used.append({
@@ -480,28 +535,7 @@ def exam_schedule(
                     if not assigned:
                         continue
 
-                    # Improved proctor assignment with better availability handling
-                    needed_proctors = proctors_in_center[room] - len(proctor_used[(day, slot)][room])
-                    if needed_proctors > 0:
-                        # Try proctors with explicit availability first
-                        for proctor in proctors_with_availability:
-                            if (proctor not in global_proctor_slot_usage[(day, slot)] and 
-                                day in proctors_availability[proctor]):
-                                proctor_used[(day, slot)][room].add(proctor)
-                                global_proctor_slot_usage[(day, slot)].add(proctor)
-                                needed_proctors -= 1
-                                if needed_proctors <= 0:
-                                    break
-                        
-                        # Fall back to proctors without availability if still needed
-                        if needed_proctors > 0:
-                            for proctor in proctors_without_availability:
-                                if proctor not in global_proctor_slot_usage[(day, slot)]:
-                                    proctor_used[(day, slot)][room].add(proctor)
-                                    global_proctor_slot_usage[(day, slot)].add(proctor)
-                                    needed_proctors -= 1
-                                    if needed_proctors <= 0:
-                                        break
+                    assign_proctors(proctor_pool, proctor_used[(day, slot)][room], proctors_in_center[room], day, slot)
 
                     if assigned_day is None:
                         assigned_day = day
@@ -511,14 +545,11 @@ def exam_schedule(
                     remainder = col_num % max_allowed_courses
                     extra_col_start = col_num - remainder
                     for i in range(extra_col_start, col_num):
-                        if i not in room_usage[(day, slot)][room]:
+                        if not seating.is_used(day, slot, room, i):
                             extra_columns[(day, slot)].append((room, i, row_num))
 
             if unassigned > 0:
                 for over_room in overflow_rooms:
-                    over_row_num = int(room_dimensions[over_room].split(' x ')[0])
-                    over_col_num = int(room_dimensions[over_room].split(' x ')[1])
-
                     if available_space[(day, slot)][over_room] == 0:
                         available_space[(day, slot)][over_room] = room_size[over_room]
 
@@ -530,7 +561,10 @@ def exam_schedule(
                     for class_code, ids in enrollment_breakdown.get(course, {}).items():
                         already_assigned = assigned_students_tracker[course][class_code]
                         # Filter out students already booked in this (day, slot)
-                        remaining_students = [sid for sid in ids[already_assigned:] if (day, slot) not in student_slot_bookings[sid]]
+                        if partial_overlap:
+                            remaining_students = [sid for sid in ids[already_assigned:] if (day, slot) not in student_slot_bookings[sid]]
+                        else:
+                            remaining_students = list(ids[already_assigned:])
 
                         if not remaining_students:
                             continue
@@ -543,6 +577,7 @@ def exam_schedule(
                         # Mark booked for each assigned student
                         for sid in assigned_ids:
                             student_slot_bookings[sid].add((day, slot))
+                        slot_courses[(day, slot)].add(course)
                         assigned_students_tracker[course][class_code] += students_to_assign
                         available_space[(day, slot)][over_room] -= students_to_assign
                         unassigned -= students_to_assign
@@ -562,27 +597,7 @@ def exam_schedule(
                     if not assigned:
                         continue
 
-                    # Assign proctors to overflow rooms using same logic
-                    needed_proctors = proctors_in_center[over_room] - len(proctor_used[(day, slot)][over_room])
-                    if needed_proctors > 0:
-                        # First try proctors with explicit availability
-                        for proctor in proctors_with_availability:
-                            if (proctor not in global_proctor_slot_usage[(day, slot)] and 
-                                day in proctors_availability[proctor]):
-                                proctor_used[(day, slot)][over_room].add(proctor)
-                                global_proctor_slot_usage[(day, slot)].add(proctor)
-                                needed_proctors -= 1
-                                if needed_proctors <= 0:
-                                    break
-                        
-                        # Then try proctors without explicit availability if still needed
-                        for proctor in proctors_without_availability:
-                            if proctor not in global_proctor_slot_usage[(day, slot)]:
-                                proctor_used[(day, slot)][over_room].add(proctor)
-                                global_proctor_slot_usage[(day, slot)].add(proctor)
-                                needed_proctors -= 1
-                                if needed_proctors <= 0:
-                                    break
+                    assign_proctors(proctor_pool, proctor_used[(day, slot)][over_room], proctors_in_center[over_room], day, slot)
 
                     if assigned_day is None:
                         assigned_day = day
@@ -614,6 +629,9 @@ def exam_schedule(
                 'reason': 'Not enough space in all rooms including overflow'
             })
 
+    if progress:
+        progress(len(student_enrollment_sorted), len(student_enrollment_sorted), len(exam_schedule))
+
     unassigned_column_log = []
     for (day, slot), extras in extra_columns.items():
         for room, col_index, row_num in extras:
@@ -621,45 +639,9 @@ def exam_schedule(
                 continue
             unassigned_column_log.append((day, slot, room, col_index, row_num))
 
-    proctor_schedule = defaultdict(list)
-    for exam in exam_schedule:
-        day = exam['day']
-        slot = exam['slot']
-        course = exam['course']
-        for room_info in exam['rooms']:
-            room = room_info['room']
-            for proctor in exam['proctors'].get(room, set()):
-                proctor_schedule[proctor].append((day, slot, room, course))
-
-    # Print each proctor's schedule and check for conflicts
-    print("\nPROCTOR SCHEDULE VERIFICATION:")
-    print("-" * 50)
-    has_conflicts = False
-    
-    for proctor, assignments in sorted(proctor_schedule.items()):
-        print(f"\nProctor: {proctor}")
-        # Group assignments by day and slot to detect conflicts
-        time_slots = defaultdict(list)
-        for day, slot, room, course in assignments:
-            time_slots[(day, slot)].append((room, course))
-        
-        for (day, slot), rooms_courses in time_slots.items():
-            unique_rooms = set(room for room, _ in rooms_courses)
-            if len(unique_rooms) > 1:
-                has_conflicts = True
-                print(f"  ⚠️ CONFLICT on {day} {slot}: Assigned to {len(unique_rooms)} different rooms!")
-                for room, course in rooms_courses:
-                    print(f"    - Room: {room}, Course: {course}")
-            else:
-                room = unique_rooms.pop()
-                num_courses = len(rooms_courses)
-                print(f"  ✓ {day} {slot}: Room {room} for {num_courses} course(s)" + 
-                    (" (multiple courses allowed)" if num_courses > 1 else ""))
-
-
-    if not has_conflicts:
-        print("\n✅ No proctor scheduling conflicts found!")
-    else:
-        print("\n❌ WARNING: Proctor scheduling conflicts detected!")
+    if student_indexes is not None:
+        for exam in exam_schedule:
+            for room_info in exam['rooms']:
+                room_info['student_ids'] = decode_students(room_info['student_ids'], student_indexes)
 
     return exam_schedule, manual_assignment_log, unassigned_column_log
\ No newline at end of file
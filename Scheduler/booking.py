@@ -0,0 +1,111 @@
+"""Compact occupancy store used by the lecture solver.
+
+Rooms, lecturers and classes are interned to integer indexes on first use and
+each resource keeps one integer bitmask per day, where bit ``i`` is set when
+``time_slots[i]`` is booked. Checking or booking a block of consecutive slots
+is then a single ``&``/``|`` against a precomputed block mask instead of a loop
+over slot strings.
+
+Bookings can optionally record the session holding each (resource, day, slot)
+so the solver can look up exactly which sessions block a candidate placement
+instead of scanning the whole schedule.
+"""
+
+ROOM = 'room'
+LECTURER = 'lecturer'
+CLASS = 'class'
+
+RESOURCE_KINDS = (ROOM, LECTURER, CLASS)
+
+
+def iter_slots(mask):
+    """Yield the slot indexes set in ``mask``, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class BookingEngine:
+    """Per-day bitmask bookings for rooms, lecturers and classes."""
+
+    def __init__(self, days, time_slots):
+        self.days = list(days)
+        self.time_slots = list(time_slots)
+        self.day_index = {day: i for i, day in enumerate(self.days)}
+        self.slot_index = {slot: i for i, slot in enumerate(self.time_slots)}
+        self._index = {kind: {} for kind in RESOURCE_KINDS}
+        self._occupancy = {kind: [] for kind in RESOURCE_KINDS}
+        self._holders = {kind: {} for kind in RESOURCE_KINDS}
+
+    def index(self, kind, key):
+        """Return the integer index for ``key``, registering it if needed."""
+        index = self._index[kind].get(key)
+        if index is None:
+            index = len(self._occupancy[kind])
+            self._index[kind][key] = index
+            self._occupancy[kind].append([0] * len(self.days))
+        return index
+
+    @staticmethod
+    def block_mask(start_slot, block_size):
+        """Mask covering ``block_size`` consecutive slots from ``start_slot``."""
+        return ((1 << block_size) - 1) << start_slot
+
+    def slots_mask(self, slots):
+        """Mask for an arbitrary iterable of slot strings (unknown slots are ignored)."""
+        mask = 0
+        for slot in slots:
+            index = self.slot_index.get(slot)
+            if index is not None:
+                mask |= 1 << index
+        return mask
+
+    def occupancy(self, kind, key, day):
+        """Raw booked-slot mask of ``key`` on day index ``day``."""
+        return self._occupancy[kind][self.index(kind, key)][day]
+
+    def is_free(self, kind, key, day, mask):
+        """True when none of the slots in ``mask`` are booked for ``key``."""
+        return not (self._occupancy[kind][self.index(kind, key)][day] & mask)
+
+    def book(self, kind, key, day, mask, session=None):
+        """Mark the slots in ``mask`` as booked for ``key``, optionally by ``session``."""
+        index = self.index(kind, key)
+        self._occupancy[kind][index][day] |= mask
+        if session is not None:
+            holders = self._holders[kind]
+            for slot in iter_slots(mask):
+                holders[(index, day, slot)] = session
+
+    def release(self, kind, key, day, mask):
+        """Free the slots in ``mask`` for ``key``."""
+        index = self.index(kind, key)
+        self._occupancy[kind][index][day] &= ~mask
+        holders = self._holders[kind]
+        if holders:
+            for slot in iter_slots(mask):
+                holders.pop((index, day, slot), None)
+
+    def holders(self, kind, key, day, mask):
+        """Sessions recorded against the booked slots of ``key`` within ``mask``."""
+        index = self.index(kind, key)
+        booked = self._occupancy[kind][index][day] & mask
+        holders = self._holders[kind]
+        return [holders.get((index, day, slot)) for slot in iter_slots(booked)]
+
+    def availability_masks(self, availability):
+        """Convert ``{name: {day: [slot, ...]}}`` into ``{name: [mask or None per day]}``.
+
+        ``None`` means no availability was declared for that day, which the
+        solver treats as fully available.
+        """
+        masks = {}
+        for name, by_day in availability.items():
+            per_day = [None] * len(self.days)
+            for day, slots in (by_day or {}).items():
+                day_index = self.day_index.get(day)
+                if day_index is not None and slots is not None:
+                    per_day[day_index] = self.slots_mask(slots)
+            masks[name] = per_day
+        return masks
@@ -0,0 +1,29 @@
+"""Course conflict graph for the exam solver.
+
+Two courses conflict when at least one student is registered for both, so
+their exams must not share a (day, slot). The graph is built once from
+``enrollment_breakdown`` and maps each course to its conflicting courses and
+the number of students they share.
+"""
+from collections import defaultdict
+
+
+def build_conflict_graph(enrollment_breakdown):
+    """Return ``{course: {other course: shared students}}`` for every conflicting pair."""
+    student_courses = defaultdict(list)
+    for course, by_class in enrollment_breakdown.items():
+        for ids in by_class.values():
+            for sid in ids:
+                student_courses[sid].append(course)
+
+    graph = defaultdict(lambda: defaultdict(int))
+    for courses in student_courses.values():
+        if len(courses) < 2:
+            continue
+        for i, course in enumerate(courses):
+            neighbours = graph[course]
+            for other in courses[i + 1:]:
+                if other != course:
+                    neighbours[other] += 1
+                    graph[other][course] += 1
+    return {course: dict(neighbours) for course, neighbours in graph.items()}
@@ -0,0 +1,168 @@
+"""Generated timetables kept for preview before they are accepted.
+
+Every preview is a ``ScheduleDraft`` row holding the compressed payload; the
+session only keeps the id of the draft being previewed under the keys below,
+so session reads and writes stay small and drafts outlive the session. Drafts
+generated offline are loaded into the same preview/accept flow by id.
+Regenerating in the same session replaces the previous web draft, and
+drafts past SCHEDULER_DRAFT_MAX_AGE_DAYS are deleted as new ones are saved
+unless they were accepted.
+"""
+import copy
+import datetime
+import os
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import ScheduleDraft
+from .snapshot import EXTENSION, write_snapshot
+
+PREVIEW_SESSION_KEYS = {
+    ScheduleDraft.LECTURE: 'preview_schedule_draft',
+    ScheduleDraft.EXAM: 'preview_exam_schedule_draft',
+}
+
+
+def lecture_payload(schedule, schedule_issues, seed):
+    """JSON-serializable lecture preview."""
+    return {
+        'schedule': [
+            {
+                'course': item['course'],
+                'class': item['class'],
+                'lecturer': item['lecturer'],
+                'room': item['room'],
+                'day': item['day'],
+                'slots': item['slots'],
+                'enrollment': item.get('enrollment', 0),
+            }
+            for item in schedule
+        ],
+        'issues': dict(schedule_issues),
+        'seed': seed,
+    }
+
+
+def exam_payload(schedule, manual_assignments, unused_columns, seed, exam_days=None, exam_slots=None):
+    """JSON-serializable exam preview (sets become lists)."""
+    exams = copy.deepcopy(schedule)
+    for exam in exams:
+        for room in exam['rooms']:
+            if isinstance(room.get('student_ids'), set):
+                room['student_ids'] = list(room['student_ids'])
+            if isinstance(room.get('columns_used'), set):
+                room['columns_used'] = list(room['columns_used'])
+        for room_code, proctors in exam['proctors'].items():
+            if isinstance(proctors, set):
+                exam['proctors'][room_code] = list(proctors)
+
+    return {
+        'schedule': exams,
+        'manual_assignments': manual_assignments,
+        'unused_columns': [list(entry) for entry in unused_columns],
+        'seed': seed,
+        'exam_days': exam_days or [],
+        'exam_slots': exam_slots or [],
+    }
+
+
+def expire_drafts():
+    """Delete unaccepted drafts older than SCHEDULER_DRAFT_MAX_AGE_DAYS; return how many were deleted."""
+    max_age = getattr(settings, 'SCHEDULER_DRAFT_MAX_AGE_DAYS', None)
+    if max_age is None:
+        return 0
+    cutoff = timezone.now() - datetime.timedelta(days=max_age)
+    deleted, _ = ScheduleDraft.objects.filter(created_at__lt=cutoff, accepted_at__isnull=True).delete()
+    return deleted
+
+
+def save_draft(kind, payload, source='command'):
+    expire_drafts()
+    return ScheduleDraft.objects.create(kind=kind, seed=payload.get('seed'), payload=payload, source=source)
+
+
+def store_preview(session, kind, payload):
+    """Save a lecture or exam payload as a draft and make it the session preview.
+
+    The web draft it replaces is deleted; drafts from commands or jobs that
+    were loaded for preview are kept.
+    """
+    previous = preview_draft(session, kind)
+    draft = save_draft(kind, payload, source='web')
+    select_preview(session, draft)
+    if previous is not None and previous.source == 'web':
+        previous.delete()
+    return draft
+
+
+def mark_accepted(draft):
+    """Record that ``draft`` was accepted, which keeps it out of ``expire_drafts``."""
+    draft.accepted_at = timezone.now()
+    draft.save(update_fields=['accepted_at'])
+
+
+def select_preview(session, draft):
+    session[PREVIEW_SESSION_KEYS[draft.kind]] = draft.pk
+
+
+def preview_draft(session, kind):
+    """The draft previewed in this session, or None."""
+    draft_id = session.get(PREVIEW_SESSION_KEYS[kind])
+    if draft_id is None:
+        return None
+    return ScheduleDraft.objects.filter(pk=draft_id, kind=kind).first()
+
+
+def clear_preview(session, kind):
+    session.pop(PREVIEW_SESSION_KEYS[kind], None)
+
+
+def archive_accepted(kind, payload, **meta):
+    """Snapshot an accepted timetable into SCHEDULER_ARCHIVE_DIR; return the path, or None when disabled."""
+    directory = getattr(settings, 'SCHEDULER_ARCHIVE_DIR', None)
+    if not directory:
+        return None
+    accepted_at = datetime.datetime.now()
+    path = os.path.join(directory, f"{kind}-accepted-{accepted_at:%Y%m%d-%H%M%S}{EXTENSION}")
+    return write_snapshot(path, kind, None, payload.get('seed'), payload, **meta)
+
+
+def _lecture_entries(payload):
+    return {
+        (item['course'], item['class'], item['day'], slot): f"{item['lecturer']} in {item['room']}"
+        for item in payload['schedule']
+        for slot in item['slots']
+    }
+
+
+def _exam_entries(payload):
+    return {
+        (exam['course'], exam['day'], exam['slot']): ', '.join(sorted(
+            f"{room['room']} ({room['class']}, {len(room['student_ids'])})" for room in exam['rooms']
+        ))
+        for exam in payload['schedule']
+    }
+
+
+def compare_drafts(old, new):
+    """Differences between two drafts of the same kind.
+
+    Lecture sessions are keyed by (course, class, day, slot) and exams by
+    (course, day, slot). Returns ``added``, ``removed`` and ``changed`` lists of
+    ``(key, old value, new value)`` tuples, plus the ``unchanged`` count.
+    """
+    if old.kind != new.kind:
+        raise ValueError(f"cannot compare a {old.kind} draft with a {new.kind} draft")
+    entries = _lecture_entries if old.kind == ScheduleDraft.LECTURE else _exam_entries
+    before, after = entries(old.payload), entries(new.payload)
+    return {
+        'added': [(key, None, after[key]) for key in sorted(after.keys() - before.keys())],
+        'removed': [(key, before[key], None) for key in sorted(before.keys() - after.keys())],
+        'changed': [
+            (key, before[key], after[key])
+            for key in sorted(before.keys() & after.keys())
+            if before[key] != after[key]
+        ],
+        'unchanged': sum(1 for key in before.keys() & after.keys() if before[key] == after[key]),
+    }
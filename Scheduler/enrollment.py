@@ -0,0 +1,57 @@
+"""Compact enrollment breakdown for large registration tables.
+
+Student indexes are interned to consecutive integer ids while the class and
+registration rows are streamed, and each (course, class) group is kept as an
+``array`` of ids instead of a list of strings. ``student_indexes[id]`` maps an
+id back to its index string. Solvers that only count students work on the
+arrays unchanged; ``exam_schedule`` decodes the ids it seats on output.
+"""
+from array import array
+
+# Unsigned int (4 bytes on every supported platform)
+STUDENT_ID_TYPECODE = 'I'
+
+
+def build_enrollment(class_rows, registration_rows):
+    """Build ``(enrollment_breakdown, student_indexes)`` from two row streams.
+
+    ``class_rows`` yields ``(student_index, class_code)``; a student listed in
+    several classes counts for the last one. ``registration_rows`` yields
+    ``(course_code, student_index)``; registrations of students without a class
+    are skipped. ``enrollment_breakdown`` maps course code -> class code ->
+    array of student ids, in registration order.
+    """
+    student_ids = {}
+    student_indexes = []
+    student_class = []
+    class_codes = {}
+    for student_index, class_code in class_rows:
+        # Share one string object per class code across all students
+        class_code = class_codes.setdefault(class_code, class_code)
+        sid = student_ids.get(student_index)
+        if sid is None:
+            student_ids[student_index] = len(student_indexes)
+            student_indexes.append(student_index)
+            student_class.append(class_code)
+        else:
+            student_class[sid] = class_code
+
+    enrollment_breakdown = {}
+    for course_code, student_index in registration_rows:
+        sid = student_ids.get(student_index)
+        if sid is None:
+            continue
+        by_class = enrollment_breakdown.get(course_code)
+        if by_class is None:
+            by_class = enrollment_breakdown[course_code] = {}
+        class_code = student_class[sid]
+        ids = by_class.get(class_code)
+        if ids is None:
+            ids = by_class[class_code] = array(STUDENT_ID_TYPECODE)
+        ids.append(sid)
+    return enrollment_breakdown, student_indexes
+
+
+def decode_students(ids, student_indexes):
+    """Student index strings for a sequence of interned ids."""
+    return [student_indexes[sid] for sid in ids]
@@ -0,0 +1,196 @@
+"""Solver inputs built from the database.
+
+Shared by the web views, the offline management commands and the job worker
+so every generator feeds the solvers exactly the same data. Each table is
+read once with ``values_list`` (joined columns come from the same query) and
+every map the solvers need is built in a single pass over the rows.
+"""
+import json
+import time
+from collections import defaultdict
+
+from django.db import connection
+
+from .enrollment import build_enrollment
+from Timetable.models import (
+    Room, Course, Lecturer, TimeSlot,
+    ExamDate, CourseRegistration, ClassStudent
+)
+
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+
+# Rows fetched per round trip when streaming the enrollment tables
+ENROLLMENT_CHUNK_SIZE = 5000
+
+# Room types the lecture solver may book
+LECTURE_SOLVER_ROOM_TYPES = ('Lecture Hall', 'Classroom', 'Laboratory', 'Auditorium')
+
+
+def _slot_labels(**filters):
+    return [
+        f"{start.strftime('%H:%M')} - {end.strftime('%H:%M')}"
+        for start, end in TimeSlot.objects.filter(**filters).order_by('start_time').values_list('start_time', 'end_time')
+    ]
+
+
+def _load_courses():
+    """``(code, credit_hours, enrollment, course type, lab type)`` for every course, ordered by code."""
+    return list(Course.objects.values_list(
+        'code', 'credit_hours', 'enrollment', 'course_type__name', 'lab_type__name'
+    ))
+
+
+def _load_rooms():
+    """``(code, capacity, dimensions, max_courses, proctors_required, is_overflow, room type, lab type)`` rows."""
+    return list(Room.objects.values_list(
+        'code', 'capacity', 'dimensions', 'max_courses', 'proctors_required', 'is_overflow',
+        'room_type__name', 'lab_type__name'
+    ))
+
+
+def _course_members(through, field, value_field, order_field):
+    """Map course code -> related values from an M2M through table, in the related model's ordering."""
+    members = defaultdict(list)
+    rows = through.objects.values_list('course__code', f'{field}__{value_field}').order_by(f'{field}__{order_field}', 'pk')
+    for course_code, value in rows:
+        members[course_code].append(value)
+    return members
+
+
+def _load_enrollment():
+    """Stream the class and registration tables into ``(enrollment_breakdown, student_indexes)``.
+
+    The breakdown holds interned student ids, see ``Scheduler.enrollment``.
+    """
+    return build_enrollment(
+        ClassStudent.objects.values_list('student_index', 'assigned_class__code').iterator(chunk_size=ENROLLMENT_CHUNK_SIZE),
+        CourseRegistration.objects.values_list('course__code', 'student_index').iterator(chunk_size=ENROLLMENT_CHUNK_SIZE),
+    )
+
+
+def build_lecture_data():
+    """Keyword arguments for ``generate_complete_schedule``."""
+    courses = {}
+    course_type_map = {}
+    course_lab_type_map = {}
+    course_codes = []
+    for code, credit_hours, _, course_type, lab_type in _load_courses():
+        course_codes.append(code)
+        if credit_hours > 0:  # Only include valid courses
+            courses[code] = credit_hours
+        course_type_map[code] = course_type.lower()
+        if lab_type:  # Only practicals have a lab type
+            course_lab_type_map[code] = lab_type
+
+    classes = _course_members(Course.classes.through, 'class', 'code', 'code')
+    lecturers = _course_members(Course.lecturers.through, 'lecturer', 'name', 'name')
+
+    room_size = {}
+    room_type_map = {}
+    lab_room_map = {}
+    for code, capacity, _, _, _, _, room_type, lab_type in _load_rooms():
+        if room_type in LECTURE_SOLVER_ROOM_TYPES and capacity > 0:  # Only include usable rooms
+            room_size[code] = capacity
+        room_type_map[code] = room_type.lower()
+        lab_room_map[code] = [lab_type] if lab_type else []
+
+    lecturer_availability = {
+        name: availability or {}
+        for name, availability in Lecturer.objects.filter(is_active=True).values_list('name', 'availability')
+    }
+
+    # The lecture solver only counts students, so the ids are never decoded
+    enrollment_breakdown, _ = _load_enrollment()
+
+    return {
+        'courses': courses,
+        'course_class_map': {code: classes.get(code, []) for code in course_codes},
+        'enrollment_breakdown': enrollment_breakdown,
+        'room_size': room_size,
+        'lecturers_courses_mapping': {code: lecturers.get(code, []) for code in course_codes},
+        'lecturer_availability': lecturer_availability,
+        'rooms': list(room_size),
+        'days': list(DAYS),
+        'time_slots': _slot_labels(is_lecture_slot=True),
+        'course_type_map': course_type_map,
+        'room_type_map': room_type_map,
+        'lab_room_map': lab_room_map,
+        'course_lab_type_map': course_lab_type_map,
+    }
+
+
+def normalize_dimensions(dimensions, capacity):
+    """Normalise a room's dimensions to "rows x columns", defaulting to a square."""
+    dim_parts = dimensions.lower().replace(' ', '').split('x') if dimensions else []
+    if len(dim_parts) == 2 and dim_parts[0].isdigit() and dim_parts[1].isdigit():
+        return f"{dim_parts[0]} x {dim_parts[1]}"
+    default_size = min(10, capacity)
+    return f"{default_size} x {default_size}"
+
+
+def _proctor_availability(value):
+    """Proctor availability is stored either as a JSON object or as an encoded JSON string."""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except json.JSONDecodeError:
+            return {}
+    return value or {}
+
+
+def build_exam_data():
+    """Keyword arguments for ``exam_schedule``."""
+    room_size = {}
+    room_dimensions = {}
+    max_courses = {}
+    proctors_in_center = {}
+    overflow_rooms = []
+    for code, capacity, dimensions, room_max_courses, proctors_required, is_overflow, _, _ in _load_rooms():
+        room_size[code] = capacity
+        room_dimensions[code] = normalize_dimensions(dimensions, capacity)
+        max_courses[code] = room_max_courses
+        proctors_in_center[code] = proctors_required
+        if is_overflow:
+            overflow_rooms.append(code)
+
+    student_enrollment = {}
+    course_type = {}
+    for code, _, enrollment, type_name, _ in _load_courses():
+        student_enrollment[code] = enrollment
+        course_type[code] = type_name
+
+    enrollment_breakdown, student_indexes = _load_enrollment()
+
+    proctor_rows = list(Lecturer.objects.filter(is_proctor=True).values_list('name', 'proctor_availability'))
+    proctors_availability = {name: _proctor_availability(availability) for name, availability in proctor_rows}
+
+    return {
+        'student_enrollment': student_enrollment,
+        'course_type': course_type,
+        'exam_days': [str(day) for day in ExamDate.objects.order_by('date').values_list('date', flat=True)],
+        'exam_slots': _slot_labels(is_exam_slot=True),
+        'room_size': room_size,
+        'room_dimensions': room_dimensions,
+        'overflow_rooms': overflow_rooms,
+        'max_courses': max_courses,
+        'proctors_in_center': proctors_in_center,
+        'proctors': [name for name, _ in proctor_rows],
+        'proctors_availability': proctors_availability,
+        'enrollment_breakdown': enrollment_breakdown,
+        'student_indexes': student_indexes,
+    }
+
+
+def load_inputs(builder):
+    """Run an input builder; return ``(data, report)`` with the ``queries`` issued and ``seconds`` taken."""
+    queries = 0
+
+    def count_queries(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    with connection.execute_wrapper(count_queries):
+        data = builder()
+    return data, {'queries': queries, 'seconds': time.perf_counter() - start}
@@ -0,0 +1,167 @@
+"""Database-backed queue for running the solvers outside the web request.
+
+The web UI enqueues a ``GenerationJob``; ``manage.py run_generation_worker``
+claims queued jobs, runs the solver with a progress callback that writes the
+job's counters back and honours cancellation, and stores the result as a
+``ScheduleDraft`` that the preview/accept flow can load.
+"""
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .algorithm import GenerationCancelled, exam_schedule, generate_complete_schedule
+from .drafts import exam_payload, lecture_payload, save_draft
+from .inputs import build_exam_data, build_lecture_data, load_inputs
+from .models import GenerationJob, ScheduleDraft
+from .replay import EXAM, LECTURE, new_seed, record_run
+
+# Minimum seconds between progress writes, so the solver is not slowed by the database
+PROGRESS_INTERVAL = 0.5
+
+STALE_JOB_ERROR = "The worker stopped reporting progress, so the job was marked as failed."
+
+
+def enqueue_job(kind, seed=None, user=None):
+    return GenerationJob.objects.create(
+        kind=kind,
+        seed=seed if seed is not None else new_seed(),
+        requested_by=user if user is not None and user.is_authenticated else None,
+    )
+
+
+def request_cancel(job):
+    """Cancel a queued job immediately or ask the worker to stop a running one."""
+    if job.status == GenerationJob.QUEUED:
+        claimed = GenerationJob.objects.filter(pk=job.pk, status=GenerationJob.QUEUED).update(
+            status=GenerationJob.CANCELLED, cancel_requested=True, finished_at=timezone.now()
+        )
+        if claimed:
+            return
+    GenerationJob.objects.filter(pk=job.pk, status=GenerationJob.RUNNING).update(cancel_requested=True)
+
+
+def fail_stale_jobs(max_age=None):
+    """Mark running jobs with no progress for ``max_age`` seconds as failed and return how many.
+
+    A worker that crashes or is killed mid-run leaves its job RUNNING forever;
+    ``max_age`` defaults to ``SCHEDULER_JOB_STALE_SECONDS`` (None disables the sweep).
+    """
+    if max_age is None:
+        max_age = getattr(settings, 'SCHEDULER_JOB_STALE_SECONDS', None)
+        if max_age is None:
+            return 0
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=max_age)
+    return GenerationJob.objects.filter(status=GenerationJob.RUNNING).filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    ).update(status=GenerationJob.FAILED, error=STALE_JOB_ERROR, finished_at=now)
+
+
+def claim_next_job():
+    """Mark the oldest queued job as running and return it, or None when the queue is empty.
+
+    Stale running jobs are failed first (see ``fail_stale_jobs``).
+    """
+    fail_stale_jobs()
+    for job_id in GenerationJob.objects.filter(status=GenerationJob.QUEUED).order_by('created_at').values_list('id', flat=True):
+        now = timezone.now()
+        # The conditional update only succeeds for one worker
+        if GenerationJob.objects.filter(pk=job_id, status=GenerationJob.QUEUED).update(
+            status=GenerationJob.RUNNING, started_at=now, heartbeat_at=now
+        ):
+            return GenerationJob.objects.get(pk=job_id)
+    return None
+
+
+def _progress_reporter(job):
+    """Solver ``progress`` callback that saves the job's counters and checks for cancellation."""
+    last_write = 0.0
+
+    def report(processed, total, placed):
+        nonlocal last_write
+        now = time.monotonic()
+        if now - last_write < PROGRESS_INTERVAL and processed < total:
+            return
+        last_write = now
+        GenerationJob.objects.filter(pk=job.pk).update(
+            processed=processed, total=total, placed=placed, heartbeat_at=timezone.now()
+        )
+        if GenerationJob.objects.filter(pk=job.pk, cancel_requested=True).exists():
+            raise GenerationCancelled(f"Job {job.pk} cancelled")
+
+    return report
+
+
+def progress_printer(write, interval=1.0):
+    """Solver ``progress`` callback that writes a line through ``write`` at most every ``interval`` seconds."""
+    last_write = 0.0
+
+    def report(processed, total, placed):
+        nonlocal last_write
+        now = time.monotonic()
+        if now - last_write < interval and processed < total:
+            return
+        last_write = now
+        percent = processed / total if total else 1
+        write(f"  {processed}/{total} courses processed ({percent:.0%}), {placed} placed")
+
+    return report
+
+
+def _run_lecture(job, progress):
+    algorithm_data, _ = load_inputs(build_lecture_data)
+    schedule, schedule_issues = generate_complete_schedule(**algorithm_data, seed=job.seed, progress=progress)
+    if getattr(settings, 'SCHEDULER_RECORD_RUNS', False):
+        record_run(
+            settings.SCHEDULER_RUNS_DIR, LECTURE, algorithm_data, job.seed, (schedule, schedule_issues),
+            keep=getattr(settings, 'SCHEDULER_RUNS_KEEP', None)
+        )
+    return lecture_payload(schedule, schedule_issues, job.seed)
+
+
+def _run_exam(job, progress):
+    exam_data, _ = load_inputs(build_exam_data)
+    result = exam_schedule(**exam_data, seed=job.seed, progress=progress)
+    if getattr(settings, 'SCHEDULER_RECORD_RUNS', False):
+        record_run(settings.SCHEDULER_RUNS_DIR, EXAM, exam_data, job.seed, result, keep=getattr(settings, 'SCHEDULER_RUNS_KEEP', None))
+    return exam_payload(*result, job.seed, exam_data['exam_days'], exam_data['exam_slots'])
+
+
+def run_job(job):
+    """Run a claimed job to completion, recording its outcome on the job row."""
+    runner = _run_lecture if job.kind == ScheduleDraft.LECTURE else _run_exam
+    try:
+        payload = runner(job, _progress_reporter(job))
+    except GenerationCancelled:
+        job.status = GenerationJob.CANCELLED
+    except Exception:
+        job.status = GenerationJob.FAILED
+        job.error = traceback.format_exc()
+    else:
+        job.draft = save_draft(job.kind, payload, source='job')
+        job.status = GenerationJob.SUCCEEDED
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'draft', 'finished_at'])
+    return job
+
+
+def job_status(job):
+    """JSON-serializable state of a job for the polling endpoint."""
+    return {
+        'id': job.pk,
+        'kind': job.kind,
+        'status': job.status,
+        'finished': job.status in GenerationJob.FINISHED,
+        'percent': job.percent,
+        'processed': job.processed,
+        'total': job.total,
+        'placed': job.placed,
+        'seed': job.seed,
+        'draft_id': job.draft_id,
+        'error': job.error.strip().splitlines()[-1] if job.error else '',
+    }
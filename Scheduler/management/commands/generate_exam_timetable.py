@@ -0,0 +1,88 @@
+import contextlib
+import io
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from Scheduler.algorithm import exam_schedule
+from Scheduler.drafts import archive_accepted, exam_payload, save_draft
+from Scheduler.inputs import build_exam_data, load_inputs
+from Scheduler.jobs import progress_printer
+from Scheduler.models import ScheduleDraft
+from Scheduler.persistence import apply_exam_schedule, save_exam_schedule
+from Scheduler.replay import EXAM, new_seed, record_run
+
+
+class Command(BaseCommand):
+    help = "Generate the exam timetable outside the web request and store it as a draft or save it directly"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, help="Solver seed (random when omitted)")
+        parser.add_argument('--commit', action='store_true',
+                            help="Write straight to the exam schedule tables instead of creating a draft")
+        parser.add_argument('--diff', action='store_true',
+                            help="With --commit, only insert, update and delete the exams that changed")
+
+    def handle(self, *args, **options):
+        seed = options['seed'] if options['seed'] is not None else new_seed()
+        # Solver diagnostics are only shown with -v 2
+        solver_output = contextlib.nullcontext() if options['verbosity'] > 1 else contextlib.redirect_stdout(io.StringIO())
+
+        self.stdout.write("Loading exam data...")
+        exam_data, load_report = load_inputs(build_exam_data)
+        self.stdout.write(
+            f"  {len(exam_data['student_enrollment'])} courses, {len(exam_data['room_size'])} rooms, "
+            f"{len(exam_data['exam_days'])} days x {len(exam_data['exam_slots'])} slots, "
+            f"{len(exam_data['proctors'])} proctors "
+            f"({load_report['queries']} queries, {load_report['seconds']:.2f}s)"
+        )
+
+        self.stdout.write(f"Running exam solver (seed {seed})...")
+        start = time.perf_counter()
+        with solver_output:
+            schedule, manual_assignments, unused_columns = exam_schedule(
+                **exam_data, seed=seed, progress=progress_printer(self.stdout.write)
+            )
+        self.stdout.write(
+            f"  {len(schedule)} exams placed, {len(manual_assignments)} left for manual assignment "
+            f"({time.perf_counter() - start:.2f}s)"
+        )
+
+        if getattr(settings, 'SCHEDULER_RECORD_RUNS', False):
+            path = record_run(
+                settings.SCHEDULER_RUNS_DIR, EXAM, exam_data, seed, (schedule, manual_assignments, unused_columns),
+                keep=getattr(settings, 'SCHEDULER_RUNS_KEEP', None)
+            )
+            self.stdout.write(f"  Recorded run in {path}")
+
+        payload = exam_payload(
+            schedule, manual_assignments, unused_columns, seed, exam_data['exam_days'], exam_data['exam_slots']
+        )
+        if not options['commit']:
+            draft = save_draft(ScheduleDraft.EXAM, payload)
+            self.stdout.write(self.style.SUCCESS(
+                f"Stored {draft}; load it from the Generate Timetables page to review and accept it"
+            ))
+            return
+
+        if options['diff']:
+            report = apply_exam_schedule(payload['schedule'])
+            for change in report['changes']:
+                self.stdout.write(f"  {change}")
+            for skipped in report['skipped']:
+                self.stdout.write(self.style.WARNING(f"  Not saved: {skipped}"))
+            self.stdout.write(self.style.SUCCESS(
+                f"Applied changes: {report['inserted']} added, {report['updated']} updated, {report['deleted']} removed, "
+                f"{report['unchanged']} unchanged exams ({report['seconds']:.2f}s)"
+            ))
+        else:
+            report = save_exam_schedule(payload['schedule'])
+            for skipped in report['skipped']:
+                self.stdout.write(self.style.WARNING(f"  Not saved: {skipped}"))
+            self.stdout.write(self.style.SUCCESS(
+                f"Saved {report['rows']} exams and {report['students']} student seats ({report['seconds']:.2f}s)"
+            ))
+        path = archive_accepted(EXAM, payload, source='command')
+        if path:
+            self.stdout.write(f"  Archived in {path}")
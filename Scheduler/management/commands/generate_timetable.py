@@ -0,0 +1,99 @@
+import contextlib
+import io
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from Scheduler.algorithm import EVICTIONS_KEY, generate_complete_schedule
+from Scheduler.drafts import archive_accepted, lecture_payload, save_draft
+from Scheduler.inputs import build_lecture_data, load_inputs
+from Scheduler.jobs import progress_printer
+from Scheduler.models import ScheduleDraft
+from Scheduler.persistence import apply_lecture_schedule, save_lecture_schedule
+from Scheduler.portfolio import generate_portfolio_schedule
+from Scheduler.replay import LECTURE, new_seed, record_run
+
+
+class Command(BaseCommand):
+    help = "Generate the lecture timetable outside the web request and store it as a draft or save it directly"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, help="Solver seed (random when omitted)")
+        parser.add_argument('--runs', type=int, default=getattr(settings, 'SCHEDULER_PORTFOLIO_RUNS', 1),
+                            help="Seeded runs to try in parallel, keeping the best")
+        parser.add_argument('--commit', action='store_true',
+                            help="Write straight to LectureSchedule instead of creating a draft")
+        parser.add_argument('--diff', action='store_true',
+                            help="With --commit, only insert, update and delete the sessions that changed")
+
+    def handle(self, *args, **options):
+        seed = options['seed'] if options['seed'] is not None else new_seed()
+        # Solver diagnostics are only shown with -v 2
+        solver_output = contextlib.nullcontext() if options['verbosity'] > 1 else contextlib.redirect_stdout(io.StringIO())
+
+        self.stdout.write("Loading scheduling data...")
+        algorithm_data, load_report = load_inputs(build_lecture_data)
+        self.stdout.write(
+            f"  {len(algorithm_data['courses'])} courses, {len(algorithm_data['rooms'])} rooms, "
+            f"{len(algorithm_data['time_slots'])} time slots "
+            f"({load_report['queries']} queries, {load_report['seconds']:.2f}s)"
+        )
+
+        self.stdout.write(f"Running lecture solver (seed {seed}, {options['runs']} run(s))...")
+        start = time.perf_counter()
+        with solver_output:
+            if options['runs'] > 1:
+                schedule, schedule_issues, report = generate_portfolio_schedule(
+                    runs=options['runs'],
+                    max_workers=getattr(settings, 'SCHEDULER_PORTFOLIO_WORKERS', None),
+                    base_seed=seed,
+                    **algorithm_data
+                )
+                seed = report['seed']
+            else:
+                schedule, schedule_issues = generate_complete_schedule(
+                    **algorithm_data, seed=seed, progress=progress_printer(self.stdout.write)
+                )
+        issue_count = sum(len(v) for k, v in schedule_issues.items() if k != EVICTIONS_KEY)
+        self.stdout.write(
+            f"  {len(schedule)} sessions, {issue_count} issues, "
+            f"{len(schedule_issues.get(EVICTIONS_KEY, []))} evictions, seed {seed} "
+            f"({time.perf_counter() - start:.2f}s)"
+        )
+
+        if getattr(settings, 'SCHEDULER_RECORD_RUNS', False):
+            path = record_run(
+                settings.SCHEDULER_RUNS_DIR, LECTURE, algorithm_data, seed, (schedule, schedule_issues),
+                keep=getattr(settings, 'SCHEDULER_RUNS_KEEP', None)
+            )
+            self.stdout.write(f"  Recorded run in {path}")
+
+        payload = lecture_payload(schedule, schedule_issues, seed)
+        if not options['commit']:
+            draft = save_draft(ScheduleDraft.LECTURE, payload)
+            self.stdout.write(self.style.SUCCESS(
+                f"Stored {draft}; load it from the Generate Timetables page to review and accept it"
+            ))
+            return
+
+        if options['diff']:
+            report = apply_lecture_schedule(payload['schedule'])
+            for change in report['changes']:
+                self.stdout.write(f"  {change}")
+            for skipped in report['skipped']:
+                self.stdout.write(self.style.WARNING(f"  Not saved: {skipped}"))
+            self.stdout.write(self.style.SUCCESS(
+                f"Applied changes: {report['inserted']} added, {report['updated']} updated, {report['deleted']} removed, "
+                f"{report['unchanged']} unchanged sessions ({report['seconds']:.2f}s)"
+            ))
+        else:
+            report = save_lecture_schedule(payload['schedule'])
+            for skipped in report['skipped']:
+                self.stdout.write(self.style.WARNING(f"  Not saved: {skipped}"))
+            self.stdout.write(self.style.SUCCESS(
+                f"Saved {report['rows']} sessions to LectureSchedule ({report['seconds']:.2f}s)"
+            ))
+        path = archive_accepted(LECTURE, payload, source='command')
+        if path:
+            self.stdout.write(f"  Archived in {path}")
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from Scheduler.replay import replay_run
+
+
+class Command(BaseCommand):
+    help = "Re-run recorded timetable generations from their stored inputs and seed"
+
+    def add_arguments(self, parser):
+        parser.add_argument('runs', nargs='+', help="Run files written to SCHEDULER_RUNS_DIR")
+        parser.add_argument('--repeat', type=int, default=1,
+                            help="Replay each run this many times and report the best time")
+
+    def handle(self, *args, **options):
+        mismatches = []
+        for path in options['runs']:
+            timings = []
+            matches = True
+            for _ in range(max(options['repeat'], 1)):
+                _, report = replay_run(path)
+                timings.append(report['elapsed'])
+                matches = matches and report['matches']
+
+            status = "MATCH" if matches else "DIFF"
+            self.stdout.write(
+                f"{status} {path} ({report['kind']}, seed {report['seed']}): "
+                f"best {min(timings):.3f}s over {len(timings)} run(s)"
+            )
+            if not matches:
+                mismatches.append(path)
+
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} run(s) no longer reproduce their recorded result")
+        self.stdout.write(self.style.SUCCESS("All replayed runs reproduced their recorded results"))
@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from Scheduler.jobs import claim_next_job, run_job
+
+
+class Command(BaseCommand):
+    help = "Run queued timetable generation jobs started from the web UI"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Exit once the queue is empty")
+        parser.add_argument('--poll-interval', type=float,
+                            default=getattr(settings, 'SCHEDULER_JOB_POLL_INTERVAL', 2.0),
+                            help="Seconds to wait between queue checks")
+
+    def handle(self, *args, **options):
+        self.stdout.write("Waiting for generation jobs...")
+        try:
+            while True:
+                job = claim_next_job()
+                if job is None:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                self.stdout.write(f"Running {job} (seed {job.seed})")
+                start = time.perf_counter()
+                job = run_job(job)
+                style = self.style.SUCCESS if job.status == job.SUCCEEDED else self.style.WARNING
+                self.stdout.write(style(f"  {job.status} after {time.perf_counter() - start:.2f}s"))
+                if job.error:
+                    self.stderr.write(job.error)
+        except KeyboardInterrupt:
+            self.stdout.write("Worker stopped")
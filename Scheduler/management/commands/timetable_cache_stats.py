@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from Scheduler.timetable_cache import cache_stats, invalidate_timetables, reset_stats
+
+
+class Command(BaseCommand):
+    help = "Show hit/miss counters of the cached portal timetables"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help="Zero the counters after printing them")
+        parser.add_argument('--invalidate', action='store_true', help="Drop every cached timetable")
+
+    def handle(self, *args, **options):
+        stats = cache_stats()
+        hit_rate = f"{stats['hit_rate']:.1%}" if stats['hit_rate'] is not None else "n/a"
+        self.stdout.write(
+            f"Timetable cache version {stats['version']}: {stats['hits']} hits, "
+            f"{stats['misses']} misses (hit rate {hit_rate})"
+        )
+        if not stats['enabled']:
+            self.stdout.write("Counting is off; set TIMETABLE_CACHE_STATS = True to enable it")
+        if options['reset']:
+            reset_stats()
+            self.stdout.write("Counters reset")
+        if options['invalidate']:
+            invalidate_timetables()
+            self.stdout.write("Cached timetables invalidated")
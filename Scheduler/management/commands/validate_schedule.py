@@ -0,0 +1,122 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Scheduler.models import (
+    ExamRoomAssignment, ExamRoomClassAllocation, ExamSchedule,
+    LectureSchedule, ScheduleDraft, StudentExamAllocation
+)
+from Scheduler.replay import LECTURE, replay_run
+from Scheduler.validation import summarize, validate_exam_schedule, validate_lecture_schedule
+from Timetable.models import Room
+
+
+def _slot_label(time_slot):
+    return f"{time_slot.start_time.strftime('%H:%M')} - {time_slot.end_time.strftime('%H:%M')}"
+
+
+def persisted_lecture_schedule():
+    """The saved lecture timetable in solver output shape, one entry per booked slot."""
+    return [
+        {
+            'course': row.course.code,
+            'class': row.assigned_class.code,
+            'lecturer': row.lecturer.name if row.lecturer else None,
+            'room': row.room.code,
+            'day': row.day,
+            'slots': [_slot_label(row.time_slot)],
+            'enrollment': row.enrollment,
+        }
+        for row in LectureSchedule.objects.select_related(
+            'course', 'assigned_class', 'lecturer', 'room', 'time_slot'
+        )
+    ]
+
+
+def persisted_exam_schedule():
+    """The saved exam timetable in solver output shape."""
+    exams = {
+        exam.id: {
+            'course': exam.course.code,
+            'day': str(exam.date),
+            'slot': _slot_label(exam.time_slot),
+            'rooms': [],
+            'proctors': {},
+        }
+        for exam in ExamSchedule.objects.select_related('course', 'time_slot')
+    }
+
+    students = {}
+    for exam_id, room_code, student_index in StudentExamAllocation.objects.values_list(
+        'exam_id', 'room__code', 'student_index'
+    ):
+        students.setdefault((exam_id, room_code), []).append(student_index)
+
+    columns = {}
+    for assignment_id, columns_used in ExamRoomClassAllocation.objects.values_list(
+        'room_assignment_id', 'columns_used'
+    ):
+        if isinstance(columns_used, list):
+            columns.setdefault(assignment_id, []).extend(columns_used)
+
+    for assignment in ExamRoomAssignment.objects.select_related('room').prefetch_related('proctors'):
+        exam = exams.get(assignment.exam_id)
+        if exam is None:
+            continue
+        room = assignment.room.code
+        exam['rooms'].append({
+            'room': room,
+            'columns_used': columns.get(assignment.id),
+            'student_ids': students.get((assignment.exam_id, room), []),
+        })
+        exam['proctors'][room] = [proctor.name for proctor in assignment.proctors.all()]
+    return list(exams.values())
+
+
+class Command(BaseCommand):
+    help = "Check a timetable for double bookings, clashes, over-capacity rooms and overlapping exam columns"
+
+    def add_arguments(self, parser):
+        source = parser.add_mutually_exclusive_group()
+        source.add_argument('--draft', type=int, help="Validate a stored draft")
+        source.add_argument('--run', help="Replay a recorded run and validate its result")
+        parser.add_argument('--kind', choices=[ScheduleDraft.LECTURE, ScheduleDraft.EXAM],
+                            help="Only validate this saved timetable (default: both)")
+        parser.add_argument('--json', action='store_true', help="Print every violation as JSON")
+
+    def handle(self, *args, **options):
+        room_size = dict(Room.objects.values_list('code', 'capacity'))
+        if options['draft']:
+            try:
+                draft = ScheduleDraft.objects.get(pk=options['draft'])
+            except ScheduleDraft.DoesNotExist:
+                raise CommandError(f"Draft {options['draft']} does not exist")
+            targets = [(str(draft), draft.kind, draft.payload['schedule'])]
+        elif options['run']:
+            result, report = replay_run(options['run'])
+            targets = [(options['run'], report['kind'], result[0])]
+        else:
+            kinds = [options['kind']] if options['kind'] else [ScheduleDraft.LECTURE, ScheduleDraft.EXAM]
+            targets = [
+                (f"saved {kind} timetable", kind,
+                 persisted_lecture_schedule() if kind == ScheduleDraft.LECTURE else persisted_exam_schedule())
+                for kind in kinds
+            ]
+
+        total = 0
+        for label, kind, schedule in targets:
+            validator = validate_lecture_schedule if kind == LECTURE else validate_exam_schedule
+            violations = validator(schedule, room_size)
+            total += len(violations)
+            counts = summarize(violations)
+            if counts:
+                self.stdout.write(self.style.WARNING(
+                    f"{label}: " + ", ".join(f"{count} {name}" for name, count in sorted(counts.items()))
+                ))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"{label}: no violations"))
+            if options['json']:
+                self.stdout.write(json.dumps(violations, indent=2, default=list))
+
+        if total:
+            raise CommandError(f"{total} violation(s) found")
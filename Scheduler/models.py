@@ -1,3 +1,7 @@
+import json
+import zlib
+
+from django.conf import settings
 from django.db import models
 
 class LectureSchedule(models.Model):
@@ -114,3 +118,131 @@ class StudentExamAllocation(models.Model):
             f"{self.student_index} → {self.exam.course.code} "
             f"in {self.room.code} (col {self.column_number})"
         )
+
+
+class StudentExamItinerary(models.Model):
+    """Denormalized copy of a student's exam seat for the student exam view.
+
+    Rebuilt from ``StudentExamAllocation`` whenever exams are accepted or
+    edited (see ``Scheduler.persistence.refresh_itinerary``), so a student's
+    whole exam timetable is one indexed read by ``student_index``. Each row
+    cascades from its seat, so deleting a seat or its room removes it too.
+    """
+    student_index = models.CharField(max_length=20)
+    exam = models.ForeignKey(ExamSchedule, on_delete=models.CASCADE, related_name='itinerary')
+    seat = models.OneToOneField(StudentExamAllocation, on_delete=models.CASCADE, related_name='itinerary')
+    course_code = models.CharField(max_length=20)
+    course_title = models.CharField(max_length=200)
+    date = models.DateField()
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    room_code = models.CharField(max_length=20)
+    building = models.CharField(max_length=100, blank=True)
+    college = models.CharField(max_length=100, blank=True)
+    column_number = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('student_index', 'exam')
+        ordering = ['student_index', 'date', 'start_time']
+        indexes = [models.Index(fields=['student_index', 'date', 'start_time'])]
+
+    def __str__(self):
+        return f"{self.student_index} → {self.course_code} on {self.date} in {self.room_code}"
+
+
+class ScheduleDraft(models.Model):
+    """A generated timetable awaiting review, e.g. from ``manage.py generate_timetable``."""
+    LECTURE = 'lecture'
+    EXAM = 'exam'
+    KIND_CHOICES = [
+        (LECTURE, 'Lecture timetable'),
+        (EXAM, 'Exam timetable'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    seed = models.BigIntegerField(null=True, blank=True)
+    data = models.BinaryField(
+        editable=False,
+        help_text="zlib-compressed JSON of the solver output in the shape the preview pages render."
+    )
+    size = models.PositiveIntegerField(default=0, help_text="Uncompressed payload size in bytes.")
+    source = models.CharField(max_length=20, default='command')
+    created_at = models.DateTimeField(auto_now_add=True)
+    accepted_at = models.DateTimeField(
+        null=True, blank=True, help_text="When the timetable was accepted; accepted drafts never expire."
+    )
+    college = models.ForeignKey(
+        'Timetable.College',
+        on_delete=models.CASCADE,
+        related_name='schedule_drafts',
+        null=True,
+        blank=True
+    )
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.get_kind_display()} draft #{self.pk} ({self.created_at:%Y-%m-%d %H:%M})"
+
+    @property
+    def payload(self):
+        if not hasattr(self, '_payload'):
+            self._payload = json.loads(zlib.decompress(self.data))
+        return self._payload
+
+    @payload.setter
+    def payload(self, value):
+        encoded = json.dumps(value, separators=(',', ':')).encode()
+        self._payload = value
+        self.size = len(encoded)
+        self.data = zlib.compress(encoded)
+
+
+class GenerationJob(models.Model):
+    """A timetable generation queued from the web UI and run by ``manage.py run_generation_worker``."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+        (CANCELLED, 'Cancelled'),
+    ]
+    FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+    kind = models.CharField(max_length=10, choices=ScheduleDraft.KIND_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED, db_index=True)
+    seed = models.BigIntegerField(null=True, blank=True)
+    processed = models.PositiveIntegerField(default=0, help_text="Courses processed so far")
+    total = models.PositiveIntegerField(default=0, help_text="Courses to process")
+    placed = models.PositiveIntegerField(default=0, help_text="Sessions or exams placed so far")
+    cancel_requested = models.BooleanField(default=False)
+    error = models.TextField(blank=True)
+    draft = models.ForeignKey('ScheduleDraft', on_delete=models.SET_NULL, null=True, blank=True)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True, help_text="Last progress write by the worker")
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    @property
+    def percent(self):
+        if self.status == self.SUCCEEDED:
+            return 100
+        return min(100, self.processed * 100 // self.total) if self.total else 0
+
+    def __str__(self):
+        return f"{self.get_kind_display()} job #{self.pk} ({self.status})"
@@ -0,0 +1,76 @@
+"""Exam period assignment by graph colouring.
+
+Before any seating, each exam course is given a period (a (day, slot) pair)
+so that no two courses sharing a student get the same period and no period
+holds more students than its estimated seating capacity. Courses are coloured
+with DSatur: the next course is the one whose conflicting courses already use
+the most distinct periods, ties broken by conflict degree and then size. Each
+course takes the least-loaded feasible period, spreading exams across the
+session rather than packing the first days.
+"""
+import heapq
+
+from .seating import parse_dimensions
+
+
+def period_capacity(room_size, room_dimensions, max_courses, overflow_rooms):
+    """Estimated students one period can seat with column seating plus overflow rooms."""
+    capacity = 0
+    for room in room_size:
+        if room in overflow_rooms:
+            capacity += room_size[room]
+        elif not room.startswith("Lab-") and max_courses.get(room):
+            rows, columns = parse_dimensions(room_dimensions[room])
+            capacity += (columns // max_courses[room]) * max_courses[room] * rows
+    return capacity
+
+
+def assign_periods(course_sizes, conflict_graph, periods, capacity, rng):
+    """Return ``{course: period}`` for every course that could be coloured.
+
+    ``course_sizes`` maps each course to schedule to its student count,
+    ``periods`` lists the available (day, slot) pairs and ``capacity`` is the
+    number of students a period can hold. Courses with no feasible period are
+    left out and seated by the solver's fallback search.
+    """
+    periods = list(periods)
+    rng.shuffle(periods)
+    period_order = {period: i for i, period in enumerate(periods)}
+    load = {period: 0 for period in periods}
+    neighbour_periods = {course: set() for course in course_sizes}
+    degree = {
+        course: sum(1 for other in conflict_graph.get(course, {}) if other in course_sizes)
+        for course in course_sizes
+    }
+
+    heap = [(0, -degree[course], -size, course) for course, size in course_sizes.items()]
+    heapq.heapify(heap)
+    assignment = {}
+    done = set()
+
+    while heap:
+        neg_saturation, _, _, course = heapq.heappop(heap)
+        if course in done or -neg_saturation != len(neighbour_periods[course]):
+            continue  # already coloured, or a stale entry
+        done.add(course)
+
+        size = course_sizes[course]
+        feasible = [
+            period for period in periods
+            if period not in neighbour_periods[course] and load[period] + size <= capacity
+        ]
+        if not feasible:
+            continue
+        period = min(feasible, key=lambda p: (load[p], period_order[p]))
+        assignment[course] = period
+        load[period] += size
+
+        for other in conflict_graph.get(course, {}):
+            if other in done or other not in course_sizes:
+                continue
+            saturation = neighbour_periods[other]
+            if period not in saturation:
+                saturation.add(period)
+                heapq.heappush(heap, (-len(saturation), -degree[other], -course_sizes[other], other))
+
+    return assignment
@@ -0,0 +1,498 @@
+"""Write accepted solver output to the schedule tables.
+
+Used by the accept views and by the offline generate commands. Every writer
+invalidates the cached portal timetables once, after its transaction.
+"""
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Q
+
+from Timetable.models import Class, Room, Course, Lecturer, TimeSlot
+
+from .inputs import normalize_dimensions
+from .models import (
+    ExamSchedule, ExamRoomAssignment, ExamRoomClassAllocation,
+    LectureSchedule, StudentExamAllocation, StudentExamItinerary
+)
+from .seating import parse_dimensions, seat_columns
+from .timetable_cache import batch_invalidation
+
+
+# Rows per INSERT when bulk-creating schedule rows
+BATCH_SIZE = 500
+
+
+def _parse_slot(label):
+    """``(start_str, end_str, start_time, end_time)`` for an "HH:MM - HH:MM" label, or None."""
+    label = label.strip()
+    if ' - ' not in label:
+        return None
+    start_time_str, end_time_str = label.split(' - ')
+    try:
+        start_time = datetime.strptime(start_time_str, '%H:%M').time()
+        end_time = datetime.strptime(end_time_str, '%H:%M').time()
+    except ValueError:
+        return None
+    return start_time_str, end_time_str, start_time, end_time
+
+
+def resolve_time_slots(labels, **defaults):
+    """Map slot labels to ``TimeSlot`` rows, creating the missing ones with ``defaults``."""
+    parsed = {label: _parse_slot(label) for label in set(labels)}
+    existing = {
+        (slot.start_time, slot.end_time): slot
+        for slot in TimeSlot.objects.filter(
+            start_time__in={p[2] for p in parsed.values() if p},
+            end_time__in={p[3] for p in parsed.values() if p},
+        )
+    }
+    time_slots = {}
+    for label, parts in parsed.items():
+        if parts is None:
+            continue
+        start_time_str, end_time_str, start_time, end_time = parts
+        slot = existing.get((start_time, end_time))
+        if slot is None:
+            # Only happens for slots deleted since generation, so a few creates are fine
+            slot = existing[(start_time, end_time)] = TimeSlot.objects.create(
+                start_time=start_time, end_time=end_time,
+                code=f"{start_time_str}-{end_time_str}", **defaults
+            )
+        time_slots[label] = slot
+    return time_slots
+
+
+def lecturers_by_name(names):
+    """First lecturer per name, matching ``Lecturer.objects.filter(name=...).first()``."""
+    lecturers = {}
+    for lecturer in Lecturer.objects.filter(name__in=set(names)).order_by('name', 'pk'):
+        lecturers.setdefault(lecturer.name, lecturer)
+    return lecturers
+
+
+def lecture_rows(schedule_items):
+    """Unsaved ``LectureSchedule`` rows for the sessions, one per booked slot.
+
+    Returns ``(rows, skipped)`` where ``skipped`` describes the sessions or
+    slots that reference unknown courses, classes, lecturers, rooms or slots.
+    Every code is resolved with one query per model.
+    """
+    courses = Course.objects.in_bulk({item['course'] for item in schedule_items}, field_name='code')
+    classes = Class.objects.in_bulk({item['class'] for item in schedule_items}, field_name='code')
+    rooms = Room.objects.in_bulk({item['room'] for item in schedule_items}, field_name='code')
+    lecturers = lecturers_by_name(item['lecturer'] for item in schedule_items if item['lecturer'])
+    time_slots = resolve_time_slots(
+        (slot for item in schedule_items for slot in item['slots']), is_lecture_slot=True
+    )
+
+    rows, skipped = [], []
+    for item in schedule_items:
+        references = {
+            'course': courses.get(item['course']),
+            'class': classes.get(item['class']),
+            'lecturer': lecturers.get(item['lecturer']),
+            'room': rooms.get(item['room']),
+        }
+        missing = [name for name, value in references.items() if value is None]
+        if missing:
+            skipped.append(f"{item['course']} / {item['class']} on {item['day']}: unknown {', '.join(missing)}")
+            continue
+        for slot in item['slots']:
+            time_slot = time_slots.get(slot)
+            if time_slot is None:
+                skipped.append(f"{item['course']} / {item['class']} on {item['day']}: invalid slot {slot!r}")
+                continue
+            rows.append(LectureSchedule(
+                course=references['course'],
+                assigned_class=references['class'],
+                lecturer=references['lecturer'],
+                room=references['room'],
+                day=item['day'],
+                time_slot=time_slot,
+                enrollment=item.get('enrollment', 0)
+            ))
+    return rows, skipped
+
+
+def save_lecture_schedule(schedule_items):
+    """Replace ``LectureSchedule`` with the given sessions in one transaction.
+
+    Returns a report with the ``rows`` written, the ``skipped`` sessions and
+    the ``seconds`` taken.
+    """
+    start = time.perf_counter()
+    with batch_invalidation(), transaction.atomic():
+        rows, skipped = lecture_rows(schedule_items)
+        LectureSchedule.objects.all().delete()
+        LectureSchedule.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    return {'rows': len(rows), 'skipped': skipped, 'seconds': time.perf_counter() - start}
+
+
+def _slot_label(start_time, end_time):
+    return f"{start_time:%H:%M} - {end_time:%H:%M}"
+
+
+def apply_lecture_schedule(schedule_items):
+    """Bring ``LectureSchedule`` in line with the given sessions, touching only what changed.
+
+    Rows are matched on their natural key (course, class, day, slot): new
+    keys are inserted, keys whose lecturer, room or enrollment changed are
+    updated in place (keeping their ids), and keys no longer scheduled are
+    deleted. Returns a report with the ``inserted``, ``updated``, ``deleted``
+    and ``unchanged`` counts, the ``changes`` made, the ``skipped`` sessions
+    and the ``seconds`` taken.
+    """
+    start = time.perf_counter()
+    with batch_invalidation(), transaction.atomic():
+        rows, skipped = lecture_rows(schedule_items)
+        wanted = {}
+        for row in rows:
+            wanted.setdefault((row.course_id, row.assigned_class_id, row.day, row.time_slot_id), row)
+
+        existing = {}
+        duplicates = []
+        for pk, *key, lecturer_id, room_id, enrollment, course, class_code, start_time, end_time in (
+            LectureSchedule.objects.order_by('pk').values_list(
+                'pk', 'course_id', 'assigned_class_id', 'day', 'time_slot_id',
+                'lecturer_id', 'room_id', 'enrollment',
+                'course__code', 'assigned_class__code', 'time_slot__start_time', 'time_slot__end_time'
+            )
+        ):
+            label = f"{course} / {class_code} {key[2]} {_slot_label(start_time, end_time)}"
+            if tuple(key) in existing:
+                duplicates.append((pk, label))
+            else:
+                existing[tuple(key)] = (pk, lecturer_id, room_id, enrollment, label)
+
+        changes = []
+        inserts, updates, delete_ids = [], [], [pk for pk, _ in duplicates]
+        changes += [f"- {label}" for _, label in duplicates]
+        for key, (pk, lecturer_id, room_id, enrollment, label) in existing.items():
+            row = wanted.get(key)
+            if row is None:
+                delete_ids.append(pk)
+                changes.append(f"- {label}")
+            elif (row.lecturer_id, row.room_id, row.enrollment) != (lecturer_id, room_id, enrollment):
+                row.pk = pk
+                updates.append(row)
+                changes.append(f"~ {label}: {row.lecturer.name} in {row.room.code}, {row.enrollment} students")
+        for key, row in wanted.items():
+            if key not in existing:
+                inserts.append(row)
+                changes.append(
+                    f"+ {row.course.code} / {row.assigned_class.code} {row.day} "
+                    f"{_slot_label(row.time_slot.start_time, row.time_slot.end_time)}"
+                )
+
+        LectureSchedule.objects.filter(pk__in=delete_ids).delete()
+        LectureSchedule.objects.bulk_update(updates, ['lecturer', 'room', 'enrollment'], batch_size=BATCH_SIZE)
+        LectureSchedule.objects.bulk_create(inserts, batch_size=BATCH_SIZE)
+
+    return {
+        'inserted': len(inserts),
+        'updated': len(updates),
+        'deleted': len(delete_ids),
+        'unchanged': len(wanted) - len(inserts) - len(updates),
+        'changes': changes,
+        'skipped': skipped,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def _exam_references(exam_items):
+    """Every course, room, class, proctor and slot the exams refer to, one query per model."""
+    rooms_data = [room_data for item in exam_items for room_data in item['rooms']]
+    return {
+        'courses': Course.objects.in_bulk({item['course'] for item in exam_items}, field_name='code'),
+        'rooms': Room.objects.in_bulk({room_data['room'] for room_data in rooms_data}, field_name='code'),
+        'classes': Class.objects.in_bulk({room_data['class'] for room_data in rooms_data}, field_name='code'),
+        'proctors': lecturers_by_name(
+            name for item in exam_items for names in item['proctors'].values() for name in names
+        ),
+        'time_slots': resolve_time_slots((item['slot'] for item in exam_items), is_exam_slot=True),
+    }
+
+
+def _exam_rows(exam_items, references, skipped):
+    """Unsaved ``(ExamSchedule, item)`` pairs for the exams whose references resolve."""
+    exams = []
+    for item in exam_items:
+        course = references['courses'].get(item['course'])
+        time_slot = references['time_slots'].get(item['slot'])
+        try:
+            exam_date = datetime.strptime(item['day'], '%Y-%m-%d').date()
+        except ValueError:
+            exam_date = None
+        if course is None or time_slot is None or exam_date is None:
+            skipped.append(f"{item['course']} on {item['day']} {item['slot']}: unknown course, date or slot")
+            continue
+        exams.append((ExamSchedule(course=course, date=exam_date, time_slot=time_slot), item))
+    return exams
+
+
+def _write_exam_details(exams, references, skipped):
+    """Bulk-create the rooms, proctor links, class allocations and seats of saved exams.
+
+    Returns the number of student seats written.
+    """
+    rooms, classes, proctors = references['rooms'], references['classes'], references['proctors']
+    assignments = []
+    for exam, item in exams:
+        for room_data in item['rooms']:
+            room = rooms.get(room_data['room'])
+            if room is None:
+                skipped.append(f"{item['course']} on {item['day']}: unknown room {room_data['room']}")
+                continue
+            assignments.append((ExamRoomAssignment(exam=exam, room=room), exam, item, room_data))
+    ExamRoomAssignment.objects.bulk_create([a for a, _, _, _ in assignments], batch_size=BATCH_SIZE)
+
+    ProctorLink = ExamRoomAssignment.proctors.through
+    proctor_links = []
+    allocations = []
+    seats = []
+    seated = {}
+    for assignment, exam, item, room_data in assignments:
+        room = assignment.room
+        for proctor_name in set(item['proctors'].get(room_data['room'], [])):
+            proctor = proctors.get(proctor_name)
+            if proctor:
+                proctor_links.append(ProctorLink(examroomassignment=assignment, lecturer=proctor))
+
+        student_ids = room_data['student_ids']
+        class_obj = classes.get(room_data['class'])
+        if class_obj is None:
+            skipped.append(f"{item['course']} in {room.code}: unknown class {room_data['class']}")
+        else:
+            allocations.append(ExamRoomClassAllocation(
+                room_assignment=assignment,
+                class_assigned=class_obj,
+                columns_used=room_data.get('columns_used', []),
+                student_count=room_data.get('students_count', room_data.get('student_count', len(student_ids)))
+            ))
+
+        rows, _ = parse_dimensions(normalize_dimensions(room.dimensions, room.capacity))
+        columns = seat_columns(room_data.get('columns_used'), rows, len(student_ids))
+        exam_students = seated.setdefault(exam.pk, set())
+        for student_id, column in zip(student_ids, columns):
+            if student_id in exam_students:
+                continue
+            exam_students.add(student_id)
+            seats.append(StudentExamAllocation(
+                student_index=student_id, exam=exam, room=room, column_number=column
+            ))
+
+    ProctorLink.objects.bulk_create(proctor_links, batch_size=BATCH_SIZE)
+    ExamRoomClassAllocation.objects.bulk_create(allocations, batch_size=BATCH_SIZE)
+    StudentExamAllocation.objects.bulk_create(seats, batch_size=BATCH_SIZE)
+    return len(seats)
+
+
+def _itinerary_rows(seats):
+    return [
+        StudentExamItinerary(
+            seat_id=seat_id, student_index=student_index, exam_id=exam_id, course_code=course_code,
+            course_title=course_title, date=date, start_time=start_time, end_time=end_time,
+            room_code=room_code, building=building or '', college=college or '', column_number=column_number
+        )
+        for (seat_id, student_index, exam_id, course_code, course_title, date, start_time, end_time,
+             room_code, building, college, column_number) in seats.values_list(
+            'pk', 'student_index', 'exam_id', 'exam__course__code', 'exam__course__title', 'exam__date',
+            'exam__time_slot__start_time', 'exam__time_slot__end_time',
+            'room__code', 'room__building__name', 'room__building__college__name', 'column_number'
+        )
+    ]
+
+
+def refresh_itinerary(exam_ids=None):
+    """Rebuild ``StudentExamItinerary`` for the given exams (all exams when None) from their seats."""
+    stale = StudentExamItinerary.objects.all()
+    seats = StudentExamAllocation.objects.all()
+    if exam_ids is not None:
+        stale = stale.filter(exam_id__in=exam_ids)
+        seats = seats.filter(exam_id__in=exam_ids)
+    stale.delete()
+    StudentExamItinerary.objects.bulk_create(_itinerary_rows(seats), batch_size=BATCH_SIZE)
+
+
+def refresh_seat_itinerary(seat):
+    """Rebuild the itinerary row of a single seat, e.g. after an admin edits it."""
+    StudentExamItinerary.objects.filter(
+        Q(seat=seat) | Q(student_index=seat.student_index, exam_id=seat.exam_id)
+    ).delete()
+    StudentExamItinerary.objects.bulk_create(_itinerary_rows(StudentExamAllocation.objects.filter(pk=seat.pk)))
+
+
+def save_exam_schedule(exam_items):
+    """Replace the exam tables with the given exams in one transaction.
+
+    Exams, room assignments, proctor links, class allocations and student
+    seats are each written with ``bulk_create``; every student gets the
+    column they actually sit in. Returns a report with the exams saved
+    (``rows``), the ``students`` seated, the ``skipped`` exams or rooms and
+    the ``seconds`` taken.
+    """
+    start = time.perf_counter()
+    skipped = []
+    with batch_invalidation(), transaction.atomic():
+        references = _exam_references(exam_items)
+
+        # Clear existing exam schedules first
+        ExamSchedule.objects.all().delete()
+        ExamRoomAssignment.objects.all().delete()
+        ExamRoomClassAllocation.objects.all().delete()
+        StudentExamAllocation.objects.all().delete()
+        StudentExamItinerary.objects.all().delete()
+
+        exams = _exam_rows(exam_items, references, skipped)
+        ExamSchedule.objects.bulk_create([exam for exam, _ in exams], batch_size=BATCH_SIZE)
+        students = _write_exam_details(exams, references, skipped)
+        refresh_itinerary()
+
+    return {
+        'rows': len(exams),
+        'students': students,
+        'skipped': skipped,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def _columns_key(columns_used):
+    if isinstance(columns_used, (set, list, tuple)):
+        return tuple(sorted(columns_used))
+    return columns_used
+
+
+def _exam_contents(room_entries):
+    """Comparable contents of one exam from ``(room, classes, proctors, students)`` entries.
+
+    Entries for the same room are merged, and a student listed in more than
+    one room only counts in the first, as ``_write_exam_details`` seats them.
+    Both sides of the change check in ``apply_exam_schedule`` go through here.
+    """
+    rooms = defaultdict(lambda: ([], set(), set()))
+    seated = set()
+    for room, classes, proctors, students in room_entries:
+        room_classes, room_proctors, room_students = rooms[room]
+        room_classes.extend(classes)
+        room_proctors.update(proctors)
+        for student in students:
+            if student not in seated:
+                seated.add(student)
+                room_students.add(student)
+    return frozenset(
+        (room, tuple(sorted(classes, key=repr)), frozenset(proctors), frozenset(students))
+        for room, (classes, proctors, students) in rooms.items()
+    )
+
+
+def _stored_exam_contents():
+    """``{exam id: contents}`` for the persisted exams, comparable with ``_item_contents``."""
+    assignments = {
+        pk: (exam_id, room)
+        for pk, exam_id, room in ExamRoomAssignment.objects.values_list('pk', 'exam_id', 'room__code')
+    }
+    rooms = defaultdict(lambda: ([], set(), set()))
+    for key in assignments.values():
+        rooms[key]
+    for assignment_id, name in ExamRoomAssignment.proctors.through.objects.values_list(
+        'examroomassignment_id', 'lecturer__name'
+    ):
+        rooms[assignments[assignment_id]][1].add(name)
+    for assignment_id, class_code, columns_used in ExamRoomClassAllocation.objects.values_list(
+        'room_assignment_id', 'class_assigned__code', 'columns_used'
+    ):
+        rooms[assignments[assignment_id]][0].append((class_code, _columns_key(columns_used)))
+    for exam_id, room, student_index in StudentExamAllocation.objects.values_list(
+        'exam_id', 'room__code', 'student_index'
+    ):
+        rooms[(exam_id, room)][2].add(student_index)
+
+    entries = defaultdict(list)
+    for (exam_id, room), (classes, proctors, students) in rooms.items():
+        entries[exam_id].append((room, classes, proctors, students))
+    return {exam_id: _exam_contents(room_entries) for exam_id, room_entries in entries.items()}
+
+
+def _item_contents(item, references):
+    """Rooms, classes, proctors and students an exam item would be written with."""
+    return _exam_contents(
+        (
+            room_data['room'],
+            [(room_data['class'], _columns_key(room_data.get('columns_used', [])))]
+            if room_data['class'] in references['classes'] else [],
+            [name for name in item['proctors'].get(room_data['room'], []) if name in references['proctors']],
+            room_data['student_ids'],
+        )
+        for room_data in item['rooms']
+        if room_data['room'] in references['rooms']
+    )
+
+
+def apply_exam_schedule(exam_items):
+    """Bring the exam tables in line with the given exams, touching only what changed.
+
+    Exams are matched on their natural key (course, date, slot). New keys
+    are inserted, keys no longer scheduled are deleted, and exams whose
+    rooms, classes, columns, proctors or students changed keep their id but
+    have their rooms and seats rewritten. Returns a report with the
+    ``inserted``, ``updated``, ``deleted`` and ``unchanged`` counts, the
+    ``changes`` made, the ``students`` seated, the ``skipped`` exams or
+    rooms and the ``seconds`` taken.
+    """
+    start = time.perf_counter()
+    skipped = []
+    with batch_invalidation(), transaction.atomic():
+        references = _exam_references(exam_items)
+        wanted = {}
+        for exam, item in _exam_rows(exam_items, references, skipped):
+            wanted.setdefault((exam.course_id, exam.date, exam.time_slot_id), (exam, item))
+        stored = _stored_exam_contents()
+
+        existing = {}
+        delete_ids = []
+        changes = []
+        for pk, *key, course, start_time, end_time in ExamSchedule.objects.order_by('pk').values_list(
+            'pk', 'course_id', 'date', 'time_slot_id',
+            'course__code', 'time_slot__start_time', 'time_slot__end_time'
+        ):
+            key = tuple(key)
+            if key in existing or key not in wanted:
+                delete_ids.append(pk)
+                changes.append(f"- {course} on {key[1]} {_slot_label(start_time, end_time)}")
+            else:
+                existing[key] = pk
+
+        inserts, updates = [], []
+        for key, (exam, item) in wanted.items():
+            label = f"{item['course']} on {item['day']} {item['slot']}"
+            pk = existing.get(key)
+            if pk is None:
+                inserts.append((exam, item))
+                changes.append(f"+ {label}")
+            elif stored.get(pk, frozenset()) != _item_contents(item, references):
+                exam.pk = pk
+                updates.append((exam, item))
+                changes.append(f"~ {label}")
+
+        # Rooms cascade to their class allocations and proctor links
+        ExamSchedule.objects.filter(pk__in=delete_ids).delete()
+        updated_ids = [exam.pk for exam, _ in updates]
+        ExamRoomAssignment.objects.filter(exam_id__in=updated_ids).delete()
+        StudentExamAllocation.objects.filter(exam_id__in=updated_ids).delete()
+        ExamSchedule.objects.bulk_create([exam for exam, _ in inserts], batch_size=BATCH_SIZE)
+        students = _write_exam_details(inserts + updates, references, skipped)
+        refresh_itinerary([exam.pk for exam, _ in inserts + updates])
+
+    return {
+        'inserted': len(inserts),
+        'updated': len(updates),
+        'deleted': len(delete_ids),
+        'unchanged': len(wanted) - len(inserts) - len(updates),
+        'changes': changes,
+        'students': students,
+        'skipped': skipped,
+        'seconds': time.perf_counter() - start,
+    }
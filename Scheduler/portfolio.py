@@ -0,0 +1,107 @@
+"""Multi-seed portfolio runs of the lecture solver.
+
+``generate_complete_schedule`` is randomized, so the quality of a single run
+varies. ``generate_portfolio_schedule`` runs it with several seeds across a
+process pool, scores each result and returns the best one together with its
+seed; calling ``generate_complete_schedule(**algorithm_data, seed=seed)``
+regenerates exactly the same timetable.
+"""
+import multiprocessing
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from .algorithm import EVICTIONS_KEY, generate_complete_schedule
+
+# Inputs shared by every run in a worker process, set once by the initializer
+_worker_data = None
+
+
+def _init_worker(algorithm_data):
+    global _worker_data
+    _worker_data = algorithm_data
+
+
+def _run_seed(seed):
+    schedule, scheduling_issues = generate_complete_schedule(**_worker_data, seed=seed)
+    return seed, schedule, dict(scheduling_issues)
+
+
+def required_blocks(courses, course_class_map, enrollment_breakdown):
+    """Number of blocks each (course, class) needs, skipping empty classes."""
+    required = {}
+    for course_code, credit in courses.items():
+        blocks = credit // 2 + credit % 2
+        for assigned_class in course_class_map.get(course_code, []):
+            if enrollment_breakdown.get(course_code, {}).get(assigned_class):
+                required[(course_code, assigned_class)] = blocks
+    return required
+
+
+def score_schedule(schedule, scheduling_issues, required, room_size):
+    """Score a run as ``(unscheduled blocks, evictions, seats over capacity, empty seats)``;
+    lower is better.
+
+    Room candidates always fit the class, so seats over capacity only show up
+    when a room's capacity and the enrollment disagree; empty seats break the
+    remaining ties in favour of the run that packs rooms most tightly.
+    """
+    placed = {}
+    over_capacity = 0
+    empty_seats = 0
+    for entry in schedule:
+        key = (entry['course'], entry['class'])
+        placed[key] = placed.get(key, 0) + 1
+        spare = room_size.get(entry['room'], 0) - entry['enrollment']
+        if spare < 0:
+            over_capacity -= spare
+        else:
+            empty_seats += spare
+
+    unscheduled = sum(max(blocks - placed.get(key, 0), 0) for key, blocks in required.items())
+    evictions = len(scheduling_issues.get(EVICTIONS_KEY, []))
+    return unscheduled, evictions, over_capacity, empty_seats
+
+
+def generate_portfolio_schedule(runs=8, max_workers=None, base_seed=None, **algorithm_data):
+    """Run the lecture solver with ``runs`` seeds in parallel and keep the best result.
+
+    Seeds are ``base_seed, base_seed + 1, ...``; a random base seed is drawn
+    when none is given. Returns ``(schedule, scheduling_issues, report)`` where
+    ``report`` holds the winning ``seed`` and the score of every run.
+    """
+    if base_seed is None:
+        base_seed = random.SystemRandom().randrange(2 ** 32)
+    seeds = [base_seed + i for i in range(runs)]
+    required = required_blocks(
+        algorithm_data['courses'],
+        algorithm_data['course_class_map'],
+        algorithm_data['enrollment_breakdown'],
+    )
+
+    # Spawned workers avoid inheriting the web process's threads and DB connections
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+        initargs=(algorithm_data,),
+    ) as executor:
+        results = list(executor.map(_run_seed, seeds))
+
+    scored = []
+    for seed, schedule, scheduling_issues in results:
+        score = score_schedule(schedule, scheduling_issues, required, algorithm_data['room_size'])
+        scored.append(((*score, seed), schedule, scheduling_issues))
+    scored.sort(key=lambda item: item[0])
+
+    (*_, best_seed), best_schedule, best_issues = scored[0]
+    report = {
+        'seed': best_seed,
+        'runs': [
+            {
+                'seed': seed, 'unscheduled': unscheduled, 'evictions': evictions,
+                'over_capacity': over_capacity, 'empty_seats': empty_seats,
+            }
+            for (unscheduled, evictions, over_capacity, empty_seats, seed), _, _ in scored
+        ],
+    }
+    return best_schedule, best_issues, report
@@ -0,0 +1,69 @@
+"""Proctor availability pool for the exam solver.
+
+Proctors are handed out per (day, slot) from a heap ordered by how many
+duties each proctor already has across the whole exam period, so duty is
+balanced instead of always falling on the first names in the list. Proctors
+who declared availability are used before proctors who did not, and only on
+the days they declared. Heap entries are invalidated lazily: a popped entry
+whose load is out of date is pushed back with the current load, and entries
+for proctors already busy in that (day, slot) are dropped. This relies on
+loads only ever growing, which is why proctors cannot be handed back.
+"""
+import heapq
+
+# Proctors who declared availability are preferred over those who did not
+DECLARED, UNDECLARED = 0, 1
+
+
+class ProctorPool:
+    """Per-(day, slot) free-proctor queues ordered by duty load."""
+
+    def __init__(self, proctors, proctors_availability):
+        self.order = {proctor: i for i, proctor in enumerate(proctors)}
+        self.availability = {
+            proctor: proctors_availability.get(proctor) or None for proctor in proctors
+        }
+        self.load = {proctor: 0 for proctor in proctors}
+        self._busy = {}
+        self._heaps = {}
+
+    def _tier(self, proctor, day):
+        """Heap tier of ``proctor`` on ``day``, or None when they are unavailable."""
+        availability = self.availability[proctor]
+        if availability is None:
+            return UNDECLARED
+        return DECLARED if day in availability else None
+
+    def _entry(self, proctor, day):
+        return (self._tier(proctor, day), self.load[proctor], self.order[proctor], proctor)
+
+    def _heap(self, day, slot):
+        heap = self._heaps.get((day, slot))
+        if heap is None:
+            heap = [self._entry(proctor, day) for proctor in self.order if self._tier(proctor, day) is not None]
+            heapq.heapify(heap)
+            self._heaps[(day, slot)] = heap
+            self._busy[(day, slot)] = set()
+        return heap
+
+    def busy(self, day, slot):
+        """Proctors already on duty at (day, slot)."""
+        self._heap(day, slot)
+        return self._busy[(day, slot)]
+
+    def take(self, day, slot, count):
+        """Assign up to ``count`` free proctors at (day, slot), least loaded first."""
+        heap = self._heap(day, slot)
+        busy = self._busy[(day, slot)]
+        taken = []
+        while heap and len(taken) < count:
+            tier, load, order, proctor = heapq.heappop(heap)
+            if proctor in busy:
+                continue
+            if load != self.load[proctor]:
+                heapq.heappush(heap, (tier, self.load[proctor], order, proctor))
+                continue
+            busy.add(proctor)
+            self.load[proctor] += 1
+            taken.append(proctor)
+        return taken
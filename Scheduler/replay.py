@@ -0,0 +1,106 @@
+"""Recorded solver runs for replay, benchmarking and regression testing.
+
+Each generation can be recorded as a snapshot (see ``Scheduler.snapshot``)
+holding the exact solver inputs, the seed, the result and its digest.
+Replaying a record re-runs the solver with the same inputs and seed and
+reports whether it still produces the same timetable, and how long it took.
+Records from before snapshots (plain JSON files) can still be replayed.
+Nothing here needs Django.
+"""
+import datetime
+import hashlib
+import json
+import os
+import random
+import time
+from array import array
+
+from .algorithm import exam_schedule, generate_complete_schedule
+from .snapshot import EXTENSION, is_snapshot, read_snapshot, write_snapshot
+
+LECTURE = 'lecture'
+EXAM = 'exam'
+
+SOLVERS = {
+    LECTURE: generate_complete_schedule,
+    EXAM: exam_schedule,
+}
+
+
+def new_seed():
+    """Fresh seed for a generation that was not given one."""
+    return random.SystemRandom().randrange(2 ** 32)
+
+
+def _json_default(value):
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    if isinstance(value, array):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def result_digest(result):
+    """Stable SHA-256 of a solver result (sets are compared by content)."""
+    payload = json.dumps(result, sort_keys=True, default=_json_default)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def run_solver(kind, inputs, seed):
+    """Run the ``kind`` solver on ``inputs`` with ``seed``."""
+    return SOLVERS[kind](**inputs, seed=seed)
+
+
+def record_run(directory, kind, inputs, seed, result, keep=None):
+    """Write the inputs, seed and result of a run as a snapshot; return the file path.
+
+    With ``keep`` only the newest ``keep`` records of ``kind`` are kept in
+    ``directory``; older ones are deleted.
+    """
+    created_at = datetime.datetime.now()
+    path = os.path.join(directory, f"{kind}-{created_at.strftime('%Y%m%d-%H%M%S')}-{seed}{EXTENSION}")
+    write_snapshot(path, kind, inputs, seed, result, result_digest=result_digest(result))
+    if keep is not None:
+        prune_runs(directory, kind, keep)
+    return path
+
+
+def prune_runs(directory, kind, keep):
+    """Delete all but the newest ``keep`` records of ``kind``; return how many were deleted."""
+    records = sorted(
+        (os.path.join(directory, name) for name in os.listdir(directory)
+         if name.startswith(f"{kind}-") and name.endswith(EXTENSION)),
+        key=os.path.getmtime
+    )
+    stale = records[:max(len(records) - keep, 0)]
+    for path in stale:
+        os.remove(path)
+    return len(stale)
+
+
+def load_run(path, mmap_arrays=False):
+    """``{'kind', 'seed', 'inputs', 'result_digest'}`` of a recorded run."""
+    if is_snapshot(path):
+        snapshot = read_snapshot(path, mmap_arrays=mmap_arrays)
+        snapshot['result_digest'] = snapshot['meta']['result_digest']
+        return snapshot
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)
+
+
+def replay_run(path, mmap_arrays=False):
+    """Re-run a recorded generation.
+
+    Returns ``(result, report)`` where ``report`` has the ``elapsed`` solver
+    time in seconds and whether the result ``matches`` the recorded digest.
+    """
+    record = load_run(path, mmap_arrays=mmap_arrays)
+    start = time.perf_counter()
+    result = run_solver(record['kind'], record['inputs'], record['seed'])
+    elapsed = time.perf_counter() - start
+    return result, {
+        'kind': record['kind'],
+        'seed': record['seed'],
+        'elapsed': elapsed,
+        'matches': result_digest(result) == record['result_digest'],
+    }
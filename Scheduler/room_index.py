@@ -0,0 +1,99 @@
+"""Room-candidate index for the lecture solver.
+
+Which rooms may host a session depends only on the course type, the lab type
+and the class size, never on the day/slot being tried, so the filtering done
+by ``select_room`` is precomputed here once per run. Rooms are kept in
+capacity-sorted arrays per room group and a class size is resolved to its
+candidate band with a bisect.
+"""
+from bisect import bisect_left, bisect_right
+
+LECTURE_ROOM_TYPES = ("lecture hall", "classroom", "auditorium")
+LARGE_FALLBACK_TYPES = ("lecture hall", "auditorium")
+LARGE_CLASS_SIZE = 200
+
+
+class _SortedRooms:
+    """Rooms of one group sorted by capacity, ties kept in input order."""
+
+    def __init__(self, rooms, room_size):
+        ascending = sorted(rooms, key=lambda r: room_size[r])
+        descending = sorted(rooms, key=lambda r: -room_size[r])
+        self.asc_rooms = ascending
+        self.asc_sizes = [room_size[r] for r in ascending]
+        self.desc_rooms = descending
+        self.desc_neg_sizes = [-room_size[r] for r in descending]
+
+    def at_least(self, size):
+        """Rooms with capacity >= size, largest first."""
+        return self.desc_rooms[:bisect_right(self.desc_neg_sizes, -size)]
+
+    def between(self, low, high):
+        """Rooms with low <= capacity <= high, smallest first."""
+        return self.asc_rooms[bisect_left(self.asc_sizes, low):bisect_right(self.asc_sizes, high)]
+
+    def smallest_from(self, size):
+        """Rooms with capacity >= size, smallest first."""
+        return self.asc_rooms[bisect_left(self.asc_sizes, size):]
+
+
+class RoomCandidateIndex:
+    """Capacity-sorted room groups keyed by room type and lab type."""
+
+    def __init__(self, rooms, room_size, room_type_map, lab_room_map):
+        self.room_size = room_size
+        lecture, halls, fallback = [], [], []
+        labs = {}
+        for room in rooms:
+            room_type = room_type_map.get(room)
+            if room_type in LECTURE_ROOM_TYPES:
+                lecture.append(room)
+            if room_type == "lecture hall":
+                halls.append(room)
+            if room_type in LARGE_FALLBACK_TYPES:
+                fallback.append(room)
+            if room_type == "laboratory":
+                for lab_type in dict.fromkeys(lab_room_map.get(room, [])):
+                    labs.setdefault(lab_type, []).append(room)
+
+        self._lecture = _SortedRooms(lecture, room_size)
+        self._halls = _SortedRooms(halls, room_size)
+        self._fallback = _SortedRooms(fallback, room_size)
+        self._labs = {lab_type: _SortedRooms(members, room_size) for lab_type, members in labs.items()}
+
+    def candidates(self, class_size, course_type, lab_type, room_usage_count):
+        """Return ``(ranked, fallback)`` room lists for a class.
+
+        ``ranked`` follows the ``select_room`` priority: largest rooms first for
+        large classes, smallest suitable rooms first otherwise, then least used.
+        ``fallback`` is only non-empty for large classes with no suitable room.
+        """
+        is_large_class = class_size >= LARGE_CLASS_SIZE
+        room_size = self.room_size
+
+        if course_type == "practical":
+            group = self._labs.get(lab_type)
+            if group is None:
+                suitable = []
+            elif is_large_class:
+                suitable = group.at_least(class_size)
+            else:
+                suitable = group.smallest_from(class_size)
+        elif is_large_class:
+            suitable = self._halls.at_least(class_size)
+        else:
+            suitable = self._lecture.between(class_size, max(class_size * 2, 100))  # 50% utilization rule
+
+        # Stable sorts keep capacity order and input order for equal keys
+        if is_large_class:
+            ranked = sorted(suitable, key=lambda r: (-room_size[r], room_usage_count[r]))
+        else:
+            ranked = sorted(suitable, key=lambda r: (room_size[r], room_usage_count[r]))
+
+        fallback = []
+        if not ranked and is_large_class:
+            fallback = sorted(
+                self._fallback.at_least(class_size),
+                key=lambda r: (-room_size[r], room_usage_count[r])
+            )
+        return ranked, fallback
@@ -0,0 +1,70 @@
+"""Column occupancy store used by the exam solver.
+
+Room dimensions are parsed once into integer rows/columns, and the columns
+taken in each (day, slot, room) are kept as one integer bitmask where bit
+``i`` is set when column ``i`` is used. Counting free columns is a popcount
+and taking the lowest free columns walks only the bits it returns, instead of
+rebuilding and sorting column sets for every candidate room.
+"""
+from collections import defaultdict
+
+from .booking import iter_slots
+
+
+def parse_dimensions(dimensions):
+    """``(rows, columns)`` from a "rows x columns" string."""
+    rows, columns = dimensions.split(' x ')
+    return int(rows), int(columns)
+
+
+class SeatingEngine:
+    """Per-(day, slot, room) column bitmasks for exam seating."""
+
+    def __init__(self, room_dimensions):
+        self.rows = {}
+        self.columns = {}
+        self.full_mask = {}
+        for room, dimensions in room_dimensions.items():
+            rows, columns = parse_dimensions(dimensions)
+            self.rows[room] = rows
+            self.columns[room] = columns
+            self.full_mask[room] = (1 << columns) - 1
+        self._used = defaultdict(int)
+
+    def used_mask(self, day, slot, room):
+        return self._used[(day, slot, room)]
+
+    def free_count(self, day, slot, room):
+        """Number of columns still free in ``room`` at (day, slot)."""
+        return (self.full_mask[room] & ~self._used[(day, slot, room)]).bit_count()
+
+    def is_used(self, day, slot, room, column):
+        return bool(self._used[(day, slot, room)] >> column & 1)
+
+    def take_lowest(self, day, slot, room, count):
+        """Mark the ``count`` lowest free columns as used and return them as a set."""
+        key = (day, slot, room)
+        free = self.full_mask[room] & ~self._used[key]
+        taken = 0
+        for _ in range(count):
+            if not free:
+                break
+            low = free & -free
+            taken |= low
+            free ^= low
+        self._used[key] |= taken
+        return set(iter_slots(taken))
+
+
+def seat_columns(columns_used, rows, count):
+    """Column of each of ``count`` students seated in ``columns_used``.
+
+    The solver fills a room's columns lowest first, ``rows`` students per
+    column, so student ``i`` of an allocation sits in the ``i // rows``-th
+    column. Manually seated rooms (no column list) get column 0.
+    """
+    if not isinstance(columns_used, (set, list, tuple)) or not columns_used or rows <= 0:
+        return [0] * count
+    columns = sorted(columns_used)
+    last = len(columns) - 1
+    return [columns[min(i // rows, last)] for i in range(count)]
@@ -0,0 +1,60 @@
+"""Keep derived timetable data in step with row-level edits.
+
+Cached portal timetables (and the JSON API's ETags) are invalidated when
+schedules, registrations or seats change, or when a course, room, lecturer,
+class or time slot they show is edited. The student exam itinerary is
+rebuilt for an exam whose date, slot or course is edited, and a single row
+is rewritten when a seat is edited; deleting a seat removes its row through
+the itinerary's cascading key.
+
+There are deliberately no post_delete receivers: they would stop Django
+fast-deleting schedule rows in the bulk writers, which invalidate through
+``batch_invalidation`` instead. The few views and admin actions that delete
+single schedules (or the rooms, courses, lecturers and classes they cascade
+from) call ``invalidate_timetables`` themselves.
+"""
+from django.db.models.signals import m2m_changed, post_save
+from django.dispatch import receiver
+
+from Timetable.models import Class, Course, Lecturer, Room, TimeSlot
+from Users.models import StudentProfile
+
+from .models import ExamSchedule, LectureSchedule, StudentExamAllocation
+from .persistence import refresh_itinerary, refresh_seat_itinerary
+from .timetable_cache import invalidate_timetables
+
+
+@receiver(post_save, sender=LectureSchedule)
+@receiver(post_save, sender=ExamSchedule)
+@receiver(post_save, sender=StudentProfile)
+@receiver(post_save, sender=StudentExamAllocation)
+def schedule_changed(sender, **kwargs):
+    invalidate_timetables()
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Room)
+@receiver(post_save, sender=Lecturer)
+@receiver(post_save, sender=Class)
+@receiver(post_save, sender=TimeSlot)
+def reference_changed(sender, **kwargs):
+    # Cached timetables copy course titles, room codes, lecturer names and slot times
+    invalidate_timetables()
+
+
+@receiver(m2m_changed, sender=StudentProfile.registered_courses.through)
+def registrations_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_timetables()
+
+
+@receiver(post_save, sender=ExamSchedule)
+def exam_edited(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        refresh_itinerary([instance.pk])
+
+
+@receiver(post_save, sender=StudentExamAllocation)
+def seat_edited(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_seat_itinerary(instance)
@@ -0,0 +1,185 @@
+"""Compact snapshot files of solver inputs and results.
+
+A snapshot is a zip archive that can be read without Django:
+
+* ``header.json`` (deflated) holds the kind, seed, metadata and the input
+  and result structures, with every large piece replaced by a reference;
+* ``strings.json`` (deflated) is the interned string table: lists of strings
+  such as student indexes are stored once here and referenced by id;
+* ``arrays/NNNN.bin`` (stored uncompressed, little-endian) holds the integer
+  arrays, i.e. the compact enrollment ids and the interned string ids.
+
+Because array members are stored uncompressed they can be memory-mapped
+straight out of the archive, so a large enrollment is not read into memory
+until the solver walks it. Snapshots are used for recorded runs (see
+``Scheduler.replay``), offline benchmarking and archiving accepted timetables.
+"""
+import datetime
+import json
+import mmap
+import os
+import struct
+import sys
+import zipfile
+from array import array
+
+FORMAT = 'scheduler-snapshot'
+VERSION = 1
+EXTENSION = '.snap'
+
+# Lists of at least this many strings are interned and stored as id arrays
+INTERN_MIN_LENGTH = 8
+
+# Fixed part of a zip local file header; the name and extra lengths end it
+_LOCAL_HEADER = struct.Struct('<4s5H3I2H')
+
+
+class _Writer:
+    def __init__(self):
+        self.strings = []
+        self.string_ids = {}
+        self.arrays = []
+
+    def add_array(self, values):
+        if sys.byteorder != 'little':
+            values = array(values.typecode, values)
+            values.byteswap()
+        self.arrays.append(values)
+        return len(self.arrays) - 1
+
+    def intern(self, strings):
+        ids = array('I')
+        for string in strings:
+            sid = self.string_ids.get(string)
+            if sid is None:
+                sid = self.string_ids[string] = len(self.strings)
+                self.strings.append(string)
+            ids.append(sid)
+        return self.add_array(ids)
+
+    def encode(self, value):
+        if isinstance(value, array):
+            return {'$array': self.add_array(value)}
+        if isinstance(value, dict):
+            return {key: self.encode(item) for key, item in value.items()}
+        if isinstance(value, (set, frozenset)):
+            return {'$set': [self.encode(item) for item in sorted(value, key=str)]}
+        if isinstance(value, tuple):
+            return {'$tuple': [self.encode(item) for item in value]}
+        if isinstance(value, list):
+            if len(value) >= INTERN_MIN_LENGTH and all(isinstance(item, str) for item in value):
+                return {'$strings': self.intern(value)}
+            return [self.encode(item) for item in value]
+        return value
+
+
+class _Reader:
+    def __init__(self, strings, arrays):
+        self.strings = strings
+        self.arrays = arrays
+
+    def decode(self, value):
+        if isinstance(value, list):
+            return [self.decode(item) for item in value]
+        if not isinstance(value, dict):
+            return value
+        if len(value) == 1:
+            (marker, item), = value.items()
+            if marker == '$array':
+                return self.arrays[item]
+            if marker == '$strings':
+                strings = self.strings
+                return [strings[sid] for sid in self.arrays[item]]
+            if marker == '$set':
+                return {self.decode(entry) for entry in item}
+            if marker == '$tuple':
+                return tuple(self.decode(entry) for entry in item)
+        return {key: self.decode(item) for key, item in value.items()}
+
+
+def write_snapshot(path, kind, inputs, seed=None, result=None, **meta):
+    """Write a snapshot of solver ``inputs`` and ``result`` to ``path``; return the path.
+
+    ``inputs`` or ``result`` may be None, e.g. when archiving an accepted
+    timetable whose inputs were not kept. Extra keyword arguments are stored
+    as JSON metadata.
+    """
+    writer = _Writer()
+    header = {
+        'format': FORMAT,
+        'version': VERSION,
+        'kind': kind,
+        'seed': seed,
+        'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'meta': meta,
+        'inputs': writer.encode(inputs),
+        'result': writer.encode(result),
+    }
+    header['arrays'] = [{'typecode': values.typecode, 'length': len(values)} for values in writer.arrays]
+
+    directory = os.path.dirname(os.fspath(path))
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    partial = f"{path}.partial"
+    with zipfile.ZipFile(partial, 'w') as archive:
+        archive.writestr('header.json', json.dumps(header, separators=(',', ':')), zipfile.ZIP_DEFLATED)
+        archive.writestr('strings.json', json.dumps(writer.strings, separators=(',', ':')), zipfile.ZIP_DEFLATED)
+        for i, values in enumerate(writer.arrays):
+            archive.writestr(f'arrays/{i:04d}.bin', values.tobytes(), zipfile.ZIP_STORED)
+    os.replace(partial, path)
+    return path
+
+
+def _mapped_array(mapping, info, typecode):
+    """Memoryview over a stored zip member, cast to ``typecode``."""
+    fields = _LOCAL_HEADER.unpack_from(mapping, info.header_offset)
+    name_length, extra_length = fields[-2:]
+    start = info.header_offset + _LOCAL_HEADER.size + name_length + extra_length
+    return memoryview(mapping)[start:start + info.file_size].cast(typecode)
+
+
+def read_snapshot(path, mmap_arrays=False):
+    """Load a snapshot written by ``write_snapshot``.
+
+    Returns a dict with ``kind``, ``seed``, ``created_at``, ``meta``,
+    ``inputs`` and ``result``. With ``mmap_arrays`` the integer arrays are
+    read-only memoryviews over the mapped file instead of in-memory arrays;
+    they support ``len``, indexing, slicing and iteration like the arrays
+    the solvers are normally given.
+    """
+    with zipfile.ZipFile(path) as archive:
+        header = json.loads(archive.read('header.json'))
+        if header.get('format') != FORMAT or header.get('version') != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} scheduler snapshot")
+        strings = json.loads(archive.read('strings.json'))
+
+        mapping = None
+        if mmap_arrays and sys.byteorder == 'little' and header['arrays']:
+            with open(path, 'rb') as handle:
+                mapping = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+        arrays = []
+        for i, spec in enumerate(header['arrays']):
+            info = archive.getinfo(f'arrays/{i:04d}.bin')
+            if mapping is not None and info.compress_type == zipfile.ZIP_STORED:
+                arrays.append(_mapped_array(mapping, info, spec['typecode']))
+                continue
+            values = array(spec['typecode'])
+            values.frombytes(archive.read(info))
+            if sys.byteorder != 'little':
+                values.byteswap()
+            arrays.append(values)
+
+    reader = _Reader(strings, arrays)
+    return {
+        'kind': header['kind'],
+        'seed': header['seed'],
+        'created_at': header['created_at'],
+        'meta': header['meta'],
+        'inputs': reader.decode(header['inputs']),
+        'result': reader.decode(header['result']),
+    }
+
+
+def is_snapshot(path):
+    return zipfile.is_zipfile(path)
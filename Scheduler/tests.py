@@ -1,3 +1,627 @@
-from django.test import TestCase
+import contextlib
+import io
+import datetime
+import random
+from collections import defaultdict
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from benchmarks.bench_select_room import LAB_TYPES, book_randomly, legacy_select_room, make_probes
+from benchmarks.campus import DAYS, TIME_SLOTS, generate_campus, synthetic_rooms
+
+from Timetable.models import Building, Class, College, Course, CourseType, Department, Lecturer, Room, RoomType
+
+from .algorithm import GenerationCancelled, exam_schedule, generate_complete_schedule, select_room
+from .booking import CLASS, LECTURER, ROOM, BookingEngine
+from .conflicts import build_conflict_graph
+from .drafts import (
+    PREVIEW_SESSION_KEYS, expire_drafts, lecture_payload, mark_accepted, preview_draft, save_draft, select_preview,
+    store_preview
+)
+from .jobs import (
+    STALE_JOB_ERROR, _progress_reporter, claim_next_job, enqueue_job, job_status, request_cancel, run_job
+)
+from .models import (
+    ExamSchedule, GenerationJob, LectureSchedule, ScheduleDraft, StudentExamAllocation, StudentExamItinerary
+)
+from .periods import assign_periods, period_capacity
+from .persistence import apply_exam_schedule, apply_lecture_schedule, save_exam_schedule, save_lecture_schedule
+from .proctors import ProctorPool
+from .replay import result_digest
+from .room_index import RoomCandidateIndex
+from .seating import SeatingEngine, seat_columns
+from .timetable_cache import batch_invalidation, cached_timetable, invalidate_timetables, timetable_version
+from .validation import (
+    CLASS_CLASH, COLUMN_OVERLAP, LECTURER_DOUBLE_BOOKED, PROCTOR_DOUBLE_BOOKED, ROOM_DOUBLE_BOOKED, ROOM_OVER_CAPACITY,
+    STUDENT_CLASH, validate_exam_schedule, validate_lecture_schedule
+)
+
+MORNING = '08:00 - 10:00'
+EXAM_SLOT = '09:00 - 12:00'
+
+SOLVER_SEED = 42
+# Digest of each solver's output on the small campus below with SOLVER_SEED;
+# update deliberately when a solver change is meant to alter the timetable
+LECTURE_DIGEST = 'a7b7070bc2dddfe3959f10388871819eaf94e3a274e543f8c2a003a7454b0388'
+EXAM_DIGEST = '214f06447ff30e862bcdd280a1ea929d115aa5dc98046f26506701fcd50ebaa3'
+
+
+def small_campus():
+    return generate_campus(rooms=12, classes=4, courses=10, students=120, lecturers=6, exam_days=3, seed=7)
+
+
+def quietly(solver, inputs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return solver(**inputs, seed=SOLVER_SEED)
+
+
+def lecture(course, day, lecturer='Lecturer One', room='R1', enrollment=30):
+    return {
+        'course': course, 'class': 'CS1', 'lecturer': lecturer, 'room': room,
+        'day': day, 'slots': [MORNING], 'enrollment': enrollment,
+    }
+
+
+def exam(course, day, proctor='Lecturer One', rooms=None):
+    rooms = rooms or [{'room': 'R1', 'class': 'CS1', 'student_ids': ['S1', 'S2', 'S3'], 'columns_used': [0, 2]}]
+    return {
+        'course': course, 'day': day, 'slot': EXAM_SLOT, 'rooms': rooms,
+        'proctors': {room['room']: [proctor] for room in rooms},
+    }
+
+
+def create_references():
+    """Rooms, courses, classes and lecturers the schedule helpers above refer to."""
+    college = College.objects.create(code='CoS', name='College of Science')
+    building = Building.objects.create(code='SCB', name='Science Block', college=college)
+    department = Department.objects.create(code='CS', name='Computer Science', college=college)
+    room_type = RoomType.objects.create(name='Classroom')
+    course_type = CourseType.objects.create(name='Lecture')
+    for code in ('R1', 'R2'):
+        # Two rows per column, so three students fill columns 0, 0 and 2 of [0, 2]
+        Room.objects.create(code=code, building=building, room_type=room_type, capacity=6, dimensions='2 x 3')
+    for code in ('CS101', 'CS102', 'CS103'):
+        Course.objects.create(
+            code=code, title=code, course_type=course_type, department=department,
+            credit_hours=2, enrollment=30
+        )
+    Class.objects.create(code='CS1', department=department, level=100, size=30)
+    Class.objects.create(code='CS2', department=department, level=200, size=30)
+    Lecturer.objects.create(name='Lecturer One', department=department)
+    Lecturer.objects.create(name='Lecturer Two', department=department)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class PersistenceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_references()
+
+    def lecture_pks(self):
+        return dict(LectureSchedule.objects.values_list('course__code', 'pk'))
+
+    def test_save_lecture_schedule_skips_unknown_references(self):
+        report = save_lecture_schedule([lecture('CS101', 'Monday'), lecture('CS102', 'Monday', room='R9')])
+
+        self.assertEqual(report['rows'], 1)
+        self.assertEqual(len(report['skipped']), 1)
+        self.assertEqual(list(self.lecture_pks()), ['CS101'])
+
+    def test_apply_lecture_schedule_only_touches_changed_sessions(self):
+        save_lecture_schedule([lecture('CS101', 'Monday'), lecture('CS102', 'Tuesday')])
+        before = self.lecture_pks()
+
+        report = apply_lecture_schedule([
+            lecture('CS101', 'Monday', lecturer='Lecturer Two'),
+            lecture('CS103', 'Wednesday'),
+        ])
+
+        self.assertEqual(
+            (report['inserted'], report['updated'], report['deleted'], report['unchanged']), (1, 1, 1, 0)
+        )
+        after = self.lecture_pks()
+        self.assertEqual(after['CS101'], before['CS101'])
+        self.assertNotIn('CS102', after)
+        self.assertEqual(LectureSchedule.objects.get(pk=after['CS101']).lecturer.name, 'Lecturer Two')
+
+        report = apply_lecture_schedule([
+            lecture('CS101', 'Monday', lecturer='Lecturer Two'),
+            lecture('CS103', 'Wednesday'),
+        ])
+        self.assertEqual(
+            (report['inserted'], report['updated'], report['deleted'], report['unchanged']), (0, 0, 0, 2)
+        )
+        self.assertEqual(self.lecture_pks(), after)
+
+    def test_apply_lecture_schedule_removes_duplicate_rows(self):
+        save_lecture_schedule([lecture('CS101', 'Monday')])
+        original = LectureSchedule.objects.get()
+        duplicate = LectureSchedule.objects.get()
+        duplicate.pk = None
+        duplicate.save()
+
+        report = apply_lecture_schedule([lecture('CS101', 'Monday')])
+
+        self.assertEqual((report['deleted'], report['unchanged']), (1, 1))
+        self.assertEqual(list(LectureSchedule.objects.values_list('pk', flat=True)), [original.pk])
+
+    def test_save_exam_schedule_seats_each_student_once_in_their_column(self):
+        report = save_exam_schedule([exam('CS101', '2025-05-05', rooms=[
+            {'room': 'R1', 'class': 'CS1', 'student_ids': ['S1', 'S2', 'S3'], 'columns_used': [0, 2]},
+            # S3 listed again in a second room keeps their first seat
+            {'room': 'R2', 'class': 'CS1', 'student_ids': ['S3', 'S4'], 'columns_used': [1]},
+        ])])
+
+        self.assertEqual((report['rows'], report['students']), (1, 4))
+        seats = {
+            student: (room, column)
+            for student, room, column in StudentExamAllocation.objects.values_list(
+                'student_index', 'room__code', 'column_number'
+            )
+        }
+        self.assertEqual(seats, {'S1': ('R1', 0), 'S2': ('R1', 0), 'S3': ('R1', 2), 'S4': ('R2', 1)})
+        self.assertEqual(StudentExamItinerary.objects.count(), 4)
+
+    def test_apply_exam_schedule_only_rewrites_changed_exams(self):
+        save_exam_schedule([exam('CS101', '2025-05-05'), exam('CS102', '2025-05-06')])
+        before = dict(ExamSchedule.objects.values_list('course__code', 'pk'))
+
+        changed = [exam('CS101', '2025-05-05', proctor='Lecturer Two'), exam('CS103', '2025-05-07')]
+        report = apply_exam_schedule(changed)
+
+        self.assertEqual(
+            (report['inserted'], report['updated'], report['deleted'], report['unchanged']), (1, 1, 1, 0)
+        )
+        after = dict(ExamSchedule.objects.values_list('course__code', 'pk'))
+        self.assertEqual(after['CS101'], before['CS101'])
+        self.assertNotIn('CS102', after)
+        proctors = ExamSchedule.objects.get(pk=after['CS101']).room_assignments.get().proctors
+        self.assertEqual(list(proctors.values_list('name', flat=True)), ['Lecturer Two'])
+        self.assertEqual(StudentExamItinerary.objects.count(), 6)
+
+        report = apply_exam_schedule(changed)
+        self.assertEqual(
+            (report['inserted'], report['updated'], report['deleted'], report['unchanged']), (0, 0, 0, 2)
+        )
+        self.assertEqual(dict(ExamSchedule.objects.values_list('course__code', 'pk')), after)
+
+    def test_apply_exam_schedule_twice_with_repeated_students_changes_nothing(self):
+        schedule = [exam('CS101', '2025-05-05', rooms=[
+            {'room': 'R1', 'class': 'CS1', 'student_ids': ['S1', 'S2'], 'columns_used': [0]},
+            # S2 is also listed under a second class in the same room and S1 in another room
+            {'room': 'R1', 'class': 'CS2', 'student_ids': ['S2', 'S3'], 'columns_used': [1]},
+            {'room': 'R2', 'class': 'CS1', 'student_ids': ['S1', 'S4'], 'columns_used': [0]},
+        ])]
+
+        self.assertEqual(apply_exam_schedule(schedule)['inserted'], 1)
+        report = apply_exam_schedule(schedule)
+
+        self.assertEqual(
+            (report['inserted'], report['updated'], report['deleted'], report['unchanged']), (0, 0, 0, 1)
+        )
+        self.assertEqual(StudentExamAllocation.objects.count(), 4)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class TimetableCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_references()
+
+    def test_saving_and_editing_lectures_bumps_the_version(self):
+        version = timetable_version()
+        save_lecture_schedule([lecture('CS101', 'Monday')])
+        saved = timetable_version()
+        self.assertNotEqual(saved, version)
+
+        session = LectureSchedule.objects.get()
+        session.day = 'Tuesday'
+        session.save()
+        self.assertNotEqual(timetable_version(), saved)
+
+    def test_saving_and_editing_exams_bumps_the_version(self):
+        version = timetable_version()
+        save_exam_schedule([exam('CS101', '2025-05-05')])
+        saved = timetable_version()
+        self.assertNotEqual(saved, version)
+
+        scheduled = ExamSchedule.objects.get()
+        scheduled.date = datetime.date(2025, 5, 6)
+        scheduled.save()
+        self.assertNotEqual(timetable_version(), saved)
+
+    def test_nested_batches_bump_the_version_once_on_exit(self):
+        version = timetable_version()
+        with mock.patch('Scheduler.timetable_cache._new_version', return_value='bumped') as new_version:
+            with batch_invalidation():
+                invalidate_timetables()
+                with batch_invalidation():
+                    invalidate_timetables()
+                self.assertEqual(timetable_version(), version)
+
+        self.assertEqual(new_version.call_count, 1)
+        self.assertEqual(timetable_version(), 'bumped')
+
+    def test_cached_data_is_rebuilt_after_a_bump(self):
+        build = mock.Mock(side_effect=['first', 'second'])
+
+        self.assertEqual(cached_timetable('week', 'lecturer:1', build), 'first')
+        self.assertEqual(cached_timetable('week', 'lecturer:1', build), 'first')
+        invalidate_timetables()
+        self.assertEqual(cached_timetable('week', 'lecturer:1', build), 'second')
+
+
+class BookingEngineTests(SimpleTestCase):
+    def test_matches_slot_set_bookings(self):
+        """Random books and releases agree with the per-slot sets the solver used to keep."""
+        rng = random.Random(1)
+        engine = BookingEngine(DAYS, TIME_SLOTS)
+        legacy = {}
+        keys = [(kind, f"{kind}-{i}") for kind in (ROOM, LECTURER, CLASS) for i in range(4)]
+        for _ in range(2000):
+            kind, key = rng.choice(keys)
+            day = rng.randrange(len(DAYS))
+            start = rng.randrange(len(TIME_SLOTS) - 1)
+            slots = set(TIME_SLOTS[start:start + 2])
+            mask = engine.slots_mask(slots)
+            booked = legacy.setdefault((kind, key, day), set())
+            self.assertEqual(engine.is_free(kind, key, day, mask), not booked & slots)
+            if rng.random() < 0.6:
+                engine.book(kind, key, day, mask, session=(key, start))
+                booked |= slots
+            else:
+                engine.release(kind, key, day, mask)
+                booked -= slots
+        for (kind, key, day), booked in legacy.items():
+            self.assertEqual(engine.occupancy(kind, key, day), engine.slots_mask(booked))
+
+    def test_holders_are_the_sessions_booking_each_slot(self):
+        engine = BookingEngine(DAYS, TIME_SLOTS)
+        engine.book(ROOM, 'R1', 0, BookingEngine.block_mask(0, 2), session='first')
+        engine.book(ROOM, 'R1', 0, BookingEngine.block_mask(2, 1), session='second')
+        self.assertEqual(engine.holders(ROOM, 'R1', 0, BookingEngine.block_mask(1, 2)), ['first', 'second'])
+        engine.release(ROOM, 'R1', 0, BookingEngine.block_mask(0, 2))
+        self.assertEqual(engine.holders(ROOM, 'R1', 0, BookingEngine.block_mask(0, 3)), ['second'])
+
+
+class LectureSolverTests(SimpleTestCase):
+    def test_fixed_seed_reproduces_recorded_timetable(self):
+        schedule, scheduling_issues = quietly(generate_complete_schedule, small_campus()['lecture'])
+        self.assertEqual(result_digest((schedule, scheduling_issues)), LECTURE_DIGEST)
+
+    def test_return_contract_and_no_double_bookings(self):
+        algorithm_data = small_campus()['lecture']
+        schedule, scheduling_issues = quietly(generate_complete_schedule, algorithm_data)
+
+        self.assertTrue(schedule)
+        for entry in schedule:
+            self.assertEqual(
+                set(entry), {'course', 'class', 'lecturer', 'room', 'day', 'slots', 'enrollment'}
+            )
+            self.assertTrue(set(entry['slots']) <= set(algorithm_data['time_slots']))
+        self.assertIsInstance(scheduling_issues, dict)
+        self.assertEqual(validate_lecture_schedule(schedule, algorithm_data['room_size']), [])
+
+
+class RoomSelectionTests(SimpleTestCase):
+    def test_indexed_selection_matches_legacy_filter_and_sort(self):
+        rng = random.Random(3)
+        room_size, room_type_map, lab_room_map = synthetic_rooms(60, rng, LAB_TYPES)
+        rooms = list(room_size)
+        bookings = BookingEngine(DAYS, TIME_SLOTS)
+        book_randomly(bookings, rooms, rng, density=0.5)
+        usage = defaultdict(int, {room: rng.randint(0, 3) for room in rooms})
+        index = RoomCandidateIndex(rooms, room_size, room_type_map, lab_room_map)
+
+        for class_size, course_type, lab_type in make_probes(80, rng):
+            ranked, fallback = index.candidates(class_size, course_type, lab_type, usage)
+            for day in range(len(DAYS)):
+                for start in range(len(TIME_SLOTS) - 1):
+                    mask = BookingEngine.block_mask(start, 2)
+                    self.assertEqual(
+                        select_room(ranked, fallback, bookings, day, mask),
+                        legacy_select_room(
+                            class_size, rooms, room_size, course_type, lab_type, room_type_map,
+                            lab_room_map, usage, bookings, day, mask
+                        ),
+                    )
+
+    def test_least_used_room_wins_between_equal_sizes(self):
+        room_size = {'A': 60, 'B': 60, 'C': 40}
+        room_type_map = dict.fromkeys(room_size, 'classroom')
+        index = RoomCandidateIndex(list(room_size), room_size, room_type_map, {})
+
+        ranked, fallback = index.candidates(50, 'lecture', None, defaultdict(int, {'A': 2, 'B': 1}))
+
+        self.assertEqual((ranked, fallback), (['B', 'A'], []))
+
+
+class SeatingEngineTests(SimpleTestCase):
+    def test_matches_column_set_seating(self):
+        """Random takes agree with the sorted free-column sets the solver used to build."""
+        rng = random.Random(5)
+        dimensions = {'A': '4 x 3', 'B': '5 x 8', 'C': '2 x 1'}
+        engine = SeatingEngine(dimensions)
+        legacy = defaultdict(set)
+        for _ in range(300):
+            room = rng.choice(list(dimensions))
+            key = (rng.choice(['Mon', 'Tue']), rng.choice(['AM', 'PM']), room)
+            free = set(range(engine.columns[room])) - legacy[key]
+            self.assertEqual(engine.free_count(*key), len(free))
+
+            count = rng.randint(1, 4)
+            expected = set(sorted(free)[:count])
+            self.assertEqual(engine.take_lowest(*key, count), expected)
+            legacy[key] |= expected
+            for column in range(engine.columns[room]):
+                self.assertEqual(engine.is_used(*key, column), column in legacy[key])
+
+    def test_seat_columns_fills_each_column_row_by_row(self):
+        self.assertEqual(seat_columns({4, 1}, 2, 5), [1, 1, 4, 4, 4])
+        self.assertEqual(seat_columns('To be done manually', 2, 2), [0, 0])
+
+
+class ExamSolverTests(SimpleTestCase):
+    def test_fixed_seed_reproduces_recorded_timetable(self):
+        result = quietly(exam_schedule, small_campus()['exam'])
+        self.assertEqual(result_digest(result), EXAM_DIGEST)
+
+    def test_schedule_has_no_clashes_or_shared_columns(self):
+        exam_data = small_campus()['exam']
+        schedule, manual_assignments, unused_columns = quietly(exam_schedule, exam_data)
+
+        self.assertEqual(len(schedule), len(exam_data['course_type']))
+        self.assertEqual(validate_exam_schedule(schedule, exam_data['room_size']), [])
+        for exam in schedule:
+            seated = [student for room in exam['rooms'] for student in room['student_ids']]
+            self.assertEqual(len(seated), len(set(seated)))
+
+
+class ConflictGraphTests(SimpleTestCase):
+    def test_shared_student_counts_are_symmetric(self):
+        graph = build_conflict_graph({
+            'MATH': {'CS1': ['S1', 'S2', 'S3'], 'EE1': ['S4']},
+            'PHYS': {'CS1': ['S1', 'S2'], 'EE1': ['S4']},
+            'CHEM': {'EE1': ['S4'], 'CS1': ['S5']},
+            'ART': {'CS1': ['S6']},
+        })
+
+        self.assertEqual(graph, {
+            'MATH': {'PHYS': 3, 'CHEM': 1},
+            'PHYS': {'MATH': 3, 'CHEM': 1},
+            'CHEM': {'MATH': 1, 'PHYS': 1},
+        })
+        for course, neighbours in graph.items():
+            for other, shared in neighbours.items():
+                self.assertEqual(graph[other][course], shared)
+
+
+class PeriodAssignmentTests(SimpleTestCase):
+    def test_period_capacity_counts_whole_course_columns_and_overflow_rooms(self):
+        capacity = period_capacity(
+            room_size={'R1': 40, 'Lab-1': 30, 'HALL': 100},
+            room_dimensions={'R1': '4 x 10', 'Lab-1': '5 x 6', 'HALL': '10 x 10'},
+            max_courses={'R1': 3, 'Lab-1': 2},
+            overflow_rooms=['HALL'],
+        )
+        # R1 seats 9 of its 10 columns (3 courses x 3 columns) of 4 rows
+        self.assertEqual(capacity, 36 + 100)
+
+    def test_conflicting_courses_never_share_a_period_within_capacity(self):
+        rng = random.Random(11)
+        students = [f'S{i}' for i in range(200)]
+        enrollment_breakdown = {
+            f'C{i:02d}': {'CLS': rng.sample(students, rng.randint(5, 40))} for i in range(30)
+        }
+        conflict_graph = build_conflict_graph(enrollment_breakdown)
+        course_sizes = {course: len(by_class['CLS']) for course, by_class in enrollment_breakdown.items()}
+        periods = [(day, slot) for day in range(5) for slot in range(3)]
+
+        assignment = assign_periods(course_sizes, conflict_graph, periods, 120, random.Random(SOLVER_SEED))
+
+        self.assertGreater(len(assignment), len(course_sizes) // 2)
+        load = defaultdict(int)
+        for course, period in assignment.items():
+            self.assertIn(period, periods)
+            load[period] += course_sizes[course]
+            for other in conflict_graph.get(course, {}):
+                self.assertNotEqual(assignment.get(other), period)
+        self.assertLessEqual(max(load.values()), 120)
+
+    def test_course_without_a_feasible_period_is_left_out(self):
+        assignment = assign_periods(
+            {'A': 10, 'B': 10, 'C': 10}, {'A': {'B': 1}, 'B': {'A': 1}}, ['P1'], 20, random.Random(0)
+        )
+        # A is coloured first on degree, which leaves B no period; C still fits beside A
+        self.assertEqual(assignment, {'A': 'P1', 'C': 'P1'})
+
+
+class ProctorPoolTests(SimpleTestCase):
+    def test_take_skips_proctors_already_busy_in_the_slot(self):
+        pool = ProctorPool(['P1', 'P2', 'P3'], {})
+
+        self.assertEqual(pool.take('Mon', 'AM', 2), ['P1', 'P2'])
+        self.assertEqual(pool.take('Mon', 'AM', 2), ['P3'])
+        self.assertEqual(pool.take('Mon', 'AM', 1), [])
+
+    def test_declared_proctors_come_first_and_only_on_their_days(self):
+        pool = ProctorPool(['P1', 'P2', 'P3'], {'P2': {'Tue': ['AM']}, 'P3': {'Mon': ['AM']}})
+
+        self.assertEqual(pool.take('Mon', 'AM', 3), ['P3', 'P1'])
+        self.assertEqual(pool.take('Tue', 'AM', 3), ['P2', 'P1'])
+
+    def test_least_loaded_proctor_is_taken_first(self):
+        pool = ProctorPool(['P1', 'P2', 'P3'], {})
+        pool.busy('Tue', 'AM')  # Tuesday's queue is built while every load is still 0
+        pool.take('Mon', 'AM', 3)
+        pool.take('Mon', 'PM', 1)
+
+        # Loads are now P1=2, P2=1, P3=1, and Tuesday's stale entries are re-ranked on pop
+        self.assertEqual(pool.take('Tue', 'AM', 3), ['P2', 'P3', 'P1'])
+        self.assertEqual(pool.load, {'P1': 3, 'P2': 2, 'P3': 2})
+
+
+@override_settings(SCHEDULER_RECORD_RUNS=False, SCHEDULER_JOB_STALE_SECONDS=600)
+class GenerationJobTests(TestCase):
+    def run_claimed(self, job):
+        # The solver runs for real on the synthetic campus instead of the database inputs
+        with mock.patch('Scheduler.jobs.load_inputs', return_value=(small_campus()['lecture'], {})):
+            with contextlib.redirect_stdout(io.StringIO()):
+                return run_job(job)
+
+    def test_queued_job_is_claimed_once_run_and_reported(self):
+        queued = enqueue_job(ScheduleDraft.LECTURE, seed=SOLVER_SEED)
+        self.assertEqual(job_status(queued)['status'], GenerationJob.QUEUED)
+
+        job = claim_next_job()
+        self.assertEqual((job.pk, job.status), (queued.pk, GenerationJob.RUNNING))
+        self.assertIsNone(claim_next_job())
+
+        job = self.run_claimed(job)
+
+        status = job_status(GenerationJob.objects.get(pk=job.pk))
+        self.assertEqual(
+            (status['status'], status['finished'], status['percent'], status['seed'], status['error']),
+            (GenerationJob.SUCCEEDED, True, 100, SOLVER_SEED, '')
+        )
+        self.assertGreater(status['placed'], 0)
+        self.assertEqual(ScheduleDraft.objects.get(pk=status['draft_id']).payload['seed'], SOLVER_SEED)
+
+    def test_cancelled_running_job_stops_at_the_next_progress_report(self):
+        enqueue_job(ScheduleDraft.LECTURE, seed=SOLVER_SEED)
+        job = claim_next_job()
+        request_cancel(job)
+
+        with self.assertRaises(GenerationCancelled):
+            _progress_reporter(job)(5, 10, 4)
+        self.assertEqual(GenerationJob.objects.get(pk=job.pk).processed, 5)
+
+        job = self.run_claimed(job)
+        self.assertEqual((job.status, job.draft), (GenerationJob.CANCELLED, None))
+
+    def test_cancelling_a_queued_job_finishes_it_without_a_worker(self):
+        job = enqueue_job(ScheduleDraft.EXAM)
+
+        request_cancel(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, GenerationJob.CANCELLED)
+        self.assertIsNotNone(job.finished_at)
+        self.assertIsNone(claim_next_job())
+
+    def test_running_job_without_progress_is_failed_on_the_next_claim(self):
+        enqueue_job(ScheduleDraft.LECTURE)
+        enqueue_job(ScheduleDraft.EXAM)
+        stale, live = claim_next_job(), claim_next_job()
+        GenerationJob.objects.filter(pk=stale.pk).update(
+            heartbeat_at=timezone.now() - datetime.timedelta(seconds=601)
+        )
+
+        self.assertIsNone(claim_next_job())
+
+        stale.refresh_from_db()
+        live.refresh_from_db()
+        self.assertEqual(stale.status, GenerationJob.FAILED)
+        self.assertEqual(job_status(stale)['error'], STALE_JOB_ERROR)
+        self.assertEqual(live.status, GenerationJob.RUNNING)
+
+
+@override_settings(SCHEDULER_DRAFT_MAX_AGE_DAYS=14)
+class DraftTests(TestCase):
+    def payload(self, seed=SOLVER_SEED):
+        return lecture_payload([lecture('CS101', 'Monday')], {'CS102': "No room available"}, seed)
+
+    def age(self, draft, days):
+        ScheduleDraft.objects.filter(pk=draft.pk).update(created_at=timezone.now() - datetime.timedelta(days=days))
+
+    def test_payload_round_trips_through_the_database(self):
+        payload = self.payload()
+
+        draft = ScheduleDraft.objects.get(pk=save_draft(ScheduleDraft.LECTURE, payload).pk)
+
+        self.assertEqual(draft.payload, payload)
+        self.assertEqual((draft.seed, draft.source), (SOLVER_SEED, 'command'))
+
+    def test_expire_drafts_deletes_old_unaccepted_drafts_only(self):
+        old = save_draft(ScheduleDraft.LECTURE, self.payload())
+        accepted = save_draft(ScheduleDraft.LECTURE, self.payload())
+        mark_accepted(accepted)
+        recent = save_draft(ScheduleDraft.EXAM, self.payload())
+        for draft in (old, accepted):
+            self.age(draft, 15)
+        self.age(recent, 13)
+
+        self.assertEqual(expire_drafts(), 1)
+        self.assertEqual(set(ScheduleDraft.objects.values_list('pk', flat=True)), {accepted.pk, recent.pk})
+
+        with self.settings(SCHEDULER_DRAFT_MAX_AGE_DAYS=None):
+            self.age(recent, 100)
+            self.assertEqual(expire_drafts(), 0)
+
+    def test_store_preview_replaces_the_previous_web_draft(self):
+        session = {}
+        first = store_preview(session, ScheduleDraft.LECTURE, self.payload(seed=1))
+        second = store_preview(session, ScheduleDraft.LECTURE, self.payload(seed=2))
+
+        self.assertEqual(session[PREVIEW_SESSION_KEYS[ScheduleDraft.LECTURE]], second.pk)
+        self.assertEqual(preview_draft(session, ScheduleDraft.LECTURE).payload['seed'], 2)
+        self.assertFalse(ScheduleDraft.objects.filter(pk=first.pk).exists())
+
+    def test_store_preview_keeps_a_loaded_command_draft(self):
+        session = {}
+        loaded = save_draft(ScheduleDraft.LECTURE, self.payload(seed=1), source='command')
+        select_preview(session, loaded)
+
+        store_preview(session, ScheduleDraft.LECTURE, self.payload(seed=2))
+
+        self.assertTrue(ScheduleDraft.objects.filter(pk=loaded.pk).exists())
+
+
+class ValidationTests(SimpleTestCase):
+    def test_exam_schedule_violations_are_reported(self):
+        schedule = [
+            {
+                'course': 'CS101', 'day': 'Mon', 'slot': 'AM',
+                'rooms': [{'room': 'R1', 'class': 'CS1', 'student_ids': ['S1', 'S2', 'S3'], 'columns_used': {0, 1}}],
+                'proctors': {'R1': ['P1']},
+            },
+            {
+                'course': 'CS102', 'day': 'Mon', 'slot': 'AM',
+                'rooms': [{'room': 'R1', 'class': 'CS2', 'student_ids': ['S3', 'S4'], 'columns_used': [1, 2]}],
+                'proctors': {'R2': ['P1']},
+            },
+            # Same students and proctor in another slot are fine
+            {
+                'course': 'CS103', 'day': 'Mon', 'slot': 'PM',
+                'rooms': [{
+                    'room': 'R1', 'class': 'CS1', 'student_ids': ['S1', 'S3'], 'columns_used': 'To be done manually'
+                }],
+                'proctors': {'R1': ['P1']},
+            },
+        ]
+
+        violations = validate_exam_schedule(schedule, {'R1': 4})
+
+        self.assertCountEqual(violations, [
+            {'type': PROCTOR_DOUBLE_BOOKED, 'day': 'Mon', 'slot': 'AM', 'proctor': 'P1', 'rooms': ['R1', 'R2']},
+            {'type': STUDENT_CLASH, 'day': 'Mon', 'slot': 'AM', 'student': 'S3', 'courses': ['CS101', 'CS102']},
+            {'type': COLUMN_OVERLAP, 'day': 'Mon', 'slot': 'AM', 'room': 'R1', 'column': 1,
+             'courses': ['CS101', 'CS102']},
+            {'type': ROOM_OVER_CAPACITY, 'day': 'Mon', 'slot': 'AM', 'room': 'R1', 'seated': 5, 'capacity': 4},
+        ])
+        self.assertEqual(validate_exam_schedule(schedule[2:], {'R1': 4}), [])
+
+    def test_lecture_schedule_violations_are_reported(self):
+        schedule = [
+            lecture('CS101', 'Monday', enrollment=50),
+            lecture('CS102', 'Monday', lecturer='Lecturer Two'),
+            lecture('CS103', 'Monday', room='R2'),
+        ]
+
+        types = sorted(violation['type'] for violation in validate_lecture_schedule(schedule, {'R1': 40, 'R2': 40}))
+
+        self.assertEqual(types, sorted([
+            ROOM_OVER_CAPACITY, ROOM_DOUBLE_BOOKED, LECTURER_DOUBLE_BOOKED, CLASS_CLASH
+        ]))
@@ -0,0 +1,123 @@
+"""Cached per-audience timetable data for the portal views.
+
+The role-filtered timetable a student or lecturer sees only depends on who
+they are: a student's class plus registered courses, or a lecturer. Each
+portal view caches the data it renders under a key for that audience in the
+Django cache, so repeated visits skip the filter joins over
+``LectureSchedule``.
+
+Every key embeds a global timetable version. Saving or deleting schedules or
+changing registrations bumps the version (see ``Scheduler.signals``; the
+bulk writers in ``Scheduler.persistence`` bump it once per write through
+``batch_invalidation``), so all cached timetables are invalidated at once and
+the stale entries simply expire.
+
+A bump writes a new random version rather than incrementing the old one:
+``incr`` is only atomic on backends such as Redis, Memcached or LocMem, while
+the file-based and database caches implement it as get-then-set, where two
+concurrent bumps can both land on the same number and a timetable cached
+between them is never invalidated. A plain ``set`` of a value nobody has seen
+is safe on every backend.
+"""
+import hashlib
+import threading
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+
+VERSION_KEY = 'timetable:version'
+HITS_KEY = 'timetable:hits'
+MISSES_KEY = 'timetable:misses'
+
+_batch = threading.local()
+
+
+def _timeout():
+    return getattr(settings, 'TIMETABLE_CACHE_TIMEOUT', 24 * 60 * 60)
+
+
+def _new_version():
+    return uuid.uuid4().hex
+
+
+def timetable_version():
+    """Current timetable version; changes whenever any schedule or registration does."""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # A fresh, never-used value, so entries cached before an eviction are not reused
+        cache.add(VERSION_KEY, _new_version(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidate_timetables():
+    if getattr(_batch, 'depth', 0):
+        return
+    cache.set(VERSION_KEY, _new_version(), timeout=None)
+
+
+@contextmanager
+def batch_invalidation():
+    """Invalidate once on exit instead of on every row-level signal inside the block."""
+    depth = getattr(_batch, 'depth', 0)
+    _batch.depth = depth + 1
+    try:
+        yield
+    finally:
+        _batch.depth = depth
+        if not depth:
+            invalidate_timetables()
+
+
+def student_audience(student_profile):
+    """Cache audience for a student: their class and the courses they registered."""
+    course_ids = sorted(student_profile.registered_courses.values_list('pk', flat=True))
+    digest = hashlib.sha1(','.join(map(str, course_ids)).encode()).hexdigest()
+    return f"student:{student_profile.class_code}:{digest}"
+
+
+def lecturer_audience(lecturer):
+    return f"lecturer:{lecturer.pk}"
+
+
+def _count(key):
+    # Opt-in: the counters cost cache writes on every request and are
+    # approximate, since concurrent increments can be lost
+    if not getattr(settings, 'TIMETABLE_CACHE_STATS', False):
+        return
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, timeout=None)
+
+
+def cached_timetable(view, audience, build):
+    """Data ``view`` renders for ``audience``, calling ``build()`` on a miss."""
+    key = f"timetable:{timetable_version()}:{view}:{audience}"
+    data = cache.get(key)
+    if data is None:
+        _count(MISSES_KEY)
+        data = build()
+        cache.set(key, data, _timeout())
+    else:
+        _count(HITS_KEY)
+    return data
+
+
+def cache_stats():
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    return {
+        'enabled': getattr(settings, 'TIMETABLE_CACHE_STATS', False),
+        'version': cache.get(VERSION_KEY),
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / (hits + misses) if hits + misses else None,
+    }
+
+
+def reset_stats():
+    cache.delete_many([HITS_KEY, MISSES_KEY])
@@ -10,6 +10,11 @@ urlpatterns = [
     path('generate_exam_schedule/', views.generate_exam_schedule, name = 'generate_exam_schedule'),
     path('accept_schedule/', views.accept_schedule, name='accept_schedule'),
     path('accept_exam_schedule/', views.accept_exam_schedule, name='accept_exam_schedule'),
+    path('drafts/<int:draft_id>/', views.load_draft, name='load_draft'),
+    path('drafts/compare/', views.compare_schedule_drafts, name='compare_drafts'),
+    path('jobs/start/', views.start_generation_job, name='start_generation_job'),
+    path('jobs/<int:job_id>/', views.generation_job_status, name='generation_job_status'),
+    path('jobs/<int:job_id>/cancel/', views.cancel_generation_job, name='cancel_generation_job'),
     
     path('edit-schedule/<int:schedule_id>/', views.edit_schedule, name='edit_schedule'),
     path('edit-exam-schedule/<int:exam_id>/', views.edit_exam_schedule, name='edit_exam_schedule'),
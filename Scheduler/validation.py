@@ -0,0 +1,105 @@
+"""Structured checks for generated timetables.
+
+Both validators take solver output (or a stored draft of it) and return a
+list of violation dicts, each with a ``type`` from the constants below plus
+the fields identifying where it happened. Every check is a single grouping
+pass over the schedule keyed by (day, slot, resource); nothing is printed.
+"""
+from collections import defaultdict
+
+PROCTOR_DOUBLE_BOOKED = 'proctor_double_booked'
+STUDENT_CLASH = 'student_clash'
+ROOM_OVER_CAPACITY = 'room_over_capacity'
+COLUMN_OVERLAP = 'column_overlap'
+ROOM_DOUBLE_BOOKED = 'room_double_booked'
+LECTURER_DOUBLE_BOOKED = 'lecturer_double_booked'
+CLASS_CLASH = 'class_clash'
+
+
+def _shared(groups, violation_type, key_names, value_name):
+    """Violations for every group holding more than one entry."""
+    return [
+        dict(zip(key_names, key), type=violation_type, **{value_name: sorted(values)})
+        for key, values in groups.items()
+        if len(values) > 1
+    ]
+
+
+def validate_exam_schedule(exam_schedule, room_size=None):
+    """Check an exam schedule for double-booked proctors, student clashes,
+    over-capacity rooms and columns given to more than one course.
+
+    ``room_size`` enables the capacity check.
+    """
+    proctor_rooms = defaultdict(set)
+    student_courses = defaultdict(list)
+    room_seated = defaultdict(int)
+    column_courses = defaultdict(list)
+
+    for exam in exam_schedule:
+        day, slot, course = exam['day'], exam['slot'], exam['course']
+        for proctor_room, proctors in exam['proctors'].items():
+            for proctor in proctors:
+                proctor_rooms[(day, slot, proctor)].add(proctor_room)
+        for room_info in exam['rooms']:
+            room = room_info['room']
+            student_ids = room_info['student_ids']
+            room_seated[(day, slot, room)] += len(student_ids)
+            for student in student_ids:
+                student_courses[(day, slot, student)].append(course)
+            columns = room_info.get('columns_used')
+            if isinstance(columns, (set, list, tuple)):
+                for column in columns:
+                    column_courses[(day, slot, room, column)].append(course)
+
+    violations = _shared(proctor_rooms, PROCTOR_DOUBLE_BOOKED, ('day', 'slot', 'proctor'), 'rooms')
+    violations += _shared(student_courses, STUDENT_CLASH, ('day', 'slot', 'student'), 'courses')
+    violations += _shared(column_courses, COLUMN_OVERLAP, ('day', 'slot', 'room', 'column'), 'courses')
+    if room_size is not None:
+        violations += [
+            {'type': ROOM_OVER_CAPACITY, 'day': day, 'slot': slot, 'room': room,
+             'seated': seated, 'capacity': room_size.get(room, 0)}
+            for (day, slot, room), seated in room_seated.items()
+            if seated > room_size.get(room, 0)
+        ]
+    return violations
+
+
+def validate_lecture_schedule(schedule, room_size=None):
+    """Check a lecture schedule for rooms, lecturers or classes booked twice
+    in the same slot and for sessions larger than their room.
+
+    ``room_size`` enables the capacity check.
+    """
+    room_sessions = defaultdict(list)
+    lecturer_sessions = defaultdict(list)
+    class_sessions = defaultdict(list)
+    violations = []
+
+    for entry in schedule:
+        day = entry['day']
+        label = f"{entry['course']}/{entry['class']}"
+        for slot in entry['slots']:
+            room_sessions[(day, slot, entry['room'])].append(label)
+            class_sessions[(day, slot, entry['class'])].append(entry['course'])
+            if entry.get('lecturer'):
+                lecturer_sessions[(day, slot, entry['lecturer'])].append(label)
+        if room_size is not None and entry.get('enrollment', 0) > room_size.get(entry['room'], 0):
+            violations.append({
+                'type': ROOM_OVER_CAPACITY, 'day': day, 'slot': ', '.join(entry['slots']),
+                'room': entry['room'], 'seated': entry['enrollment'],
+                'capacity': room_size.get(entry['room'], 0),
+            })
+
+    violations += _shared(room_sessions, ROOM_DOUBLE_BOOKED, ('day', 'slot', 'room'), 'sessions')
+    violations += _shared(lecturer_sessions, LECTURER_DOUBLE_BOOKED, ('day', 'slot', 'lecturer'), 'sessions')
+    violations += _shared(class_sessions, CLASS_CLASH, ('day', 'slot', 'class'), 'courses')
+    return violations
+
+
+def summarize(violations):
+    """Count violations by type."""
+    counts = defaultdict(int)
+    for violation in violations:
+        counts[violation['type']] += 1
+    return dict(counts)
@@ -5,6 +5,7 @@ from Users.models import LecturerProfile
 from .forms import BroadcastForm
 from django.contrib.auth.decorators import login_required
 from Scheduler.models import LectureSchedule
+from Scheduler.timetable_cache import invalidate_timetables
 from django.db.models import Q
 
 from django.http import FileResponse, Http404
@@ -104,6 +105,8 @@ def delete_room(request, room_id):
         return HttpResponse(status=405)
     room = get_object_or_404(Room, id=room_id)
     room.delete()
+    # Its schedules were cascade-deleted without signals
+    invalidate_timetables()
     return redirect('rooms')
 
 
@@ -198,6 +201,8 @@ def delete_course(request, course_id):
         return HttpResponse(status=405)
     course = get_object_or_404(Course, id=course_id)
     course.delete()
+    # Its schedules were cascade-deleted without signals
+    invalidate_timetables()
     return redirect('courses')
 
 
@@ -300,6 +305,8 @@ def delete_lecturer(request, lecturer_id):
         return HttpResponse(status=405)
     lecturer = get_object_or_404(Lecturer, id=lecturer_id)
     lecturer.delete()
+    # Its schedules were cascade-deleted without signals
+    invalidate_timetables()
     return redirect('lecturers')
 
 
@@ -362,6 +369,8 @@ def delete_class(request, class_id):
         return HttpResponse(status=405)
     class_obj = get_object_or_404(Class, id=class_id)
     class_obj.delete()
+    # Its schedules were cascade-deleted without signals
+    invalidate_timetables()
     return redirect('classes')
 
 from django.contrib import messages
@@ -136,3 +136,42 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media/')
 
+
+# Timetable generation
+# Number of seeded lecture-solver runs to compare per generation (1 = single run)
+SCHEDULER_PORTFOLIO_RUNS = 1
+# Worker processes for portfolio runs (None = one per CPU)
+SCHEDULER_PORTFOLIO_WORKERS = None
+# Record the inputs, seed and result of every generation as a snapshot so it can be replayed
+# with `manage.py replay_schedule`; off by default since each record holds every student id
+SCHEDULER_RECORD_RUNS = False
+SCHEDULER_RUNS_DIR = BASE_DIR / 'scheduler_runs'
+# Recorded runs kept per kind (lecture/exam) when recording; older ones are deleted (None keeps all)
+SCHEDULER_RUNS_KEEP = 20
+# Days a generated draft is kept for preview, comparison and loading (None keeps them)
+SCHEDULER_DRAFT_MAX_AGE_DAYS = 14
+# Snapshot of every accepted timetable (None disables archiving)
+SCHEDULER_ARCHIVE_DIR = BASE_DIR / 'scheduler_archive'
+# Seconds between queue checks in `manage.py run_generation_worker`
+SCHEDULER_JOB_POLL_INTERVAL = 2.0
+# Seconds a running job may go without a progress write before the next worker
+# to claim a job marks it as failed (None never fails it); covers crashed workers
+SCHEDULER_JOB_STALE_SECONDS = 600
+# Check generated timetables for clashes and over-capacity rooms before preview
+# (also available as `manage.py validate_schedule`)
+SCHEDULER_VALIDATE_SCHEDULES = False
+
+# File-based so every worker process sees the same cached timetables and
+# invalidations; swap for Redis/Memcached in larger deployments
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'django_cache',
+    }
+}
+# Seconds a student's or lecturer's rendered timetable stays cached
+# (schedule and registration changes invalidate it sooner)
+TIMETABLE_CACHE_TIMEOUT = 24 * 60 * 60
+# Count timetable cache hits and misses (shown by manage.py timetable_cache_stats);
+# costs two cache writes per request, so only on while debugging
+TIMETABLE_CACHE_STATS = DEBUG
@@ -0,0 +1,129 @@
+"""Benchmark room selection with and without the room-candidate index.
+
+Runs outside Django against a synthetic campus:
+
+    python -m benchmarks.bench_select_room --rooms 500 --classes 2000
+"""
+import argparse
+import random
+import time
+from collections import defaultdict
+
+from Scheduler.algorithm import select_room
+from Scheduler.booking import BookingEngine, ROOM
+from Scheduler.room_index import RoomCandidateIndex
+
+from .campus import DAYS, TIME_SLOTS, synthetic_rooms
+
+LAB_TYPES = ['Computer', 'Chemistry', 'Physics', 'Biology']
+
+
+def legacy_select_room(class_size, available_rooms, room_size, course_type, lab_type,
+                       room_type_map, lab_room_map, room_usage_count, bookings, day, mask):
+    """Room selection as it was before the index: filter and sort on every call."""
+    is_large_class = class_size >= 200
+    if course_type == "practical":
+        suitable_rooms = [
+            r for r in available_rooms
+            if room_type_map.get(r) == "laboratory" and
+                lab_type in lab_room_map.get(r, []) and
+                room_size[r] >= class_size
+        ]
+    else:
+        suitable_rooms = [
+            r for r in available_rooms
+            if (room_type_map.get(r) in {"lecture hall", "classroom", "auditorium"}) and
+                room_size[r] >= class_size and
+                (not is_large_class or room_type_map.get(r) == "lecture hall") and
+                (is_large_class or room_size[r] <= max(class_size * 2, 100))
+        ]
+    if is_large_class:
+        suitable_rooms.sort(key=lambda r: (-room_size[r], room_usage_count[r]))
+    else:
+        suitable_rooms.sort(key=lambda r: (room_size[r], room_usage_count[r]))
+    for room in suitable_rooms:
+        if bookings.is_free(ROOM, room, day, mask):
+            return room
+    if not suitable_rooms and is_large_class:
+        fallback_rooms = [
+            r for r in available_rooms
+            if room_size[r] >= class_size and room_type_map.get(r) in {"lecture hall", "auditorium"}
+        ]
+        fallback_rooms.sort(key=lambda r: (-room_size[r], room_usage_count[r]))
+        for room in fallback_rooms:
+            if bookings.is_free(ROOM, room, day, mask):
+                return room
+    return None
+
+
+def make_probes(count, rng):
+    """(class size, course type, lab type) triples to place."""
+    probes = []
+    for _ in range(count):
+        if rng.random() < 0.15:
+            probes.append((rng.randint(20, 80), 'practical', rng.choice(LAB_TYPES)))
+        else:
+            probes.append((rng.randint(20, 400), 'lecture', None))
+    return probes
+
+
+def book_randomly(bookings, rooms, rng, density):
+    """Pre-book a fraction of room slots so the availability scan has work to do."""
+    for room in rooms:
+        for day in range(len(DAYS)):
+            for slot in range(len(TIME_SLOTS)):
+                if rng.random() < density:
+                    bookings.book(ROOM, room, day, 1 << slot)
+
+
+def run(room_count, class_count, density, seed):
+    rng = random.Random(seed)
+    room_size, room_type_map, lab_room_map = synthetic_rooms(room_count, rng, LAB_TYPES)
+    rooms = list(room_size)
+    probes = make_probes(class_count, rng)
+    bookings = BookingEngine(DAYS, TIME_SLOTS)
+    book_randomly(bookings, rooms, rng, density)
+    usage = defaultdict(int, {room: rng.randint(0, 5) for room in rooms})
+    combinations = [(day, start) for day in range(len(DAYS)) for start in range(len(TIME_SLOTS) - 1)]
+
+    start = time.perf_counter()
+    legacy = []
+    for class_size, course_type, lab_type in probes:
+        for day, slot in combinations:
+            legacy.append(legacy_select_room(
+                class_size, rooms, room_size, course_type, lab_type, room_type_map,
+                lab_room_map, usage, bookings, day, BookingEngine.block_mask(slot, 2)
+            ))
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = RoomCandidateIndex(rooms, room_size, room_type_map, lab_room_map)
+    indexed = []
+    for class_size, course_type, lab_type in probes:
+        ranked, fallback = index.candidates(class_size, course_type, lab_type, usage)
+        for day, slot in combinations:
+            indexed.append(select_room(ranked, fallback, bookings, day, BookingEngine.block_mask(slot, 2)))
+    indexed_time = time.perf_counter() - start
+
+    if legacy != indexed:
+        raise AssertionError("Indexed room selection diverged from the legacy selection")
+
+    calls = len(probes) * len(combinations)
+    print(f"{room_count} rooms, {len(probes)} classes, {calls} select_room calls")
+    print(f"  legacy : {legacy_time:.3f}s ({legacy_time / calls * 1e6:.1f} us/call)")
+    print(f"  indexed: {indexed_time:.3f}s ({indexed_time / calls * 1e6:.1f} us/call)")
+    print(f"  speedup: {legacy_time / indexed_time:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rooms', type=int, default=500)
+    parser.add_argument('--classes', type=int, default=500)
+    parser.add_argument('--density', type=float, default=0.6, help="Fraction of room slots pre-booked")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    run(args.rooms, args.classes, args.density, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""Synthetic campus generator for the scheduling algorithms.
+
+Produces inputs in exactly the dict shapes ``Scheduler.views.generate`` and
+``generate_exam_schedule`` build from the ORM, so both solvers can be run and
+measured without Django or a database.
+"""
+import random
+
+from Scheduler.enrollment import build_enrollment
+
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+TIME_SLOTS = [f"{hour:02d}:00 - {hour:02d}:55" for hour in range(8, 18)]
+EXAM_SLOTS = ["08:00 - 11:00", "12:00 - 15:00", "16:00 - 19:00"]
+
+SIZES = {
+    'small': dict(rooms=50, classes=20, courses=60, students=2000, lecturers=40),
+    'medium': dict(rooms=200, classes=80, courses=250, students=10000, lecturers=150),
+    'large': dict(rooms=500, classes=200, courses=600, students=40000, lecturers=400),
+}
+
+
+def synthetic_rooms(count, rng, lab_types):
+    """``room_size``, ``room_type_map`` and ``lab_room_map`` for ``count`` rooms."""
+    room_size, room_type_map, lab_room_map = {}, {}, {}
+    for i in range(count):
+        code = f"R{i:04d}"
+        room_type = rng.choice(['classroom', 'classroom', 'lecture hall', 'auditorium', 'laboratory'])
+        if room_type == 'laboratory':
+            room_size[code] = rng.choice([30, 40, 60, 80])
+            lab_room_map[code] = [rng.choice(lab_types)]
+        else:
+            room_size[code] = rng.choice([40, 60, 80, 100, 150, 200, 300, 450])
+            lab_room_map[code] = []
+        room_type_map[code] = room_type
+    return room_size, room_type_map, lab_room_map
+
+
+def generate_campus(rooms=50, classes=20, courses=60, students=2000, lecturers=40,
+                    lab_types=4, availability_sparsity=0.3, practical_share=0.15,
+                    exam_days=10, seed=0):
+    """Build a synthetic campus.
+
+    ``availability_sparsity`` is the share of lecturers (and proctors) that
+    declare restricted availability instead of being available all week.
+    Returns ``{'lecture': algorithm_data, 'exam': exam_data}``.
+    """
+    rng = random.Random(seed)
+    lab_type_names = [f"lab-{i}" for i in range(lab_types)]
+    room_size, room_type_map, lab_room_map = synthetic_rooms(rooms, rng, lab_type_names)
+
+    # Students are spread over classes with uneven sizes
+    class_codes = [f"CL{i:03d}" for i in range(classes)]
+    weights = [rng.uniform(0.5, 2.0) for _ in class_codes]
+    total_weight = sum(weights)
+    class_students = {}
+    for code, weight in zip(class_codes, weights):
+        size = max(1, round(students * weight / total_weight))
+        class_students[code] = [f"{code}-{n:04d}" for n in range(size)]
+
+    lecturer_names = [f"Lecturer {i:03d}" for i in range(lecturers)]
+    lecturer_availability = {}
+    for name in lecturer_names:
+        availability = {}
+        if rng.random() < availability_sparsity:
+            for day in DAYS:
+                availability[day] = [slot for slot in TIME_SLOTS if rng.random() < 0.6]
+        lecturer_availability[name] = availability
+
+    course_credits = {}
+    course_class_map = {}
+    registrations = []
+    course_type_map = {}
+    course_lab_type_map = {}
+    lecturers_courses_mapping = {}
+    for i in range(courses):
+        code = f"C{i:04d}"
+        course_credits[code] = rng.choice([2, 3, 3, 4])
+        assigned = rng.sample(class_codes, min(rng.choice([1, 1, 2, 3]), len(class_codes)))
+        course_class_map[code] = assigned
+        registrations.extend((code, student) for cls in assigned for student in class_students[cls])
+        if rng.random() < practical_share:
+            course_type_map[code] = 'practical'
+            course_lab_type_map[code] = rng.choice(lab_type_names)
+        else:
+            course_type_map[code] = 'lecture'
+        lecturers_courses_mapping[code] = rng.sample(lecturer_names, min(rng.choice([1, 1, 2]), len(lecturer_names)))
+
+    # Same compact form the database loader produces
+    enrollment_breakdown, student_indexes = build_enrollment(
+        ((student, code) for code, members in class_students.items() for student in members),
+        registrations,
+    )
+
+    algorithm_data = {
+        'courses': course_credits,
+        'course_class_map': course_class_map,
+        'enrollment_breakdown': enrollment_breakdown,
+        'room_size': room_size,
+        'lecturers_courses_mapping': lecturers_courses_mapping,
+        'lecturer_availability': lecturer_availability,
+        'rooms': list(room_size),
+        'days': list(DAYS),
+        'time_slots': list(TIME_SLOTS),
+        'course_type_map': course_type_map,
+        'room_type_map': room_type_map,
+        'lab_room_map': lab_room_map,
+        'course_lab_type_map': course_lab_type_map,
+    }
+
+    exam_day_names = [f"2025-05-{day:02d}" for day in range(5, 5 + exam_days)]
+    room_dimensions, max_courses, proctors_in_center = {}, {}, {}
+    overflow_rooms = []
+    for code, capacity in room_size.items():
+        columns = rng.choice([4, 6, 8, 10])
+        room_dimensions[code] = f"{max(1, capacity // columns)} x {columns}"
+        max_courses[code] = rng.choice([1, 2, 2, 3])
+        proctors_in_center[code] = 2 if capacity >= 150 else 1
+        if room_type_map[code] == 'auditorium' and rng.random() < 0.3:
+            overflow_rooms.append(code)
+
+    proctors_availability = {}
+    for name in lecturer_names:
+        if rng.random() < availability_sparsity:
+            proctors_availability[name] = {day: [] for day in rng.sample(exam_day_names, len(exam_day_names) // 2)}
+        else:
+            proctors_availability[name] = {}
+
+    exam_data = {
+        'student_enrollment': {
+            code: sum(len(ids) for ids in breakdown.values())
+            for code, breakdown in enrollment_breakdown.items()
+        },
+        'course_type': {
+            code: 'Practical' if course_type == 'practical' else 'Lecture'
+            for code, course_type in course_type_map.items()
+        },
+        'exam_days': exam_day_names,
+        'exam_slots': list(EXAM_SLOTS),
+        'room_size': dict(room_size),
+        'room_dimensions': room_dimensions,
+        'overflow_rooms': overflow_rooms,
+        'max_courses': max_courses,
+        'proctors_in_center': proctors_in_center,
+        'proctors': list(lecturer_names),
+        'proctors_availability': proctors_availability,
+        'enrollment_breakdown': enrollment_breakdown,
+        'student_indexes': student_indexes,
+    }
+
+    return {'lecture': algorithm_data, 'exam': exam_data}
@@ -0,0 +1,163 @@
+"""Benchmark both scheduling algorithms on synthetic campuses.
+
+Writes a JSON report that can be diffed between commits:
+
+    python -m benchmarks.run --sizes small medium --output bench.json
+    python -m benchmarks.run --sizes small --baseline bench.json
+
+Recorded runs and archived timetables (see ``Scheduler.snapshot``) can be
+benchmarked instead of, or as well as, the synthetic campuses:
+
+    python -m benchmarks.run --snapshots scheduler_runs/exam-*.snap
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+
+from Scheduler.algorithm import exam_schedule, generate_complete_schedule
+from Scheduler.portfolio import required_blocks, score_schedule
+from Scheduler.snapshot import read_snapshot
+
+from .campus import SIZES, generate_campus
+
+
+def _measure(solver, inputs, seed, track_memory):
+    """Run ``solver`` quietly; return ``(result, wall seconds, peak bytes or None)``."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = solver(**inputs, seed=seed)
+        elapsed = time.perf_counter() - start
+
+        peak = None
+        if track_memory:
+            # Separate run so tracemalloc overhead does not skew the timing
+            tracemalloc.start()
+            solver(**inputs, seed=seed)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def bench_lecture(algorithm_data, seed, track_memory):
+    (schedule, scheduling_issues), elapsed, peak = _measure(
+        generate_complete_schedule, algorithm_data, seed, track_memory
+    )
+    required = required_blocks(
+        algorithm_data['courses'], algorithm_data['course_class_map'], algorithm_data['enrollment_breakdown']
+    )
+    unscheduled, evictions, over_capacity, empty_seats = score_schedule(
+        schedule, scheduling_issues, required, algorithm_data['room_size']
+    )
+    return {
+        'wall_time_s': round(elapsed, 4),
+        'peak_memory_bytes': peak,
+        'blocks_required': sum(required.values()),
+        'sessions_placed': len(schedule),
+        'evictions': evictions,
+        'unscheduled_blocks': unscheduled,
+        'over_capacity': over_capacity,
+        'empty_seats': empty_seats,
+    }
+
+
+def bench_exam(exam_data, seed, track_memory):
+    (schedule, manual_assignments, unused_columns), elapsed, peak = _measure(
+        exam_schedule, exam_data, seed, track_memory
+    )
+    return {
+        'wall_time_s': round(elapsed, 4),
+        'peak_memory_bytes': peak,
+        'exams_placed': len(schedule),
+        'students_seated': sum(len(room['student_ids']) for exam in schedule for room in exam['rooms']),
+        'manual_assignments': len(manual_assignments),
+        'unscheduled_students': sum(entry['unassigned_count'] for entry in manual_assignments),
+        'unused_columns': len(unused_columns),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, seed, track_memory, solvers, snapshots=()):
+    report = {
+        'commit': _git_commit(),
+        'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'seed': seed,
+        'results': {},
+    }
+    for size in sizes:
+        campus = generate_campus(**SIZES[size], seed=seed)
+        results = {'campus': SIZES[size]}
+        if 'lecture' in solvers:
+            results['lecture'] = bench_lecture(campus['lecture'], seed, track_memory)
+        if 'exam' in solvers:
+            results['exam'] = bench_exam(campus['exam'], seed, track_memory)
+        report['results'][size] = results
+        print(f"[{size}] " + "  ".join(
+            f"{solver}: {results[solver]['wall_time_s']:.3f}s" for solver in solvers
+        ))
+    for path in snapshots:
+        # Enrollment arrays stay memory-mapped, as a large recorded campus would be
+        snapshot = read_snapshot(path, mmap_arrays=True)
+        kind = snapshot['kind']
+        bench = bench_lecture if kind == 'lecture' else bench_exam
+        name = os.path.basename(path)
+        report['results'][name] = {kind: bench(snapshot['inputs'], snapshot['seed'], track_memory)}
+        print(f"[{name}] {kind}: {report['results'][name][kind]['wall_time_s']:.3f}s")
+    return report
+
+
+def compare(report, baseline):
+    """Print metric changes against a previous report."""
+    print(f"Compared with {baseline.get('commit') or 'baseline'}:")
+    for size, results in report['results'].items():
+        for solver, metrics in results.items():
+            previous = baseline.get('results', {}).get(size, {}).get(solver)
+            if solver == 'campus' or not previous:
+                continue
+            for metric, value in metrics.items():
+                old = previous.get(metric)
+                if value is None or old is None or value == old:
+                    continue
+                change = f" ({(value - old) / old:+.1%})" if old else ""
+                print(f"  {size}.{solver}.{metric}: {old} -> {value}{change}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', nargs='*', choices=sorted(SIZES),
+                        help="Synthetic campus sizes (default: small medium, or none with --snapshots)")
+    parser.add_argument('--snapshots', nargs='+', default=[], help="Recorded run snapshots to benchmark")
+    parser.add_argument('--solvers', nargs='+', choices=['lecture', 'exam'], default=['lecture', 'exam'])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc peak-memory run")
+    parser.add_argument('--output', help="Write the JSON report to this file")
+    parser.add_argument('--baseline', help="Previous JSON report to compare against")
+    args = parser.parse_args()
+
+    sizes = args.sizes if args.sizes is not None else ([] if args.snapshots else ['small', 'medium'])
+    report = run(sizes, args.seed, not args.no_memory, args.solvers, args.snapshots)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as handle:
+            compare(report, json.load(handle))
+
+
+if __name__ == '__main__':
+    main()